@@ -5,13 +5,16 @@
 #from .pytplot import *
 
 from .utilities.is_timezone_aware import is_timezone_aware
-from .tplot_tools import get_y_range
+from .tplot_tools import get_y_range, get_cached_y_range
 from .tplot_tools import tplot_rename
 from .tplot_tools import del_data
 from .tplot_tools import store_data
 from .tplot_tools import store
 from .tplot_tools import get_data
 from .tplot_tools import get
+from .tplot_tools import tchunk
+from .tplot_tools import tcompute
+from .tplot_tools import texpr
 from .tplot_tools import str_to_float_fuzzy
 from .tplot_tools import tplot_names
 from .tplot_tools import wildcard_expand
@@ -27,6 +30,7 @@ from .tplot_tools import tplot_save
 from .tplot_tools import tnames
 from .tplot_tools import convert_tplotxarray_to_pandas_dataframe
 from .tplot_tools import tplot_restore
+from .tplot_tools import close_hdf5
 from .tplot_tools import is_pseudovariable
 from .tplot_tools import count_traces
 from .tplot_tools import get_timespan
@@ -9,6 +9,16 @@ Creates a new tplot variable as the time average of original.
 import logging
 import numpy as np
 from pyspedas.tplot_tools import store_data, get_data, tnames, time_double
+from pyspedas.tplot_tools.chunked import is_chunked, chunked_bin_means
+from pyspedas.tplot_tools.binning import bin_statistic
+
+
+def _bin_means(data, ind, nbins):
+    # NaN-ignoring mean of each bin; a single column of 2-d data gives one value per bin
+    means = bin_statistic(data, ind, nbins, statistic='mean')
+    if data.ndim == 2 and data.shape[1] == 1:
+        means = means[:, 0]
+    return means
 
 
 def avg_data(names, trange=None, res=None, width=None,
@@ -77,23 +87,21 @@ def avg_data(names, trange=None, res=None, width=None,
         new = n_names[old_idx]
 
         # Get times and data
-        d = get_data(old)
+        d = get_data(old, lazy=True)
         metadata = get_data(old, metadata=True)
 
         time = d[0]
         time = np.array(time_double(time))
         time_len = len(time)
 
-        data = np.array(d[1])
+        # Chunked (dask-backed) data is averaged lazily, chunk by chunk
+        chunked = is_chunked(d[1])
+        data = d[1] if chunked else np.array(d[1])
         dim = data.shape
         dim0 = dim[0]
         if dim0 != time_len:
             logging.error('avg_data: Data and time length mismatch.')
             continue
-        if len(dim) < 2:
-            dim1 = 1
-        else:
-            dim1 = dim[1]
 
         # Data may also contain v, v1, v2, v3
         process_energies = []
@@ -107,8 +115,6 @@ def avg_data(names, trange=None, res=None, width=None,
                     retain_energies.append(i)
 
         process_v = {}
-        for i in process_energies:
-            process_v[d._fields[i]] = []
 
         # Find start and end times
         if trange is not None and len(trange) == 2 and trange[0] < trange[1]:
@@ -164,36 +170,15 @@ def avg_data(names, trange=None, res=None, width=None,
         mx = np.max(ind) + 1
         new_times = (np.arange(mx) + 0.5) * dt + time_start
 
-        # Find new data
-        new_data = []
-        for i in range(int(max_ind)):
-            if i < 0:
-                continue
-
-            idx0 = np.asarray(ind == i).nonzero()
-            isempty = True if len(idx0) < 1 else False
-
-            if dim1 < 2:
-                nd0 = np.nan if isempty else np.nanmean(data[idx0])
-            else:
-                nd0 = []
-                for j in range(dim1):
-                    tmp = np.nan if isempty else np.nanmean(data[idx0, j])
-                    nd0.append(tmp)
-
-            new_data.append(nd0)
-
-            for ii in process_energies:
-                # The following processes v, v1, v2, v3
-                dime1 = len(d[ii][0])
-                if dime1 < 2:
-                    nd1 = np.nan if isempty else np.nanmean(d[ii][idx0])
-                else:
-                    nd1 = []
-                    for j in range(dime1):
-                        tmp = np.nan if isempty else np.nanmean(d[ii][idx0, j])
-                        nd1.append(tmp)
-                process_v[d._fields[ii]].append(nd1)
+        # Find new data, averaging all the bins (and columns) at once
+        if chunked:
+            new_data = chunked_bin_means(data, ind.astype(np.int64), int(max_ind))
+        else:
+            new_data = _bin_means(data, ind, int(max_ind))
+
+        # The following processes v, v1, v2, v3
+        for ii in process_energies:
+            process_v[d._fields[ii]] = _bin_means(np.asarray(d[ii]), ind, int(max_ind))
 
         # Create the new tplot variable
         data_dict = {'x': new_times, 'y': new_data}
@@ -7,13 +7,21 @@ Similar to deriv_data.pro in IDL SPEDAS.
 
 """
 import logging
+from functools import partial
 
 import numpy as np
 
 import pyspedas
+from pyspedas.tplot_tools import parallel_map
 
 
-def deriv_data(names, newname=None, suffix=None, overwrite=None, edge_order=1):
+def _gradient(item, edge_order=1):
+    # Derivative of one variable's (times, values), a module-level function so that it can run in worker processes
+    times, y = item
+    return np.gradient(y, times, axis=0, edge_order=edge_order)
+
+
+def deriv_data(names, newname=None, suffix=None, overwrite=None, edge_order=1, max_workers=None):
     """
     Compute the derivative.
 
@@ -30,6 +38,9 @@ def deriv_data(names, newname=None, suffix=None, overwrite=None, edge_order=1):
         Replace the existing tplot name.
     edge_order: int, optional
         A value passed to np.gradient that specifies how boundaries are treated
+    max_workers: int, optional
+        Number of variables processed at once (see pyspedas.tplot_tools.set_parallel).
+        Default is None (the default set by set_parallel, normally 1).
 
     Returns
     -------
@@ -59,10 +70,14 @@ def deriv_data(names, newname=None, suffix=None, overwrite=None, edge_order=1):
     if len(n_names) != len(old_names):
         n_names = [s + suffix for s in old_names]
 
-    for i, old in enumerate(old_names):
+    items = []
+    for old in old_names:
         data = pyspedas.get_data(old)
-        data_grad = np.gradient(data.y, data.times, axis = 0, edge_order=edge_order)
-        pyspedas.store_data(n_names[i], data={'x': data.times, 'y': data_grad})
+        items.append((data.times, data.y))
+    grads = parallel_map(partial(_gradient, edge_order=edge_order), items, max_workers=max_workers)
+
+    for i, (times, _) in enumerate(items):
+        pyspedas.store_data(n_names[i], data={'x': times, 'y': grads[i]})
         logging.info('deriv_data was applied to: ' + n_names[i])
 
     return n_names
\ No newline at end of file
@@ -1,10 +1,10 @@
 """
 Python implementation of IDL reduce_tres function.
 
-Uses pyspedas rebin function.
+Averages blocks of n time samples with the time binning engine.
 """
 import numpy as np
-from pyspedas.analysis.rebin import rebin
+from pyspedas.tplot_tools.binning import bin_statistic
 
 
 def reduce_tres(dat, n):
@@ -29,34 +29,14 @@ def reduce_tres(dat, n):
         return dat
 
     dat = np.asarray(dat)
-    dim = dat.shape
-
-    # Calculate how many elements to truncate to make divisible by n
-    m = dim[0] % n
-    l = dim[0] - m - 1
-
-    # Handle different dimensionalities
-    if dat.ndim == 1:
-        # IDL: return,rebin(dat[0:l],dim[0]/n)
-        truncated = dat[: l + 1]
-        new_dim = len(truncated) // n
-        return rebin(truncated, new_dim)
-
-    elif dat.ndim == 2:
-        # IDL: return,rebin(dat[0:l,*],dim[0]/n,dim[1])
-        truncated = dat[: l + 1, :]
-        new_dim0 = truncated.shape[0] // n
-        new_dim1 = dim[1]
-        return rebin(truncated, (new_dim0, new_dim1))
-
-    elif dat.ndim == 3:
-        # IDL: return,rebin(dat[0:l,*,*],dim[0]/n,dim[1],dim[2])
-        truncated = dat[: l + 1, :, :]
-        new_dim0 = truncated.shape[0] // n
-        new_dim1 = dim[1]
-        new_dim2 = dim[2]
-        return rebin(truncated, (new_dim0, new_dim1, new_dim2))
-
-    else:
+    if dat.ndim > 3:
         # For higher dimensions, return 0 (matching IDL behavior)
         return 0
+
+    # IDL: return,rebin(dat[0:l,*,*],dim[0]/n,dim[1],dim[2]), where the trailing
+    # samples that don't make up a full block of n are dropped
+    nbins = dat.shape[0] // n
+    ind = np.arange(dat.shape[0]) // n
+    means = bin_statistic(dat, ind, nbins, statistic='mean', skip_nans=False)
+    # Like rebin, keep the type of the input (integer averages are truncated)
+    return means.astype(dat.dtype, copy=False)
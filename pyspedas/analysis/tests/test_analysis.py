@@ -308,7 +308,7 @@ class TestAnalysisFunctions(unittest.TestCase):
 
             # Check that subtract_average was called with the correct parameters, including median=1
             mock_subtract_average.assert_called_once_with(
-                "test", newname="new_test", suffix="-sfx", overwrite=True, median=1
+                "test", newname="new_test", suffix="-sfx", overwrite=True, median=1, width=None
             )
 
     def test_yclip(self):
@@ -343,6 +343,14 @@ class TestAnalysisFunctions(unittest.TestCase):
         time_clip(["test", "test1"], 1577308800, 1577598800, newname="testtest2")
         time_clip("test1", 1677112800, 1577608800)
         self.assertTrue((dd == [3.0, 5.0, 8.0, 15.0]).all())
+        # the clipped data is a copy, not a view of the input variable
+        dd[0] = -999.0
+        self.assertTrue(get_data("test1").y[0] == 3.0)
+        self.assertFalse(np.shares_memory(get_data("test1-tclip").y, get_data("test1").y))
+        # clipping nothing makes a copy-on-write copy
+        time_clip("test1", 1577000000, 1597998800, newname="test1-all")
+        get_data("test1-all").y[1] = -1.0
+        self.assertTrue(get_data("test1").y[1] == 5.0)
 
     def test_avg_data(self):
         """Test avg_data."""
@@ -382,6 +390,35 @@ class TestAnalysisFunctions(unittest.TestCase):
         self.assertTrue(d2[1][-1][0] == 15.0)
         self.assertTrue(len(d2[2]) == len(d2[0]))
 
+    def test_avg_res_data(self):
+        """Test avg_res_data and reduce_tres against block averages."""
+        from pyspedas import avg_res_data
+        from pyspedas.analysis.reduce_tres import reduce_tres
+        from pyspedas.tplot_tools.binning import bin_statistic
+
+        y = np.arange(21.0).reshape(7, 3)
+        y[1, 2] = np.nan
+        store_data("res_test", data={"x": np.arange(7.0) * 3 + 2, "y": y})
+        avg_res_data("res_test", 2, "res_test2")
+        d = get_data("res_test2")
+        assert_allclose(d.times, [3.5, 9.5, 15.5])
+        assert_allclose(d.y[0], [1.5, 2.5, 2.0])
+        assert_allclose(d.y[1:], (y[2:6:2] + y[3:7:2]) / 2)
+        avg_res_data("res_test", 2)  # replaces the variable
+        assert_allclose(get_data("res_test").y, d.y)
+
+        # reduce_tres doesn't skip NaNs, and keeps the input type
+        r = reduce_tres(y, 2)
+        self.assertTrue(np.isnan(r[0, 2]))
+        assert_allclose(r[1:], d.y[1:])
+        assert_allclose(reduce_tres(np.arange(7), 3), [1, 4])
+
+        ind = [0, 0, 2, 2, 2, -1, 0]
+        data = np.array([1.0, np.nan, 3.0, 4.0, 8.0, 100.0, 5.0])
+        assert_allclose(bin_statistic(data, ind, 3), [3.0, np.nan, 5.0])
+        assert_allclose(bin_statistic(data, ind, 3, statistic="median"), [3.0, np.nan, 4.0])
+        assert_allclose(bin_statistic(data, ind, 3, statistic="count"), [2, 0, 3])
+
     def test_avg_data_idl(self):
         # Compare data with IDL avg_data
         # Requires file: avg_data_validate.tplot from
@@ -754,6 +791,38 @@ class TestAnalysisFunctions(unittest.TestCase):
         d5 = get_data("nparray_str")
         self.assertTrue(abs(d5[1][1][0] - 5.80645161) < 1e-6)
 
+    def test_interp_plan(self):
+        """Test cached interpolation plans and their use by tinterpol."""
+        from pyspedas.tplot_tools.interp_plan import interp_plan, clear_interp_plans
+
+        clear_interp_plans()
+        source = np.array([30.0, 0.0, 10.0, 20.0])
+        values = np.array([[3.0, np.nan], [0.0, 0.5], [1.0, 1.0], [np.nan, 2.0]])
+        target = [-5.0, 0.0, 5.0, 10.0, 35.0]
+        plan = interp_plan(source, target)
+        self.assertIs(interp_plan(source.copy(), np.array(target)), plan)
+        assert_allclose(plan.apply(values), [[np.nan, np.nan], [0.0, 0.5], [0.5, 0.75], [1.0, 1.0], [np.nan, np.nan]])
+        assert_allclose(plan.apply(values[:, 1], extrapolate=True), [0.25, 0.5, 0.75, 1.0, np.nan])
+
+        # tinterpol gives the input values exactly at matching times, for all the variables on a time grid
+        x = 1.7e9 + np.arange(10.0)
+        store_data("plan1", data={"x": x, "y": np.linspace(0.0, 0.9, 10, dtype=np.float32)})
+        store_data("plan2", data={"x": x, "y": np.arange(20.0).reshape(10, 2), "v": np.ones((10, 2))})
+        tinterpol("plan?", x[::3], suffix="-p")
+        assert_allclose(get_data("plan1-p").y, np.float32([0.0, 0.3, 0.6, 0.9]), rtol=0)
+        d = get_data("plan2-p")
+        assert_allclose(d.y, np.arange(20.0).reshape(10, 2)[::3])
+        self.assertEqual(d.v.shape, (4, 2))
+        tinterpol("plan?", x[::3], suffix="-pp", max_workers=2)
+        assert_allclose(get_data("plan2-pp").y, d.y)
+
+        # the cache can be used from several threads, with more grids than it holds
+        from pyspedas.tplot_tools import parallel_map
+        grids = [np.arange(float(n)) for n in range(2, 42)]
+        plans = parallel_map(lambda grid: interp_plan(grid, grid[:-1] + 0.5), grids * 3, max_workers=8)
+        for grid, plan in zip(grids * 3, plans):
+            assert_allclose(plan.apply(grid), grid[:-1] + 0.5)
+
     def test_scipy_interp1d(self):
         import scipy
         import numpy as np
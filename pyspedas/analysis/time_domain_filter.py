@@ -5,8 +5,9 @@ Created on Wed Oct 13 14:24:48 2021
 @author: kvidal
 """
 
-from scipy import signal, special
+from scipy import special
 import numpy as np
+from pyspedas.tplot_tools.running_stats import running_filter
 
 def time_domain_filter(
         data,
@@ -19,14 +20,14 @@ def time_domain_filter(
 
     Parameters:
     ----------
-        data: input nx3 array
+        data: input array, time as the first dimension (e.g. nx3); all the columns are filtered
         time: in seconds
         freq_low: low coutoff frequency in Hz
         freq_high: high cutoff frequency in Hz
 
     Returns:
     -------
-        nx3 array of band-pass filtered data
+        array of band-pass filtered data, the same shape as data
 
     Example:
     -------
@@ -52,10 +53,7 @@ def time_domain_filter(
     if nterms > 5000.:
         nterms = 5000.
     out = digital_filter(flow,fhigh,A,nterms)
-    new_series_x = signal.convolve(data[:,0],out,mode='same',method='direct')
-    new_series_y = signal.convolve(data[:,1],out,mode='same',method='direct')
-    new_series_z = signal.convolve(data[:,2],out,mode='same',method='direct')
-    new_series =  np.transpose(np.vstack((new_series_x,new_series_y,new_series_z)))
+    new_series = running_filter(data, out)
 
     return new_series
 
@@ -1,10 +1,11 @@
 import datetime
 import logging
-from pyspedas.tplot_tools import get_data, store, tnames
+from pyspedas.tplot_tools import get_data, store, tnames, parallel_map
+from pyspedas.tplot_tools.interp_plan import interp_data_quant
 import numpy as np
 
 
-def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, suffix=None):
+def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, suffix=None, max_workers=None):
     """
     Interpolate data to times in interp_to.
 
@@ -26,6 +27,9 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
         If true, extrapolate beyond the start/end times of the interp_to variable.  Default is False (for now)
     suffix : str, optional
         A suffix to apply. Default is '-itrp'.
+    max_workers : int, optional
+        Number of variables interpolated at once, in threads (see pyspedas.tplot_tools.set_parallel).
+        Default is None (the default set by set_parallel, normally 1).
 
     Returns
     -------
@@ -40,6 +44,10 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
     See: https://docs.xarray.dev/en/latest/generated/xarray.DataArray.interp.html
     Similar to tinterpol.pro in IDL SPEDAS.
 
+    Linear interpolation of numeric data uses a cached interpolation plan (see pyspedas.tplot_tools.interp_plan)
+    instead, so that variables sharing the same time grid only need one search of the times.  Linearly
+    interpolated values at times that match an input time are exactly the input values.
+
     'linear' vs. 'slinear' methods:  Due to a quirk in the implmentation of the scipy interp1d routine (used
     internally by xarray.interp),'linear' interpolation may yield unexpected results under certain conditions.
     In particular, when using 32-bit floating point data, if an output time exactly matches one of the input times, the
@@ -114,38 +122,49 @@ def tinterpol(names, interp_to, method=None, newname=None, extrapolate=False, su
         kwargs={'fill_value':'extrapolate'}
 
 
-    for name_idx, name in enumerate(old_names):
-        xdata = get_data(name, xarray=True)
-        metadata = get_data(name, metadata=True)
-
-        if isinstance(interp_to_times[0], (datetime.datetime, np.datetime64)):
-            # Timezone-naive datetime or np.datetime64, use as-is
-            interp_to_datetimes = interp_to_times
-        elif isinstance(interp_to_times[0], (int, float, np.integer, np.float64)):
-            # Assume seconds since Unix epoch, convert to np.datetime64 with nanosecond precision
-            if isinstance(interp_to_times, np.ndarray):
-                interp_to_datetimes = np.array(
-                    interp_to_times * 1e09, dtype="datetime64[ns]"
-                )
-            else:
-                # We need to convert input to a numpy array before scaling to nanoseconds
-                interp_to_datetimes = np.array(
-                    np.array(interp_to_times) * 1e9, dtype="datetime64[ns]"
-                )
-        elif isinstance(interp_to_times[0], str):
-            # Interpret strings as timestamps, convert to np.datetime64 with nanosecond precision
-            interp_to_datetimes = np.array(interp_to_times, dtype="datetime64[ns]")
+    if isinstance(interp_to_times[0], (datetime.datetime, np.datetime64)):
+        # Timezone-naive datetime or np.datetime64, use as-is
+        interp_to_datetimes = interp_to_times
+    elif isinstance(interp_to_times[0], (int, float, np.integer, np.float64)):
+        # Assume seconds since Unix epoch, convert to np.datetime64 with nanosecond precision
+        if isinstance(interp_to_times, np.ndarray):
+            interp_to_datetimes = np.array(
+                interp_to_times * 1e09, dtype="datetime64[ns]"
+            )
         else:
-            # Give up for any other type
-            logging.error(
-                "tinterpol: Unable to convert type %s to timestamp.",
-                type(interp_to_times[0]),
+            # We need to convert input to a numpy array before scaling to nanoseconds
+            interp_to_datetimes = np.array(
+                np.array(interp_to_times) * 1e9, dtype="datetime64[ns]"
             )
-            return
+    elif isinstance(interp_to_times[0], str):
+        # Interpret strings as timestamps, convert to np.datetime64 with nanosecond precision
+        interp_to_datetimes = np.array(interp_to_times, dtype="datetime64[ns]")
+    else:
+        # Give up for any other type
+        logging.error(
+            "tinterpol: Unable to convert type %s to timestamp.",
+            type(interp_to_times[0]),
+        )
+        return
+
+    def interpolate(xdata):
+        xdata_interpolated = None
+        if method == "linear" and np.asarray(interp_to_datetimes).dtype.kind == "M":
+            xdata_interpolated = interp_data_quant(xdata, interp_to_datetimes, extrapolate=extrapolate)
+        if xdata_interpolated is None:
+            xdata_interpolated = xdata.interp({"time": interp_to_datetimes}, method=method, kwargs=kwargs)
+        return xdata_interpolated
 
-        xdata_interpolated = xdata.interp({"time": interp_to_datetimes}, method=method, kwargs=kwargs)
+    # the variables are read here, in order, since get_data isn't thread-safe; they are then
+    # interpolated (in threads, if requested), and stored in order
+    xdatas = [get_data(name, xarray=True) for name in old_names]
+    results = parallel_map(interpolate, xdatas, max_workers=max_workers, processes=False)
+
+    for name_idx, name in enumerate(old_names):
+        metadata = get_data(name, metadata=True)
+        xdata_interpolated = results[name_idx]
 
-        if "spec_bins" in xdata.coords:
+        if "spec_bins" in xdata_interpolated.coords:
             store(
                 n_names[name_idx],
                 data={
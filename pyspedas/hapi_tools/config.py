@@ -0,0 +1,12 @@
+import os
+
+CONFIG = {
+    "local_data_dir": "hapi_data/",
+}
+
+# override local data directory with environment variables
+if os.environ.get("SPEDAS_DATA_DIR"):
+    CONFIG["local_data_dir"] = os.sep.join([os.environ["SPEDAS_DATA_DIR"], "hapi"])
+
+if os.environ.get("HAPI_DATA_DIR"):
+    CONFIG["local_data_dir"] = os.environ["HAPI_DATA_DIR"]
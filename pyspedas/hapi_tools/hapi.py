@@ -1,13 +1,178 @@
+import hashlib
+import json
 import logging
+import os
+import re
+import time
 import warnings
-from pyspedas.tplot_tools import get_data, store_data, options, time_double
+from concurrent.futures import ThreadPoolExecutor
+from pyspedas.tplot_tools import get_data, store_data, options, time_double, time_string
 import numpy as np
 from hapiclient import hapi as load_hapi
 from .replace_fillvals import replace_fillvals
+from .config import CONFIG
+
+
+def _fixed_width_slice(strings, start, stop=None):
+    """
+    Slice every element of a fixed-width numpy unicode array, without a Python loop
+    """
+    width = strings.dtype.itemsize // 4
+    if stop is None or stop > width:
+        stop = width
+    if start >= stop:
+        return np.full(len(strings), '', dtype='U1')
+    chars = np.ascontiguousarray(strings).view('U1').reshape(len(strings), width)
+    return np.ascontiguousarray(chars[:, start:stop]).view('U' + str(stop - start)).ravel()
+
+
+def hapi_times_to_datetime64(timestamps):
+    """
+    Convert an array of HAPI (restricted ISO 8601) time strings to np.datetime64[ns]
+
+    Both the year-month-day and the year-day-of-year forms are converted with
+    vectorized numpy operations. If the strings can't be parsed that way,
+    each one is converted separately with time_double.
+
+    Parameters
+    ----------
+        timestamps: numpy.ndarray
+            Array of HAPI time strings (bytes or str)
+
+    Returns
+    -------
+        numpy.ndarray
+            Array of np.datetime64[ns] values
+    """
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == 'O':
+        timestamps = np.array([t.decode('utf-8') if isinstance(t, bytes) else str(t) for t in timestamps])
+    elif timestamps.dtype.kind == 'S':
+        timestamps = np.char.decode(timestamps, 'utf-8')
+    if len(timestamps) == 0:
+        return np.array([], dtype='datetime64[ns]')
+
+    timestamps = np.char.rstrip(np.char.strip(timestamps), 'Z')
+    try:
+        if re.match(r'^\d{4}-\d{3}(T|$)', str(timestamps[0])):
+            # YYYY-DOY form, convert the date part by hand and let numpy parse the time of day
+            years = _fixed_width_slice(timestamps, 0, 4).astype(np.int64)
+            doys = _fixed_width_slice(timestamps, 5, 8).astype(np.int64)
+            days = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]') + (doys - 1).astype('timedelta64[D]')
+            time_of_day = np.array(np.char.add('1970-01-01', _fixed_width_slice(timestamps, 8)), dtype='datetime64[ns]')
+            return days.astype('datetime64[ns]') + (time_of_day - np.datetime64('1970-01-01', 'ns'))
+        return np.array(timestamps, dtype='datetime64[ns]')
+    except ValueError:
+        unixtimes = np.array([time_double(timestamp) for timestamp in timestamps])
+        return np.array(np.round(unixtimes * 1e9), dtype='datetime64[ns]')
+
+
+def hapi_time_chunks(trange, chunk_size=None):
+    """
+    Split a time range into the HAPI requests to be made for it
+
+    Chunk boundaries are aligned to multiples of chunk_size (in seconds since 1970),
+    so that overlapping time ranges are split into identical chunks, which can be
+    reused from the local cache.
+
+    Parameters
+    ----------
+        trange: list of str or list of float
+            Time range to split
+        chunk_size: float
+            Length of each chunk in seconds; if None, the whole time range is a single chunk
+            Default: None
+
+    Returns
+    -------
+        list of tuple
+            (start, stop) pairs of HAPI time strings
+    """
+    if chunk_size is None:
+        return [tuple(t if isinstance(t, str) else time_string(t, fmt='%Y-%m-%dT%H:%M:%S.%fZ') for t in trange)]
+    start, stop = time_double(trange)
+    first = np.floor(start/chunk_size)*chunk_size
+    edges = np.arange(first, stop, chunk_size)
+    return [(time_string(float(edge), fmt='%Y-%m-%dT%H:%M:%S.%fZ'),
+             time_string(float(edge + chunk_size), fmt='%Y-%m-%dT%H:%M:%S.%fZ')) for edge in edges]
+
+
+def _hapi_cache_path(cache_dir, server, dataset, parameters, start, stop):
+    key = '|'.join([server, dataset, parameters, start, stop])
+    dataset_dir = re.sub(r'[^A-Za-z0-9_.-]', '_', dataset)
+    return os.path.join(cache_dir, dataset_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+
+def _load_hapi_chunk(server, dataset, parameters, start, stop, opts, cache_dir=None):
+    """
+    Load one HAPI request, from the local cache if possible
+
+    Returns the structured data array and the HAPI metadata.  Responses are only written
+    to the cache if the requested interval has ended, and if they have no variable
+    length (object) fields.
+    """
+    if cache_dir is not None:
+        path = _hapi_cache_path(cache_dir, server, dataset, parameters, start, stop)
+        if os.path.exists(path + '.npy') and os.path.exists(path + '.json'):
+            with open(path + '.json', 'r') as f:
+                hapi_metadata = json.load(f)
+            return np.load(path + '.npy', allow_pickle=False), hapi_metadata
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=ResourceWarning)
+        warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+        data, hapi_metadata = load_hapi(server, dataset, parameters, start, stop, **opts)
+
+    if cache_dir is not None and not data.dtype.hasobject and time_double(stop) <= time.time():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp.npy', 'wb') as f:
+            np.save(f, data, allow_pickle=False)
+        with open(path + '.tmp.json', 'w') as f:
+            json.dump(hapi_metadata, f, default=str)
+        os.replace(path + '.tmp.npy', path + '.npy')
+        os.replace(path + '.tmp.json', path + '.json')
+
+    return data, hapi_metadata
+
+
+def _combine_hapi_chunks(trange, chunks, results):
+    """
+    Trim each chunk to its requested interval and to the overall time range, and copy
+    the chunks into preallocated output arrays
+
+    Returns the combined structured data array and the np.datetime64[ns] times.
+    """
+    trange_ns = np.array(np.round(np.array(time_double(trange)) * 1e9), dtype='datetime64[ns]')
+    pieces = []
+    for (start, stop), (data, hapi_metadata) in zip(chunks, results):
+        if len(data) == 0:
+            continue
+        chunk_times = hapi_times_to_datetime64(data[data.dtype.names[0]])
+        chunk_range = hapi_times_to_datetime64(np.array([start, stop]))
+        bounds = [max(chunk_range[0], trange_ns[0]), min(chunk_range[1], trange_ns[1])]
+        first, last = np.searchsorted(chunk_times, bounds)
+        if last > first:
+            pieces.append((data[first:last], chunk_times[first:last]))
+
+    if len(pieces) == 0:
+        return results[0][0][:0], np.array([], dtype='datetime64[ns]')
+    if len(pieces) == 1:
+        return pieces[0]
+
+    total = sum(len(piece[0]) for piece in pieces)
+    data = np.empty(total, dtype=pieces[0][0].dtype)
+    times = np.empty(total, dtype='datetime64[ns]')
+    pos = 0
+    for piece_data, piece_times in pieces:
+        data[pos:pos + len(piece_data)] = piece_data
+        times[pos:pos + len(piece_times)] = piece_times
+        pos += len(piece_data)
+    return data, times
 
 
 def hapi(trange=None, server=None, dataset=None, parameters='', suffix='',
-         prefix='', catalog=False, quiet=False):
+         prefix='', catalog=False, quiet=False, chunk_size=None, max_workers=1,
+         cache=False, cache_dir=None):
     """
     Loads data from a HAPI server into tplot variables
 
@@ -43,6 +208,25 @@ def hapi(trange=None, server=None, dataset=None, parameters='', suffix='',
             If True, suppress printing the catalog ids retrieved
             Default: False
 
+        chunk_size: float
+            If set, the time range is split into requests of this many seconds,
+            aligned to multiples of chunk_size
+            Default: None (a single request for the whole time range)
+
+        max_workers: int
+            Number of requests to run concurrently
+            Default: 1
+
+        cache: bool
+            If True, responses are saved in a local cache, keyed by server, dataset,
+            parameters and request interval, and are reused by later calls.
+            Requests for intervals that haven't ended yet are never cached.
+            Default: False
+
+        cache_dir: str
+            Directory for the local cache
+            Default: CONFIG['local_data_dir'] from pyspedas.hapi_tools.config
+
     Returns
     -------
         list of str
@@ -60,6 +244,10 @@ def hapi(trange=None, server=None, dataset=None, parameters='', suffix='',
     >>> from pyspedas import tplot
     >>> h_vars = pyspedas.hapi(trange=['2003-10-20', '2003-11-30'],server='https://cdaweb.gsfc.nasa.gov/hapi',dataset='OMNI_HRO2_1MIN')
     >>> tplot(['BX_GSE','BY_GSE','BZ_GSE'])
+
+    >>> # Load the same data in 1-day chunks, four at a time, caching the responses
+    >>> h_vars = pyspedas.hapi(trange=['2003-10-20', '2003-11-30'],server='https://cdaweb.gsfc.nasa.gov/hapi',dataset='OMNI_HRO2_1MIN',
+    ...                        chunk_size=86400.0, max_workers=4, cache=True)
     """
 
     if server is None:
@@ -100,58 +288,62 @@ def hapi(trange=None, server=None, dataset=None, parameters='', suffix='',
     if isinstance(parameters, list):
         parameters = ','.join(parameters)
 
-    opts = {'logging': False}
+    # hapiclient requests the binary format when the server lists it in its
+    # capabilities, and falls back to CSV otherwise
+    opts = {'logging': False, 'format': 'binary'}
 
-    with warnings.catch_warnings():
-        warnings.simplefilter('ignore', category=ResourceWarning)
-        warnings.filterwarnings('ignore', message='Unverified HTTPS request')
-        data, hapi_metadata = load_hapi(server, dataset, parameters, trange[0], trange[1], **opts)
+    if cache and cache_dir is None:
+        cache_dir = CONFIG['local_data_dir']
+    elif not cache:
+        cache_dir = None
+
+    chunks = hapi_time_chunks(trange, chunk_size)
+
+    def load_chunk(chunk):
+        return _load_hapi_chunk(server, dataset, parameters, chunk[0], chunk[1], opts, cache_dir)
+
+    if max_workers is not None and max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(load_chunk, chunks))
+    else:
+        results = [load_chunk(chunk) for chunk in chunks]
 
     out_vars = []
 
     # loop through the parameters in this dataset
+    hapi_metadata = results[0][1]
     params = hapi_metadata['parameters']
 
-    timestamps = [datapoint[0] for datapoint in data]
-    unixtimes = [time_double(timestamp.decode('utf-8')) for timestamp in timestamps]
+    if chunk_size is None:
+        data = results[0][0]
+        if len(data) == 0:
+            return out_vars
+        times = hapi_times_to_datetime64(data[data.dtype.names[0]])
+    else:
+        data, times = _combine_hapi_chunks(trange, chunks, results)
+        if len(data) == 0:
+            return out_vars
+
+    # data is a numpy structured array with one field per parameter, time first
+    field_names = data.dtype.names
 
     for param_idx, param in enumerate(params[1:]):
         spec = False
         param_name = param.get('name')
         param_type = param.get('type')
-        data_size = param.get('size')
 
         if param_type is None:
             param_type = 'double'
 
-        if data_size is None:
-            single_line = True
-
         try:
-            if param_type == 'double':
-                single_line = isinstance(data[0][param_idx+1], np.float64)
-            elif param_type == 'integer':
-                single_line = isinstance(data[0][param_idx+1], np.int32)
+            column = data[field_names[param_idx+1]]
         except IndexError:
             continue
 
-        if single_line:
-            data_out = np.zeros((len(data)))
+        if param_type in ['double', 'integer']:
+            data_out = column.astype(np.float64)
         else:
-            try:
-                data_out = np.zeros((len(data), len(data[0][param_idx+1])))
-            except TypeError:
-                continue
-
-        for idx, datapoint in enumerate(data):
-            if param_type in ['double','integer']:
-                datapt = datapoint[param_idx+1]
-            else:
-                datapt = None
-            if single_line:
-                data_out[idx] = datapt
-            else:
-                data_out[idx, :] = datapt
+            data_out = np.full(column.shape, np.nan)
 
         data_out = data_out.squeeze()
 
@@ -168,7 +360,7 @@ def hapi(trange=None, server=None, dataset=None, parameters='', suffix='',
             if centers is not None:
                 spec = True
 
-        data_table = {'x': unixtimes, 'y': data_out}
+        data_table = {'x': times, 'y': data_out}
 
         if spec:
             data_table['v'] = centers
@@ -1,11 +1,142 @@
+import json
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 import numpy as np
-from numpy.testing import assert_array_equal
-from pyspedas import hapi, data_exists, del_data
+from numpy.testing import assert_array_equal, assert_allclose
+from pyspedas import hapi, data_exists, del_data, get_data, time_double
+from pyspedas.hapi_tools.hapi import hapi_times_to_datetime64
 from pyspedas.hapi_tools.replace_fillvals import replace_fillvals
 
 
+class LocalHAPIHandler(BaseHTTPRequestHandler):
+    """Minimal HAPI 3.0 stand-in server, serving one dataset of 1-second data in CSV or binary"""
+
+    output_formats = ["csv", "binary"]
+    requests = []
+    parameters = [
+        {"name": "Time", "type": "isotime", "units": "UTC", "length": 24, "fill": None},
+        {"name": "B", "type": "double", "units": "nT", "size": [3], "fill": None},
+        {"name": "N", "type": "integer", "units": "cm^-3", "fill": None},
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        status = {"code": 1200, "message": "OK"}
+        if url.path.endswith("/capabilities"):
+            self._send(json.dumps({"HAPI": "3.0", "status": status, "outputFormats": self.output_formats}).encode(), "application/json")
+        elif url.path.endswith("/catalog"):
+            catalog = {"HAPI": "3.0", "status": status, "catalog": [{"id": "test_dataset", "title": "Test dataset"}]}
+            self._send(json.dumps(catalog).encode(), "application/json")
+        elif url.path.endswith("/info"):
+            info = {"HAPI": "3.0", "status": status, "startDate": "2020-01-01T00:00:00Z",
+                    "stopDate": "2020-01-02T00:00:00Z", "parameters": self.parameters}
+            self._send(json.dumps(info).encode(), "application/json")
+        elif url.path.endswith("/data"):
+            LocalHAPIHandler.requests.append(query)
+            start = np.datetime64(query["start"][0].rstrip("Z")).astype("datetime64[s]")
+            stop = np.datetime64(query["stop"][0].rstrip("Z")).astype("datetime64[s]")
+            times = np.arange(start, stop, np.timedelta64(1, "s"))
+            seconds = (times - np.datetime64("2020-01-01T00:00:00", "s")).astype(np.float64)
+            bfield = np.column_stack([seconds, -seconds, np.zeros(len(seconds))])
+            density = seconds.astype(np.int32)
+            timestrings = np.char.add(np.datetime_as_string(times, unit="ms"), "Z")
+            if query.get("format", ["csv"])[0] == "binary":
+                record = np.dtype([("Time", "S24"), ("B", "<f8", (3,)), ("N", "<i4")])
+                records = np.zeros(len(times), dtype=record)
+                records["Time"] = timestrings.astype("S24")
+                records["B"] = bfield
+                records["N"] = density
+                self._send(records.tobytes(), "application/octet-stream")
+            else:
+                lines = ["%s,%.1f,%.1f,%.1f,%d" % (t, b[0], b[1], b[2], n)
+                         for t, b, n in zip(timestrings, bfield, density)]
+                self._send(("\n".join(lines) + "\n").encode(), "text/csv")
+        else:
+            self.send_error(404)
+
+
 class HAPITests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.local_server = ThreadingHTTPServer(("127.0.0.1", 0), LocalHAPIHandler)
+        cls.local_url = "http://127.0.0.1:%d/hapi" % cls.local_server.server_address[1]
+        threading.Thread(target=cls.local_server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.local_server.shutdown()
+        cls.local_server.server_close()
+
+    def check_local_data(self, prefix):
+        b = get_data(prefix + "B")
+        self.assertEqual(b.y.shape, (600, 3))
+        assert_allclose(b.times, time_double("2020-01-01/01:00") + np.arange(600))
+        assert_allclose(b.y[1], [3601.0, -3601.0, 0.0])
+        n = get_data(prefix + "N")
+        assert_allclose(n.y, 3600.0 + np.arange(600))
+
+    def test_local_server_binary(self):
+        LocalHAPIHandler.output_formats = ["csv", "binary"]
+        LocalHAPIHandler.requests = []
+        h_vars = hapi(trange=["2020-01-01T01:00:00Z", "2020-01-01T01:10:00Z"], server=self.local_url,
+                      dataset="test_dataset", prefix="bin_")
+        self.assertEqual(h_vars, ["bin_B", "bin_N"])
+        self.assertEqual(LocalHAPIHandler.requests[-1]["format"], ["binary"])
+        self.check_local_data("bin_")
+
+    def test_local_server_csv(self):
+        LocalHAPIHandler.output_formats = ["csv"]
+        LocalHAPIHandler.requests = []
+        h_vars = hapi(trange=["2020-01-01T01:00:00Z", "2020-01-01T01:10:00Z"], server=self.local_url,
+                      dataset="test_dataset", prefix="csv_")
+        self.assertEqual(h_vars, ["csv_B", "csv_N"])
+        self.assertTrue("format" not in LocalHAPIHandler.requests[-1])
+        self.check_local_data("csv_")
+
+    def test_local_server_chunks_cache(self):
+        import tempfile
+        LocalHAPIHandler.output_formats = ["csv", "binary"]
+        LocalHAPIHandler.requests = []
+        cache_dir = tempfile.mkdtemp()
+        # 4-minute chunks, aligned to multiples of 240 s: 01:00-01:04, 01:04-01:08, 01:08-01:12
+        h_vars = hapi(trange=["2020-01-01T01:00:00Z", "2020-01-01T01:10:00Z"], server=self.local_url,
+                      dataset="test_dataset", prefix="chunk_", chunk_size=240.0, max_workers=3,
+                      cache=True, cache_dir=cache_dir)
+        self.assertEqual(h_vars, ["chunk_B", "chunk_N"])
+        self.assertEqual(len(LocalHAPIHandler.requests), 3)
+        self.check_local_data("chunk_")
+        # an overlapping request only fetches the chunks that aren't cached yet
+        LocalHAPIHandler.requests = []
+        h_vars = hapi(trange=["2020-01-01T01:05:00Z", "2020-01-01T01:15:00Z"], server=self.local_url,
+                      dataset="test_dataset", prefix="chunk2_", chunk_size=240.0, cache=True, cache_dir=cache_dir)
+        self.assertEqual(len(LocalHAPIHandler.requests), 1)
+        self.assertEqual(LocalHAPIHandler.requests[0]["start"], ["2020-01-01T01:12:00.000000Z"])
+        n = get_data("chunk2_N")
+        assert_allclose(n.y, 3900.0 + np.arange(600))
+
+    def test_hapi_times_to_datetime64(self):
+        expected = time_double(["2020-02-01/01:02:03.5", "2020-02-01/01:02:04"])
+        ymd = np.array([b"2020-02-01T01:02:03.500Z", b"2020-02-01T01:02:04.000Z"])
+        assert_allclose(hapi_times_to_datetime64(ymd).astype(np.int64) / 1e9, expected)
+        doy = np.array(["2020-032T01:02:03.500Z", "2020-032T01:02:04.000Z"])
+        assert_allclose(hapi_times_to_datetime64(doy).astype(np.int64) / 1e9, expected)
+        doy_date_only = np.array(["2020-032Z", "2020-033Z"])
+        assert_allclose(hapi_times_to_datetime64(doy_date_only).astype(np.int64) / 1e9,
+                        time_double(["2020-02-01", "2020-02-02"]))
+
     def test_replace_fillvals(self):
         da1_dbl = np.array([1.0, 2.0, 3.0, 4.0])
         fv1_dbl = 3.0
@@ -3,7 +3,7 @@ import unittest
 from numpy.testing import assert_array_almost_equal_nulp, assert_array_max_ulp, assert_allclose
 from copy import deepcopy
 from pyspedas.tplot_tools import data_exists, get_data, store_data, cdf_to_tplot, del_data, tplot_restore, replace_metadata
-from pyspedas.tplot_tools import get_coords,set_coords
+from pyspedas.tplot_tools import get_coords,set_coords,get_cached_y_range
 from pyspedas.projects.themis import gse2sse,sse2sel
 
 
@@ -122,7 +122,7 @@ class LunCotransDataValidation(unittest.TestCase):
         self.assertTrue('plot_options' in upd_metadata.keys())
         self.assertTrue('create_time' in upd_metadata['plot_options'].keys())
         self.assertTrue('error' in upd_metadata['plot_options'].keys())
-        self.assertTrue(upd_metadata['plot_options']['yaxis_opt']['y_range'] is not None)
+        self.assertTrue(get_cached_y_range(get_data('newvar', xarray=True)) is not None)
         # test replace_metadata with empty metadata
         empty_meta = {}
         replace_metadata('newvar',empty_meta)
@@ -130,7 +130,7 @@ class LunCotransDataValidation(unittest.TestCase):
         self.assertTrue('plot_options' in upd_metadata.keys())
         self.assertTrue('create_time' in upd_metadata['plot_options'].keys())
         self.assertTrue('error' in upd_metadata['plot_options'].keys())
-        self.assertTrue(upd_metadata['plot_options']['yaxis_opt']['y_range'] is not None)
+        self.assertTrue(get_cached_y_range(get_data('newvar', xarray=True)) is not None)
 
         # test store_data with metadata only
         new_meta = deepcopy(orig_meta)
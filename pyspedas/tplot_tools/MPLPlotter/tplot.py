@@ -11,7 +11,7 @@ from time import sleep
 from pyspedas.tplot_tools import tplot_wildcard_expand, tname_byindex, get_data, var_label_panel
 from pyspedas.tplot_tools import lineplot, count_traces, makegap
 from pyspedas.tplot_tools import specplot, specplot_make_1d_ybins, reduce_spec_dataset
-from pyspedas.tplot_tools import get_var_label_ticks
+from pyspedas.tplot_tools import get_var_label_ticks, get_cached_y_range
 from .save_plot import save_plot
 
 # the following improves the x-axis ticks labels
@@ -51,7 +51,7 @@ def pseudovar_component_props(varname: str):
         yaxis_opt = plot_opts.get('yaxis_opt')
         if yaxis_opt is not None:
             ylog = yaxis_opt['y_axis_type']
-            yrange = yaxis_opt.get('y_range')
+            yrange = get_cached_y_range(pyspedas.tplot_tools.data_quants[varname])
     else:
         ylog = False
         yrange=[None, None]
@@ -462,6 +462,11 @@ def tplot(variables,
                     plot_extras = None
                 else:
                     yaxis_options = var_quants.attrs['plot_options']['yaxis_opt']
+                    # A y_range reset to None (by replace_data, replace_metadata or options) is computed
+                    # now, as it was when it was computed on every change; a pseudovariable that has
+                    # never had a y_range still gets the combined range of its components below.
+                    if 'y_range' in yaxis_options:
+                        get_cached_y_range(var_quants)
                     zaxis_options = var_quants.attrs['plot_options']['zaxis_opt']
                     line_opts = var_quants.attrs['plot_options']['line_opt']
 
@@ -549,6 +554,9 @@ def tplot(variables,
             continue
 
 
+        # Compute the y range now if it hasn't been computed since the data was stored
+        get_cached_y_range(var_quants)
+
         #if data_gap is an option for this variable, or if it's a add
         #gaps here; an individual gap setting should override the
         #global setting
@@ -969,7 +977,7 @@ def mouse_move_slice(event, slice_axes, slice_plot):
     yaxis_options = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options']['yaxis_opt']
     zaxis_options = pyspedas.tplot_tools.data_quants[event.inaxes.var_name].attrs['plot_options']['zaxis_opt']
 
-    yrange = yaxis_options.get('y_range')
+    yrange = get_cached_y_range(pyspedas.tplot_tools.data_quants[event.inaxes.var_name])
     if yrange is None:
         yrange = [np.nanmin(vdata), np.nanmax(vdata)]
 
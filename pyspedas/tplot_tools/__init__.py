@@ -3,18 +3,17 @@
 # This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
 # Verify current version before use at: https://github.com/MAVENSDC/PyTplot
 
-from collections import OrderedDict
-
 import os
 import sys
 import xarray as xr
+from .memory_budget import DataQuants
 
 # xarray options
 xr.set_options(keep_attrs=True)
 
 
 # Global Variables
-data_quants = OrderedDict()
+data_quants = DataQuants()
 tplot_opt_glob = dict(
     tools="xpan,crosshair,reset",
     min_border_top=12,
@@ -36,12 +35,15 @@ tplot_opt_glob = dict(
 lim_info = {}
 extra_layouts = {}
 
-from .get_y_range import get_y_range
+from .get_y_range import get_y_range, get_cached_y_range
 from .tplot_rename import tplot_rename
 from .del_data import del_data
 from .replace_metadata import replace_metadata
 from .store_data import store_data, store
-from .get_data import get_data, get
+from .get_data import get_data, get, get_data_views, get_unix_times, times_sorted
+from .memory_budget import set_memory_budget, tplot_memory_usage
+from .chunked import tchunk, tcompute, is_chunked
+from .parallel import set_parallel, parallel_map
 from .str_to_float_fuzzy import str_to_float_fuzzy
 from .tplot_names import tplot_names
 from .wildcard_routines import (
@@ -62,11 +64,13 @@ from .convert_tplotxarray_to_pandas_dataframe import (
     convert_tplotxarray_to_pandas_dataframe,
 )
 from .importers.tplot_restore import tplot_restore
+from .tplot_hdf5 import close_hdf5
 from .is_pseudovariable import is_pseudovariable
 from .count_traces import count_traces
 from .get_timespan import get_timespan
 from .tplot_options import tplot_options
 from .tplot_copy import tplot_copy
+from .copy_on_write import unshare_data
 from .replace_data import replace_data
 from .replace_metadata import replace_metadata
 from .get_ylimits import get_ylimits
@@ -117,6 +121,7 @@ from .tplot_math.pwrspc import pwrspc
 from .tplot_math.tpwrspc import tpwrspc
 from .tplot_math.dpwrspc import dpwrspc
 from .tplot_math.tdpwrspc import tdpwrspc
+from .expression import texpr
 
 from .reduce_spec_dataset import reduce_spec_dataset
 from .MPLPlotter.lineplot import lineplot
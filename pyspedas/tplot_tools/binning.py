@@ -0,0 +1,155 @@
+"""
+Statistics of data values grouped into time bins.
+
+The samples are sorted by bin (which is usually a no-op, since the times are sorted), so that
+each bin is a contiguous run of samples, and the statistics for all the bins and all the data
+columns are then computed at once with np.add.reduceat, rather than looping over the bins.
+This is used by avg_data, avg_res_data and reduce_tres, and for chunked variables.
+
+"""
+import numpy as np
+
+
+def _sorted_bins(ind, nbins):
+    # Indices of the samples that are in a bin, sorted by bin, and the start and size of each bin
+    ind = np.asarray(ind).astype(np.int64)
+    rows = np.flatnonzero((ind >= 0) & (ind < nbins))
+    bins = ind[rows]
+    if np.any(bins[1:] < bins[:-1]):
+        order = np.argsort(bins, kind='stable')
+        rows = rows[order]
+        bins = bins[order]
+    elif len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows):
+        # the samples are already in order, so they can be used without copying them
+        rows = slice(rows[0], rows[-1] + 1)
+    starts = np.searchsorted(bins, np.arange(nbins))
+    sizes = np.diff(np.append(starts, len(bins)))
+    return rows, bins, starts, sizes
+
+
+def _columns(data, rows, bins):
+    # The samples in the bins, sorted by bin, as a float array with one column per data value
+    values = data[rows].reshape(len(bins), int(np.prod(data.shape[1:], dtype=np.int64)))
+    if values.dtype.kind in 'fc':
+        return values
+    return values.astype(np.float64)
+
+
+def bin_sums(data, ind, nbins, skip_nans=True):
+    """
+    Return the sum and the number of values in each bin.
+
+    Parameters
+    ----------
+        data : array_like
+            Data values, with time as the first dimension
+        ind : array_like of int
+            Bin index of each time sample.  Samples with indices outside 0 to nbins-1 (e.g. -1) are ignored.
+        nbins : int
+            Number of bins
+        skip_nans : bool, optional
+            If True, NaN values are left out of the sums and counts; otherwise they propagate into the sums.
+            Default: True
+
+    Returns
+    -------
+        tuple
+            (sums, counts), each with shape (nbins,) + data.shape[1:]
+    """
+    data = np.asarray(data)
+    rows, bins, starts, sizes = _sorted_bins(ind, nbins)
+    values = _columns(data, rows, bins)
+    out_shape = (nbins,) + data.shape[1:]
+    sums = np.zeros((nbins, values.shape[1]), dtype=np.result_type(values.dtype, np.float64))
+    counts = np.zeros((nbins, values.shape[1]), dtype=np.int64)
+    nonempty = sizes > 0
+    if nonempty.any():
+        # reduceat sums from each start to the next one; the bins in between are empty
+        first = starts[nonempty]
+        valid = ~np.isnan(values) if skip_nans else None
+        if valid is not None and not valid.all():
+            sums[nonempty] = np.add.reduceat(np.where(valid, values, 0.0), first, axis=0)
+            counts[nonempty] = np.add.reduceat(valid.astype(np.int64), first, axis=0)
+        else:
+            sums[nonempty] = np.add.reduceat(values, first, axis=0)
+            counts[nonempty] = sizes[nonempty, np.newaxis]
+    return sums.reshape(out_shape), counts.reshape(out_shape)
+
+
+def _bin_medians(values, starts, sizes, skip_nans):
+    # values is 2-d and sorted by bin; the median of each bin, for each column
+    nbins = len(starts)
+    medians = np.full((nbins, values.shape[1]), np.nan)
+    bin_ids = np.repeat(np.arange(nbins), sizes)
+    for column in range(values.shape[1]):
+        # sort by value within each bin (NaNs sort to the end of each bin); the stable sort by
+        # bin number keeps the values in order, and is quicker than np.lexsort
+        order = np.argsort(values[:, column])
+        v = values[order[np.argsort(bin_ids[order], kind='stable')], column]
+        nans = np.isnan(v)
+        if nans.any():
+            nan_counts = np.bincount(bin_ids[nans], minlength=nbins)
+        else:
+            nan_counts = np.zeros(nbins, dtype=np.int64)
+        n = sizes - nan_counts
+        ok = n > 0
+        if not skip_nans:
+            ok &= nan_counts == 0
+        lower = v[starts[ok] + (n[ok] - 1) // 2]
+        upper = v[starts[ok] + n[ok] // 2]
+        medians[ok, column] = (lower + upper) / 2
+    return medians
+
+
+def bin_statistic(data, ind, nbins, statistic='mean', skip_nans=True):
+    """
+    Compute a statistic of the data values in each time bin, for all bins and data columns at once.
+
+    Parameters
+    ----------
+        data : array_like
+            Data values, with time as the first dimension
+        ind : array_like of int
+            Bin index of each time sample.  Samples with indices outside 0 to nbins-1 (e.g. -1) are ignored.
+        nbins : int
+            Number of bins
+        statistic : str, optional
+            'mean', 'median', 'sum' or 'count'
+            Default: 'mean'
+        skip_nans : bool, optional
+            If True, NaN values are ignored, as with np.nanmean; otherwise, a NaN in a bin makes
+            its mean or median NaN.
+            Default: True
+
+    Returns
+    -------
+        ndarray
+            The statistic for each bin, with shape (nbins,) + data.shape[1:].  The mean and median
+            of an empty bin are NaN.
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from pyspedas.tplot_tools.binning import bin_statistic
+        >>> bin_statistic(np.array([1.0, 2.0, 3.0, np.nan, 5.0]), [0, 0, 1, 1, 2], 3)
+        array([1.5, 3. , 5. ])
+    """
+    data = np.asarray(data)
+    if statistic == 'median':
+        rows, bins, starts, sizes = _sorted_bins(ind, nbins)
+        values = _columns(data, rows, bins)
+        return _bin_medians(values, starts, sizes, skip_nans).reshape((nbins,) + data.shape[1:])
+
+    sums, counts = bin_sums(data, ind, nbins, skip_nans=skip_nans)
+    if statistic == 'sum':
+        return sums
+    if statistic == 'count':
+        return counts
+    if statistic != 'mean':
+        raise ValueError('bin_statistic: unknown statistic ' + str(statistic))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    means[counts == 0] = np.nan
+    if data.dtype.kind == 'f':
+        means = means.astype(data.dtype, copy=False)
+    return means
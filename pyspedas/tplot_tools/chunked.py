@@ -0,0 +1,168 @@
+"""
+Support for chunked (dask-backed) tplot variables.
+
+Chunked variables keep their data values in a dask array, split into chunks along the time
+dimension, so that routines such as time_clip, the tplot_math arithmetic routines and avg_data
+can build up a lazy computation that is only evaluated, one chunk at a time, when the
+values are needed (for example by get_data, tplot, or tcompute).
+
+The dask package is optional; it can be installed with "pip install dask".
+
+"""
+import logging
+import numpy as np
+import pyspedas
+from pyspedas.tplot_tools.binning import bin_sums
+
+try:
+    import dask.array as da
+except ImportError:
+    da = None
+
+
+def dask_available():
+    """
+    Return True if the dask package needed for chunked tplot variables is installed.
+    """
+    if da is None:
+        logging.error('The dask package is needed for chunked tplot variables, but does not appear to be installed.')
+        logging.error('To use this feature, install dask with "pip install dask".')
+        return False
+    return True
+
+
+def is_chunked(obj):
+    """
+    Return True if obj is a dask array, or an xarray DataArray backed by one.
+
+    Parameters
+    ----------
+        obj : xarray.DataArray, array_like, or dict
+            A tplot variable, or its data values
+
+    Returns
+    -------
+        bool
+    """
+    if da is None or isinstance(obj, (dict, np.ndarray)):
+        return False
+    if isinstance(obj, da.Array):
+        return True
+    return isinstance(getattr(obj, 'data', None), da.Array)
+
+
+def tchunk(names, chunks=1000000):
+    """
+    Convert tplot variables to chunked (dask-backed) variables, with chunks along the time dimension.
+
+    Parameters
+    ----------
+        names : str or list[str]
+            Names of the tplot variables (wildcards accepted)
+        chunks : int, optional
+            Number of time samples in each chunk
+            Default: 1000000
+
+    Returns
+    -------
+        list[str]
+            Names of the tplot variables that were converted
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> import numpy as np
+        >>> pyspedas.store_data('a', data={'x': np.arange(1000.), 'y': np.random.rand(1000, 3)})
+        >>> pyspedas.tchunk('a', chunks=100)
+    """
+    if not dask_available():
+        return []
+    out_names = []
+    for name in pyspedas.tnames(names):
+        data_quant = pyspedas.tplot_tools.data_quants[name]
+        if isinstance(data_quant, dict):
+            logging.warning('tchunk: %s is non-record varying, skipping', name)
+            continue
+        chunked = data_quant.chunk({'time': chunks})
+        chunked.attrs = data_quant.attrs
+        pyspedas.tplot_tools.data_quants[name] = chunked
+        out_names.append(name)
+    return out_names
+
+
+def tcompute(names):
+    """
+    Compute the data values of chunked tplot variables, and store them back as ordinary numpy-backed variables.
+
+    Parameters
+    ----------
+        names : str or list[str]
+            Names of the tplot variables (wildcards accepted)
+
+    Returns
+    -------
+        list[str]
+            Names of the tplot variables that were computed
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> import numpy as np
+        >>> pyspedas.store_data('a', data={'x': np.arange(1000.), 'y': np.random.rand(1000, 3)}, chunks=100)
+        >>> pyspedas.tcompute('a')
+    """
+    out_names = []
+    for name in pyspedas.tnames(names):
+        data_quant = pyspedas.tplot_tools.data_quants[name]
+        if not is_chunked(data_quant):
+            continue
+        computed = data_quant.compute()
+        computed.attrs = data_quant.attrs
+        pyspedas.tplot_tools.data_quants[name] = computed
+        out_names.append(name)
+    # close any HDF5 files that were only open for these (lazily restored) variables
+    # (imported here, since tplot_hdf5 imports this module)
+    from pyspedas.tplot_tools.tplot_hdf5 import close_unused_hdf5
+    close_unused_hdf5()
+    return out_names
+
+
+def _block_bin_sums(block, ind, nbins):
+    # Sums and counts of the non-NaN values in each bin, for one chunk of the data.
+    # ind gives the bin index of each time sample, with -1 for samples outside all bins.
+    sums, counts = bin_sums(block.reshape(block.shape[0], -1), ind.reshape(-1), nbins)
+    return np.stack([sums, counts.astype(np.float64)])[np.newaxis]
+
+
+def chunked_bin_means(data, ind, nbins):
+    """
+    Lazily compute the mean of the non-NaN data values in each time bin of a chunked array.
+
+    Each chunk is reduced to per-bin sums and counts independently, so only one chunk
+    needs to be in memory at a time when the result is computed.
+
+    Parameters
+    ----------
+        data : dask.array.Array
+            Data values, with time as the first dimension
+        ind : ndarray[int]
+            Bin index of each time sample, or -1 for samples that are not in any bin
+        nbins : int
+            Number of bins
+
+    Returns
+    -------
+        dask.array.Array
+            Mean of each bin (NaN for empty bins), with shape (nbins,) + data.shape[1:]
+    """
+    data = data.rechunk({i: -1 for i in range(1, data.ndim)})
+    ind_chunks = da.from_array(np.asarray(ind, dtype=np.int64), chunks=(data.chunks[0],))
+    width = int(np.prod(data.shape[1:]))
+    # ind is given the same number of dimensions as data, so that its chunks line up with the data chunks
+    ind_chunks = ind_chunks[(slice(None),) + (np.newaxis,) * (data.ndim - 1)]
+    partial = da.map_blocks(_block_bin_sums, data, ind_chunks, nbins=nbins, dtype=np.float64,
+                            drop_axis=list(range(1, data.ndim)), new_axis=[1, 2, 3],
+                            chunks=((1,) * data.numblocks[0], (2,), (nbins,), (width,)))
+    sums, counts = partial.sum(axis=0)
+    means = da.where(counts > 0, sums / da.maximum(counts, 1), np.nan)
+    return means.reshape((nbins,) + data.shape[1:])
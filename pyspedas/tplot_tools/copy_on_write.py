@@ -0,0 +1,169 @@
+"""
+Copy-on-write copies of tplot variables.
+
+tplot_copy (and tcopy) don't copy the data arrays of a variable.  Instead, the copy gets read-only
+views of the original's arrays, so that copying a variable takes the same time regardless of its
+size.  The original's arrays are left as they were (writeable).
+
+The arrays stay shared until either variable's data is handed out to be modified: get_data (and
+unshare_data) first give that variable its own writeable copy of any shared arrays, so values
+written into the arrays returned by get_data only change that variable.  Replacing the data of either
+variable (e.g. with store_data, replace_data, or by assigning to data_quants[name].values) doesn't
+affect the other one.  Writing directly into data_quants[name].values of the original, without
+get_data or unshare_data, would also change its copies.
+
+"""
+import weakref
+from copy import deepcopy
+
+import numpy as np
+import pyspedas
+
+# Writeable arrays whose copies share them: id(array) -> (weak reference to the array, weak references
+# to the read-only views of it given to the copies)
+_shared_arrays = {}
+# The read-only views given to copies: id(view) -> weak reference to the view
+_shared_views = {}
+
+
+def _data_variables(data_quant):
+    # The xarray Variables holding the data values and any non-index coordinates (e.g. spec_bins).
+    # The time index is immutable, so it can always be shared.
+    variables = [data_quant.variable]
+    for coord_name in data_quant.coords:
+        if coord_name not in data_quant.xindexes:
+            variables.append(data_quant.coords[coord_name].variable)
+    return variables
+
+
+def _is_shared(arr):
+    # True if arr is a read-only view given to a copy, or an array with such views that still exist
+    ref = _shared_views.get(id(arr))
+    if ref is not None and ref() is arr:
+        return True
+    entry = _shared_arrays.get(id(arr))
+    if entry is None or entry[0]() is not arr:
+        return False
+    return any(view_ref() is not None for view_ref in entry[1])
+
+
+def _share(arr, track_original=True):
+    # A read-only view of arr for a copy, recording that arr is shared
+    view = arr.view()
+    view.flags.writeable = False
+    if track_original and arr.flags.writeable:
+        entry = _shared_arrays.get(id(arr))
+        if entry is None or entry[0]() is not arr:
+            entry = (weakref.ref(arr), [])
+            _shared_arrays[id(arr)] = entry
+        entry[1].append(weakref.ref(view))
+    _shared_views[id(view)] = weakref.ref(view)
+    # forget arrays and views that no longer exist
+    for registry in (_shared_arrays, _shared_views):
+        for key in [key for key, value in registry.items()
+                    if (value[0] if isinstance(value, tuple) else value)() is None]:
+            del registry[key]
+    return view
+
+
+def own_shared_data(data_quant):
+    """
+    Give a tplot variable its own writeable copies of any arrays it shares with copies made by
+    tplot_copy (or with the variable it was copied from).
+
+    This is called by get_data, so the arrays it returns can be modified in place without changing
+    any other variable.  Arrays that aren't shared are not copied.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray
+            The tplot variable
+
+    Returns
+    -------
+        None
+    """
+    for variable in _data_variables(data_quant):
+        arr = variable.data
+        if isinstance(arr, np.ndarray) and _is_shared(arr):
+            _shared_views.pop(id(arr), None)
+            _shared_arrays.pop(id(arr), None)
+            variable.data = np.array(arr)
+
+
+def shared_copy(data_quant, name=None, track_original=True):
+    """
+    Return a copy of a tplot variable that shares its data arrays with the original.
+
+    The copy gets read-only views of the original's arrays; the original's arrays are not changed.
+    The metadata is copied.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray
+            The tplot variable to copy
+        name : str, optional
+            Name for the copy.  Defaults to the name of the original.
+        track_original : bool, optional
+            If False, the original isn't marked as shared, so get_data doesn't copy its arrays, and
+            changes made to them in place show in the copy (e.g. for a pseudovariable, whose data
+            only mirrors its first variable's).
+            Default: True
+
+    Returns
+    -------
+        xarray.DataArray
+            The new variable
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools.copy_on_write import shared_copy
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1,2,3]})
+        >>> new_var = shared_copy(pyspedas.tplot_tools.data_quants["Variable1"], "Variable2")
+    """
+    new_data_quant = data_quant.copy(deep=False)
+    new_data_quant.attrs = deepcopy(data_quant.attrs)
+    for variable in _data_variables(new_data_quant):
+        arr = variable.data
+        if isinstance(arr, np.ndarray):
+            variable.data = _share(arr, track_original=track_original)
+    if name is not None:
+        new_data_quant.name = name
+    return new_data_quant
+
+
+def unshare_data(names):
+    """
+    Give tplot variables their own writeable copies of any read-only or shared arrays (for example,
+    arrays shared with a copy made by tplot_copy), so that they can be modified in place.
+
+    Arrays that are writeable and not shared are not copied.
+
+    Parameters
+    ----------
+        names : str or list[str]
+            Names of the tplot variables (wildcards accepted)
+
+    Returns
+    -------
+        None
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import unshare_data
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1.,2.,3.]})
+        >>> pyspedas.tplot_copy("Variable1", "Variable2")
+        >>> unshare_data("Variable2")
+        >>> pyspedas.tplot_tools.data_quants["Variable2"].values[0] = 5.0
+    """
+    for name in pyspedas.tnames(names):
+        data_quant = pyspedas.tplot_tools.data_quants[name]
+        if isinstance(data_quant, dict):
+            continue
+        own_shared_data(data_quant)
+        for variable in _data_variables(data_quant):
+            arr = variable.data
+            if isinstance(arr, np.ndarray) and not arr.flags.writeable:
+                variable.data = np.array(arr)
@@ -6,6 +6,7 @@
 import pyspedas
 import fnmatch
 import logging
+from pyspedas.tplot_tools.tplot_hdf5 import close_unused_hdf5
 
 
 def del_data(name=None):
@@ -46,5 +47,7 @@ def del_data(name=None):
             str_name = temp_data_quants.name
 
         del pyspedas.tplot_tools.data_quants[str_name]
-        
+
+    # close any HDF5 files that were only open for the deleted (lazily restored) variables
+    close_unused_hdf5()
     return
\ No newline at end of file
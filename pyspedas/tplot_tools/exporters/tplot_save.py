@@ -6,19 +6,31 @@
 import pickle
 import pyspedas
 import logging
+from pyspedas.tplot_tools.tplot_hdf5 import h5py_available, save_hdf5
 
-def tplot_save(names, filename=None):
+def tplot_save(names, filename=None, format=None, compression=None, chunks=None):
     """
     This function will save tplot variables into a single file by using the python "pickle" function.
     This file can then be "restored" using tplot_restore.  This is useful if you want to end the pyspedas session,
     but save all of your data/options.  All variables and plot options can be read back into tplot with the 
     "tplot_restore" command.  
+
+    With format='hdf5' (or a filename ending in .h5 or .hdf5), the variables are instead written to an HDF5 file,
+    with one group per variable.  These files can be read without unpickling, can be compressed, and
+    tplot_restore can read back selected variables without loading the whole file.  This requires the h5py package.
     
     Parameters:
         names : str/list
             A string or a list of strings of the tplot variables you would like saved.  
         filename : str, optional
             The filename where you want to save the file.  
+        format : str, optional
+            'pickle' or 'hdf5'.  By default, 'hdf5' is used for filenames ending in .h5 or .hdf5,
+            and 'pickle' otherwise.
+        compression : str, optional
+            HDF5 compression filter for the data arrays, e.g. 'gzip' or 'lzf' (HDF5 format only)
+        chunks : int, optional
+            Number of time samples in each HDF5 chunk (HDF5 format only)
             
     Returns:
         None
@@ -31,6 +43,8 @@ def tplot_save(names, filename=None):
         >>> pyspedas.store_data("Variable1", data={'x':x_data, 'y':y_data})
         >>> pyspedas.ylim('Variable1', 2, 4)
         >>> pyspedas.tplot_save('Variable1', filename='C:/temp/variable1.pyspedas')
+        >>> # Save to a compressed HDF5 file
+        >>> pyspedas.tplot_save('Variable1', filename='C:/temp/variable1.h5', compression='gzip')
 
     """
     if isinstance(names,int):
@@ -42,16 +56,36 @@ def tplot_save(names, filename=None):
     for name in names:
         if not isinstance(pyspedas.tplot_tools.data_quants[name], dict): # not a NRV variable
             # variable is a time series
-            for oplot_name in pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots']:
+            plot_options = pyspedas.tplot_tools.data_quants[name].attrs['plot_options']
+            for oplot_name in plot_options['overplots'] + plot_options.get('overplots_mpl', []):
                 if oplot_name not in names:
                     names.append(oplot_name)
     
-    #Pickle it up
-    to_pickle =[]
-    for name in names:    
+    for name in names:
         if name not in pyspedas.tplot_tools.data_quants.keys():
             logging.error("The name %s is currently not in pyspedas", name)
             return
+
+    if format is None:
+        if filename is not None and filename.lower().endswith(('.h5', '.hdf5')):
+            format = 'hdf5'
+        else:
+            format = 'pickle'
+
+    if format == 'hdf5':
+        if not h5py_available():
+            return
+        if filename is None:
+            filename='var_'+'-'.join(names)+'.h5'
+        save_hdf5(filename, names, compression=compression, chunks=chunks)
+        return
+    elif format != 'pickle':
+        logging.error("tplot_save: unknown format %s; must be 'pickle' or 'hdf5'", format)
+        return
+
+    #Pickle it up
+    to_pickle =[]
+    for name in names:    
         to_pickle.append(pyspedas.tplot_tools.data_quants[name])
     
     num_quants = len(to_pickle)
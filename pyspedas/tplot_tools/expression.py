@@ -0,0 +1,239 @@
+"""
+Lazy arithmetic on tplot variables.
+
+Calling add, multiply, tcrossp etc. in turn stores every intermediate result as a full tplot variable.
+An expression built from texpr instead only records the operations, for example
+
+    >>> from pyspedas.tplot_tools import texpr
+    >>> e, b = texpr('mms1_edp_dce_gse_brst_l2'), texpr('mms1_fgm_b_gse_brst_l2_bvec')
+    >>> vexb = 1e3 * e.cross(b) / b.dot(b)
+    >>> vexb.evaluate('mms1_vexb')
+
+and evaluate computes the whole expression in one pass over blocks of time samples, so the
+intermediate values only exist for one block at a time, and only the final result is stored.
+
+The expression is evaluated on the times of the first tplot variable in it; the other variables
+are linearly interpolated to those times (with cached interpolation plans) if their times differ.
+
+"""
+import logging
+import numpy as np
+import pyspedas
+from pyspedas.tplot_tools import store_data
+from pyspedas.tplot_tools.interp_plan import interp_plan
+
+# Number of time samples evaluated together
+_BLOCK_ROWS = 65536
+
+
+class _Variable:
+    # Values of a tplot variable (on the expression's times) for a block of rows
+    def __init__(self, data_quant, times):
+        self.data = data_quant.data
+        self.plan = None
+        own_times = data_quant.coords['time'].values
+        if len(own_times) != len(times) or not np.array_equal(own_times, times):
+            self.plan = interp_plan(own_times, times)
+            self.data = np.asarray(self.data, dtype=np.float64)
+
+    def block(self, rows):
+        if self.plan is not None:
+            return self.plan.apply(self.data, rows=rows)
+        return np.asarray(self.data[rows])
+
+
+def _align(a, b):
+    # A single value per time (e.g. a dot product) combines with every column of the other operand
+    # (only used when both operands depend on time; constants use the usual numpy broadcasting)
+    if np.ndim(a) == 1 and np.ndim(b) > 1:
+        a = a[:, np.newaxis]
+    elif np.ndim(b) == 1 and np.ndim(a) > 1:
+        b = b[:, np.newaxis]
+    return a, b
+
+
+def _magnitude(a):
+    return np.sqrt(np.sum(a * a, axis=1))
+
+
+def _normalize(a):
+    return a / _magnitude(a)[:, np.newaxis]
+
+
+class TExpr:
+    """
+    A lazily evaluated expression of tplot variables.
+
+    Expressions are combined with the arithmetic operators (+, -, *, /, **, unary - and abs()), with
+    numbers, and with numpy arrays (e.g. a constant vector), and with the dot, cross, magnitude,
+    normalize and sqrt methods.  Nothing is computed until evaluate is called.
+
+    A value per time (such as a dot product or magnitude) can be combined with a vector or spectrum,
+    e.g. b / b.magnitude(), in which case it applies to every component.
+    """
+
+    # Make numpy defer to the TExpr operators, e.g. for np.float64(2.0) * expr
+    __array_ufunc__ = None
+
+    def __init__(self, func=None, args=(), name=None, value=None):
+        self.func = func
+        self.args = args
+        self.name = name
+        self.value = value
+        # False for constants (numbers and arrays), whose dimensions aren't times
+        self.timed = name is not None or any(arg.timed for arg in args)
+
+    @staticmethod
+    def _wrap(other):
+        if isinstance(other, TExpr):
+            return other
+        return TExpr(value=np.asarray(other))
+
+    def _apply(self, func, *others):
+        return TExpr(func=func, args=(self,) + tuple(TExpr._wrap(o) for o in others))
+
+    def _binary(self, op, other, reflected=False):
+        other = TExpr._wrap(other)
+        args = (other, self) if reflected else (self, other)
+        if other.timed:
+            return TExpr(func=lambda a, b: op(*_align(a, b)), args=args)
+        return TExpr(func=op, args=args)
+
+    def __add__(self, other):
+        return self._binary(np.add, other)
+
+    def __radd__(self, other):
+        return self._binary(np.add, other, reflected=True)
+
+    def __sub__(self, other):
+        return self._binary(np.subtract, other)
+
+    def __rsub__(self, other):
+        return self._binary(np.subtract, other, reflected=True)
+
+    def __mul__(self, other):
+        return self._binary(np.multiply, other)
+
+    def __rmul__(self, other):
+        return self._binary(np.multiply, other, reflected=True)
+
+    def __truediv__(self, other):
+        return self._binary(np.true_divide, other)
+
+    def __rtruediv__(self, other):
+        return self._binary(np.true_divide, other, reflected=True)
+
+    def __pow__(self, other):
+        return self._binary(np.power, other)
+
+    def __neg__(self):
+        return self._apply(np.negative)
+
+    def __abs__(self):
+        return self._apply(np.abs)
+
+    def dot(self, other):
+        """Dot product with another vector expression, one value per time."""
+        return self._apply(lambda a, b: np.sum(a * b, axis=-1), other)
+
+    def cross(self, other):
+        """Cross product with another 3-component vector expression."""
+        return self._apply(np.cross, other)
+
+    def magnitude(self):
+        """Magnitude of a vector expression, one value per time."""
+        return self._apply(_magnitude)
+
+    def normalize(self):
+        """Unit vectors in the direction of a vector expression."""
+        return self._apply(_normalize)
+
+    def sqrt(self):
+        """Square root."""
+        return self._apply(np.sqrt)
+
+    def _variable_names(self, names):
+        if self.name is not None:
+            if self.name not in names:
+                names.append(self.name)
+        for arg in self.args:
+            arg._variable_names(names)
+        return names
+
+    def _block(self, variables, rows, done):
+        # done holds the values of the subexpressions already computed for this block, so that
+        # a subexpression used more than once is only computed once
+        if self.name is not None:
+            return variables[self.name].block(rows)
+        if self.func is None:
+            return self.value
+        if id(self) not in done:
+            done[id(self)] = self.func(*[arg._block(variables, rows, done) for arg in self.args])
+        return done[id(self)]
+
+    def evaluate(self, newname=None):
+        """
+        Compute the expression, a block of times at a time.
+
+        Parameters
+        ----------
+            newname : str, optional
+                Name of the tplot variable to store the result in.  If not given, the result is
+                returned instead.
+
+        Returns
+        -------
+            str or tuple or None
+                newname, or if newname isn't given, a tuple of the times (as np.datetime64) and
+                the values.  None if any of the tplot variables don't exist.
+        """
+        names = self._variable_names([])
+        if len(names) == 0:
+            raise ValueError('TExpr: the expression has no tplot variables')
+        data_quants = pyspedas.tplot_tools.data_quants
+        for name in names:
+            if name not in data_quants or isinstance(data_quants[name], dict):
+                logging.error('texpr: tplot variable %s not found', name)
+                return None
+        times = data_quants[names[0]].coords['time'].values
+        variables = {name: _Variable(data_quants[name], times) for name in names}
+
+        values = None
+        for start in range(0, max(len(times), 1), _BLOCK_ROWS):
+            rows = slice(start, min(start + _BLOCK_ROWS, len(times)))
+            block = np.asarray(self._block(variables, rows, {}))
+            if values is None:
+                values = np.empty((len(times),) + block.shape[1:], dtype=block.dtype)
+            values[rows] = block
+
+        if newname is None:
+            return times, values
+        store_data(newname, data={'x': times, 'y': values})
+        return newname
+
+
+def texpr(name):
+    """
+    Start a lazily evaluated expression with a tplot variable.
+
+    Parameters
+    ----------
+        name : str
+            Name of the tplot variable
+
+    Returns
+    -------
+        TExpr
+            An expression, which can be combined with other expressions, numbers and arrays,
+            and then computed with its evaluate method
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import texpr
+        >>> pyspedas.store_data('e', data={'x': [1, 2, 3], 'y': [[1, 0, 0], [0, 1, 0], [0, 0, 1]]})
+        >>> pyspedas.store_data('b', data={'x': [1, 2, 3], 'y': [[0, 2, 0], [0, 0, 2], [2, 0, 0]]})
+        >>> b = texpr('b')
+        >>> (texpr('e').cross(b) / b.dot(b)).evaluate('exb')
+    """
+    return TExpr(name=name)
@@ -6,10 +6,107 @@ import numpy as np
 import pyspedas
 from collections import namedtuple
 import logging
+import weakref
 from astropy import units as u
+from pyspedas.tplot_tools.chunked import is_chunked
+from pyspedas.tplot_tools.copy_on_write import own_shared_data
 
+# The return types are created once here, rather than on every call
+_variable = namedtuple('variable', ['times', 'y'])
+_variable_dy = namedtuple('variable', ['times', 'y', 'dy'])
+_variable_v = namedtuple('variable', ['times', 'y', 'v'])
+_variable_v1 = namedtuple('variable', ['times', 'y', 'v1'])
+_variable_v1_v2 = namedtuple('variable', ['times', 'y', 'v1', 'v2'])
+_variable_v1_v2_v3 = namedtuple('variable', ['times', 'y', 'v1', 'v2', 'v3'])
 
-def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_quant_in=None, ensure_writeable=False):
+# Cache of unix time arrays, keyed by id() of the pandas time index of each variable.
+# The index is replaced whenever a variable's times change, and the cache entry
+# is dropped when the index is garbage collected.
+_unix_times_cache = {}
+
+
+def _read_only(arr):
+    # Return a read-only view of arr, without copying
+    if not isinstance(arr, np.ndarray):
+        return arr
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def get_unix_times(data_quant):
+    """
+    Return the times of a tplot variable as a read-only float64 array of seconds since 1970.
+
+    The conversion from np.datetime64[ns] is done once per variable and cached until
+    the variable's times are replaced.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray
+            The tplot variable (e.g. pyspedas.tplot_tools.data_quants['Variable1'])
+
+    Returns
+    -------
+        ndarray[float]
+            Read-only numpy array of seconds since 1970
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import get_unix_times
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1,2,3]})
+        >>> times = get_unix_times(pyspedas.tplot_tools.data_quants["Variable1"])
+    """
+    try:
+        index = data_quant.indexes['time']
+    except KeyError:
+        index = None
+    if index is not None:
+        key = id(index)
+        entry = _unix_times_cache.get(key)
+        if entry is not None and entry[0]() is index:
+            return entry[1]
+    # TODO: Is this always at ns resolution?  ERG LEPE CDFs seem to be in microseconds
+    times = np.int64(data_quant.time.values)/1e9
+    times.flags.writeable = False
+    if index is not None:
+        _unix_times_cache[key] = (weakref.ref(index, lambda ref, key=key: _unix_times_cache.pop(key, None)), times)
+    return times
+
+
+def times_sorted(data_quant):
+    """
+    Return True if the times of a tplot variable are in non-decreasing order.
+
+    The check is done by pandas on the variable's time index, which caches the result until
+    the variable's times are replaced, so repeated calls are cheap.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray
+            The tplot variable (e.g. pyspedas.tplot_tools.data_quants['Variable1'])
+
+    Returns
+    -------
+        bool
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import times_sorted
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1,2,3]})
+        >>> times_sorted(pyspedas.tplot_tools.data_quants["Variable1"])
+        True
+    """
+    try:
+        index = data_quant.indexes['time']
+    except KeyError:
+        return False
+    return bool(index.is_monotonic_increasing)
+
+
+def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_quant_in=None, ensure_writeable=False, lazy=False):
     """
     This function extracts the data from the tplot Variables stored in memory.
     
@@ -30,11 +127,14 @@ def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_qua
             Ensure that returned arrays are writeable, rather than (for example) read-only views of pandas
             data frame indices. Specify 'True' if you need to modify the returned arrays. Defaults to 'False'
             for efficiency.
+        lazy: bool, optional
+            For chunked (dask-backed) variables, return the data values as a dask array rather than
+            computing them.  Defaults to 'False'.
          
     Returns
     --------
     times: ndarray[float]
-        numpy array of seconds since 1970
+        numpy array of seconds since 1970.  This is a cached, read-only array unless ensure_writeable=True.
     y: ndarray
         n-dimensional numpy array of the data values
     v: ndarray
@@ -82,6 +182,10 @@ def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_qua
         # non-record varying variables are stored as dicts
         return temp_data_quant['data']
 
+    if not metadata:
+        # Arrays shared with copies (see tplot_copy) are copied first, so they can be modified in place
+        own_shared_data(temp_data_quant)
+
     if xarray:
         return temp_data_quant
 
@@ -91,21 +195,21 @@ def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_qua
     error = temp_data_quant.attrs['plot_options']['error']
 
     if not dt:
-        # TODO: Is this always at ns resolution?  ERG LEPE CDFs seem to be in microseconds
-        times = np.int64(temp_data_quant.time.values)/1e9
-        #times = np.array([int(time)/1e9 for time in temp_data_quant.time.values])
-        #times = np.array([(time - np.datetime64('1970-01-01T00:00:00'))/np.timedelta64(1, 's') for time in temp_data_quant.time.values])
+        # Cached, read-only; copied below if ensure_writeable is set
+        times = get_unix_times(temp_data_quant)
     else:
         times = temp_data_quant.time.values
 
     coord_names = temp_data_quant.coords.keys()
     data_values = temp_data_quant.data
+    if is_chunked(data_values) and not lazy:
+        data_values = temp_data_quant.values
 
     # Temporary patch for Pandas 3.0.0
     # Arguably, this is dangerous and should not be allowed...
     if ensure_writeable and not times.flags['WRITEABLE']:
         times=times.copy()
-    if ensure_writeable and not data_values.flags['WRITEABLE']:
+    if ensure_writeable and not is_chunked(data_values) and not data_values.flags['WRITEABLE']:
         data_values=data_values.copy()
 
     v1_values = None
@@ -152,43 +256,88 @@ def get_data(name, xarray=False, metadata=False, dt=False, units=False, data_qua
             v2_values = v2_values.copy()
         if ensure_writeable and not v3_values.flags['WRITEABLE']:
             v3_values = v3_values.copy()
-        variable = namedtuple('variable', ['times', 'y', 'v1', 'v2', 'v3'])
-        return variable(times, data_values, v1_values, v2_values, v3_values)
+        return _variable_v1_v2_v3(times, data_values, v1_values, v2_values, v3_values)
     elif 'v1' in coord_names and 'v2' in coord_names:
         if ensure_writeable and not v1_values.flags['WRITEABLE']:
             v1_values = v1_values.copy()
         if ensure_writeable and not v2_values.flags['WRITEABLE']:
             v2_values = v2_values.copy()
 
-        variable = namedtuple('variable', ['times', 'y', 'v1', 'v2'])
-        return variable(times, data_values, v1_values, v2_values)
+        return _variable_v1_v2(times, data_values, v1_values, v2_values)
     elif 'v1' in coord_names:
         if ensure_writeable and not v1_values.flags['WRITEABLE']:
             v1_values = v1_values.copy()
 
-        variable = namedtuple('variable', ['times', 'y', 'v1'])
-        return variable(times, data_values, v1_values)
+        return _variable_v1(times, data_values, v1_values)
     elif 'v' in coord_names:
         if ensure_writeable and not v1_values.flags['WRITEABLE']:
             v1_values = v1_values.copy()
 
-        variable = namedtuple('variable', ['times', 'y', 'v'])
-        return variable(times, data_values, v1_values)
+        return _variable_v(times, data_values, v1_values)
     elif 'spec_bins' in coord_names:
         if ensure_writeable and not v1_values.flags['WRITEABLE']:
             v1_values = v1_values.copy()
 
-        variable = namedtuple('variable', ['times', 'y', 'v'])
-        return variable(times, data_values, v1_values)
+        return _variable_v(times, data_values, v1_values)
 
     if error is not None:
         if ensure_writeable and not error.flags['WRITEABLE']:
             error = error.copy()
-        variable = namedtuple('variable', ['times', 'y', 'dy'])
-        return variable(times, data_values, error)
+        return _variable_dy(times, data_values, error)
+    else:
+        return _variable(times, data_values)
+
+
+def get_data_views(name, dt=False):
+    """
+    Return read-only views of the times, data values and coordinates of a tplot variable.
+
+    This is a lightweight alternative to get_data for code that reads the same variables
+    many times: nothing is copied, units are not attached, and the unix times are cached
+    (see get_unix_times).  Use get_data with ensure_writeable=True if the arrays need
+    to be modified.
+
+    Parameters
+    ----------
+        name : str
+            Name of the tplot variable
+        dt: bool, optional
+            Return the times as np.datetime64[ns] objects instead of unix times
+
+    Returns
+    -------
+        tuple
+            (times, y, coords), where coords is a dict of the non-time coordinates
+            (e.g. 'v', 'spec_bins', 'v1', 'v2', 'v3') present in the variable.
+            For chunked variables, y is a dask array.
+            Returns None if the variable does not exist or is non-record varying.
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import get_data_views
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1,2,3]})
+        >>> times, y, coords = get_data_views("Variable1")
+    """
+    data_quant = pyspedas.tplot_tools.data_quants.get(name)
+    if data_quant is None:
+        logging.info("The name " + str(name) + " is currently not in pyspedas")
+        return
+    if isinstance(data_quant, dict):
+        return
+
+    if dt:
+        times = _read_only(data_quant.time.values)
     else:
-        variable = namedtuple('variable', ['times', 'y'])
-        return variable(times, data_values)
+        times = get_unix_times(data_quant)
+
+    coords = {}
+    for coord_name in data_quant.coords:
+        if coord_name != 'time':
+            coords[coord_name] = _read_only(data_quant.coords[coord_name].values)
+
+    # data_quant.data is a dask array for chunked variables, which is returned without computing it
+    return times, _read_only(data_quant.data), coords
 
 
 def get(name, xarray=False, metadata=False, dt=True, units=True, ensure_writeable=False):
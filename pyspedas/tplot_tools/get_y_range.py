@@ -43,3 +43,15 @@ def get_y_range(dataset):
     warnings.resetwarnings()
     return [y_min, y_max]
 
+
+
+def get_cached_y_range(dataset):
+    # Return the y_range stored in the plot options, computing and caching it first if needed.
+    # store_data, replace_data and replace_metadata leave y_range set to None, so the full min/max
+    # scan is only done when the variable is actually plotted or its metadata is requested.
+    yaxis_opt = dataset.attrs.get('plot_options', {}).get('yaxis_opt')
+    if yaxis_opt is None:
+        return None
+    if yaxis_opt.get('y_range') is None:
+        yaxis_opt['y_range'] = get_y_range(dataset)
+    return yaxis_opt['y_range']
@@ -8,14 +8,13 @@ import cdflib
 import logging
 import re
 import numpy as np
-import xarray as xr
 import datetime
 from datetime import timedelta
 from pyspedas.tplot_tools import store_data
 from pyspedas.tplot_tools import tplot
 from pyspedas.tplot_tools import options
+from pyspedas.tplot_tools.importers.merge_data_quant import merge_data_quant
 import pyspedas
-import copy
 from collections.abc import Iterable
 
 
@@ -987,9 +986,7 @@ def cdf_to_tplot(filenames, mastercdf=None, varformat=None, exclude_format=None,
             cur_data_quant = pyspedas.tplot_tools.data_quants[var_name]
             if isinstance(pyspedas.tplot_tools.data_quants[var_name], dict):  # non-record varying variable, shouldn't be merged
                 continue
-            plot_options = copy.deepcopy(pyspedas.tplot_tools.data_quants[var_name].attrs)
-            pyspedas.tplot_tools.data_quants[var_name] = xr.concat([prev_data_quant, cur_data_quant], dim='time').sortby('time')
-            pyspedas.tplot_tools.data_quants[var_name].attrs = plot_options
+            pyspedas.tplot_tools.data_quants[var_name] = merge_data_quant(prev_data_quant, cur_data_quant)
 
     if notplot:
         return output_table
@@ -0,0 +1,63 @@
+import xarray as xr
+from pyspedas.tplot_tools.get_data import times_sorted
+
+
+def merge_data_quant(prev_data_quant, cur_data_quant):
+    """
+    Merge newly loaded data into an existing tplot variable along the time dimension.
+
+    This is used by the importers when loading with merge=True. In the common case where
+    the new chunk is already sorted and lies entirely after (or entirely before) the
+    existing data, the two arrays are simply concatenated in the right order. The full
+    re-sort of the combined time axis is only done when the chunks overlap or either
+    chunk is unsorted.  Whether the times are sorted is checked with the variables' pandas
+    time indexes, which cache the result.
+
+    Only the sort is skipped: the concatenation still copies the existing data into the
+    merged variable, so each merge costs time proportional to the total amount of data,
+    not just the newly loaded chunk.
+
+    Parameters
+    ----------
+        prev_data_quant : xarray.DataArray
+            The tplot variable already in memory
+        cur_data_quant : xarray.DataArray
+            The tplot variable created from the newly loaded data
+
+    Returns
+    -------
+        xarray.DataArray
+            The merged variable, carrying the attributes of cur_data_quant
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools.importers.merge_data_quant import merge_data_quant
+        >>> pyspedas.store_data('a', data={'x': [1, 2, 3], 'y': [1, 2, 3]})
+        >>> pyspedas.store_data('b', data={'x': [4, 5, 6], 'y': [4, 5, 6]})
+        >>> merged = merge_data_quant(pyspedas.data_quants['a'], pyspedas.data_quants['b'])
+    """
+    prev_times = prev_data_quant.time.values
+    cur_times = cur_data_quant.time.values
+
+    if len(prev_times) == 0:
+        merged = cur_data_quant
+    elif len(cur_times) == 0:
+        merged = prev_data_quant
+    elif times_sorted(cur_data_quant) and times_sorted(prev_data_quant):
+        if prev_times[-1] <= cur_times[0]:
+            # Appending after the existing data: no sort needed
+            merged = xr.concat([prev_data_quant, cur_data_quant], dim='time')
+        elif cur_times[-1] < prev_times[0]:
+            # Prepending before the existing data: no sort needed
+            merged = xr.concat([cur_data_quant, prev_data_quant], dim='time')
+        else:
+            merged = xr.concat([prev_data_quant, cur_data_quant], dim='time').sortby('time')
+    else:
+        merged = xr.concat([prev_data_quant, cur_data_quant], dim='time').sortby('time')
+
+    # cur_data_quant was just created by store_data and is about to be replaced,
+    # so its attributes can be reused without copying them.
+    merged.attrs = cur_data_quant.attrs
+    merged.name = cur_data_quant.name
+    return merged
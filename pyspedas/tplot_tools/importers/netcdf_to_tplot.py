@@ -1,19 +1,63 @@
 import os
-import copy
+import re
 import calendar
 import logging
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import xarray as xr
 import pyspedas
 from pyspedas.tplot_tools import tplot, store_data
+from pyspedas.tplot_tools.importers.merge_data_quant import merge_data_quant
 from netCDF4 import Dataset, num2date
 
 
-def change_time_to_unix_time(time_var):
-    """
-    Convert the variable to seconds since epoch.
-    """
+# Nanoseconds per CF time unit
+_CF_UNITS_NS = {
+    "days": 86400 * 10**9,
+    "day": 86400 * 10**9,
+    "d": 86400 * 10**9,
+    "hours": 3600 * 10**9,
+    "hour": 3600 * 10**9,
+    "hrs": 3600 * 10**9,
+    "hr": 3600 * 10**9,
+    "h": 3600 * 10**9,
+    "minutes": 60 * 10**9,
+    "minute": 60 * 10**9,
+    "mins": 60 * 10**9,
+    "min": 60 * 10**9,
+    "seconds": 10**9,
+    "second": 10**9,
+    "secs": 10**9,
+    "sec": 10**9,
+    "s": 10**9,
+    "milliseconds": 10**6,
+    "millisecond": 10**6,
+    "msecs": 10**6,
+    "msec": 10**6,
+    "ms": 10**6,
+    "microseconds": 10**3,
+    "microsecond": 10**3,
+    "usecs": 10**3,
+    "usec": 10**3,
+    "us": 10**3,
+}
+
+# Calendars that are identical to numpy's proleptic Gregorian datetime64
+_CF_NUMPY_CALENDARS = ["standard", "gregorian", "proleptic_gregorian"]
+
+_CF_UNITS_RE = re.compile(r"^\s*(\w+)\s+since\s+(.+?)\s*$", re.IGNORECASE)
+_CF_REFTIME_RE = re.compile(
+    r"^(\d{1,4})-(\d{1,2})-(\d{1,2})"
+    r"(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2})(\.\d*)?)?)?"
+    r"\s*(?:Z|UTC|GMT|[+-]00:?00)?$",
+    re.IGNORECASE,
+)
+
+_FILLVAL_ATTS_LC = ["fillval", "_fillval", "_fillvalue", "fillvalue", "missing_data"]
+
+
+def _get_time_units(time_var):
     # Capitalization of variable attributes may vary...
+    units = None
     if hasattr(time_var, "units"):
         units = time_var.units
     elif hasattr(time_var, "Units"):
@@ -23,6 +67,18 @@ def change_time_to_unix_time(time_var):
     # ICON uses nonstandard units strings
     if units == "ms":
         units = "milliseconds since 1970-01-01 00:00:00"
+    return units
+
+
+def change_time_to_unix_time(time_var):
+    """
+    Convert the variable to seconds since epoch.
+
+    This uses netCDF4.num2date, and converts the resulting date objects one at a time.
+    It handles any calendar supported by cftime, but is slow for long time axes;
+    netcdf_to_tplot only falls back to it when cf_time_to_datetime64 can't decode the units.
+    """
+    units = _get_time_units(time_var)
     dates = num2date(time_var[:], units=units)
     unix_times = list()
     for date in dates:
@@ -31,8 +87,184 @@ def change_time_to_unix_time(time_var):
     return unix_times
 
 
+def cf_time_to_datetime64(time_var):
+    """
+    Decode a CF-convention numeric time variable directly to np.datetime64[ns] values.
+
+    The units string ("<unit> since <reference time>") is parsed once, and the offsets
+    are converted with integer arithmetic on the whole array.
+
+    Parameters
+    ----------
+    time_var : netCDF4.Variable
+        The time variable
+
+    Returns
+    -------
+    numpy.ndarray or None
+        Array of np.datetime64[ns] values, or None if the units or calendar are not
+        supported by the vectorized decoder (the caller should fall back to
+        change_time_to_unix_time in that case).  Masked values are returned as NaT.
+    """
+    units = _get_time_units(time_var)
+    if not isinstance(units, str):
+        return None
+    cal = getattr(time_var, "calendar", "standard")
+    if not isinstance(cal, str) or cal.lower() not in _CF_NUMPY_CALENDARS:
+        return None
+
+    units_match = _CF_UNITS_RE.match(units)
+    if units_match is None:
+        return None
+    unit_ns = _CF_UNITS_NS.get(units_match.group(1).lower())
+    ref_match = _CF_REFTIME_RE.match(units_match.group(2))
+    if unit_ns is None or ref_match is None:
+        return None
+
+    year, month, day, hour, minute, second, frac = ref_match.groups()
+    ref_str = "%04d-%02d-%02dT%02d:%02d:%02d" % (
+        int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0)
+    )
+    ref_ns = np.datetime64(ref_str, "ns").astype(np.int64)
+    if frac is not None and len(frac) > 1:
+        ref_ns += int(round(float(frac) * 1e9))
+
+    raw = time_var[:]
+    mask = np.ma.getmaskarray(raw)
+    offsets = np.ma.getdata(raw)
+    if np.issubdtype(offsets.dtype, np.integer):
+        offsets_ns = offsets.astype(np.int64) * unit_ns
+    else:
+        offsets = offsets.astype(np.float64)
+        mask = mask | ~np.isfinite(offsets)
+        offsets_ns = np.round(np.where(mask, 0.0, offsets) * unit_ns).astype(np.int64)
+
+    datetimes = (offsets_ns + ref_ns).view("datetime64[ns]")
+    if mask.any():
+        datetimes = datetimes.copy()
+        datetimes[mask] = np.datetime64("NaT")
+    return datetimes
+
+
+def _decode_time(time_var):
+    datetimes = cf_time_to_datetime64(time_var)
+    if datetimes is None:
+        unix_times = np.asarray(change_time_to_unix_time(time_var), dtype=np.float64)
+        datetimes = np.array(np.round(unix_times * 1e9), dtype="datetime64[ns]")
+    return datetimes
+
+
+def _read_masked_var(variable):
+    # Check for some attributes that might be used to flag fill values.
+    # If multiple matching attributes are found, the last one takes precedence.
+    var_fill_value = None
+    for key in variable.ncattrs():
+        if key.lower() in _FILLVAL_ATTS_LC:
+            var_fill_value = variable.getncattr(key)
+
+    values = variable[:]
+    # If var_fill_value is None, or already NaN, there's nothing to do here.
+    # Integer arrays can't be NaN-filled, so if var_fill_value is any kind of integer, skip those too.
+    # Some missions have strings defined as fill values.  (ICON)
+    if var_fill_value is not None and not isinstance(var_fill_value, np.integer) and not isinstance(var_fill_value, str) and not np.isnan(var_fill_value):
+        # We want to force missing values to be nan so that plots don't look strange
+        var_mask = np.ma.masked_where(
+            np.ma.getdata(values) == np.float32(var_fill_value), values
+        )
+        return np.ma.filled(var_mask, np.nan)
+    return np.ma.getdata(values)
+
+
+def _read_netcdf_file(filename, strict_time=True):
+    """
+    Read the time-dependent variables from a single netCDF file.
+
+    Returns a dict mapping netCDF variable names (in file order) to (times, values) tuples,
+    with times as np.datetime64[ns] arrays.
+    """
+    file_data = {}
+    with Dataset(filename) as vfile:
+        variables = vfile.variables
+        # A dictionary with the time variables in this file.
+        times_dict = {}
+
+        for var, variable in variables.items():
+
+            # Make sure that the variables are time-based, otherwise don't store them as tplot variables.
+            if len(variable.dimensions) == 0 or len(variable.dimensions[0]) == 0:
+                continue
+
+            # Find the time dependence of the current variable.
+            this_time = variable.dimensions[0]
+            if this_time not in variables:
+                # For GOES satelites, sometimes we get 'record' as time dependance.
+                # In that case, we can try 'time' and 'time_tag' as alternatives.
+                if "time" in variables:
+                    this_time = "time"
+                elif "time_tag" in variables:
+                    this_time = "time_tag"
+
+            if this_time not in variables:
+                # If this_time does not exist, we can't save this as tplot variable.
+                continue
+            elif this_time == var:
+                # If this_time has the same name as the current variable, do not save it.
+                continue
+
+            # Find the time values.
+            if this_time in times_dict:
+                datetimes = times_dict[this_time]
+            else:
+                try:
+                    datetimes = _decode_time(variables[this_time])
+                    times_dict[this_time] = datetimes
+                except Exception as e:
+                    # In this case, we could not handle the time, print an error
+                    logging.error(
+                        "Could not process time variable '"
+                        + this_time
+                        + "' for the netcdf variable: '"
+                        + var
+                        + "'"
+                    )
+                    logging.error("Exception details: " + str(e))
+                    continue
+
+            if variable.ndim < 1:
+                # Values are empty, skip it.
+                continue
+            if len(datetimes) != variable.shape[0] and strict_time:
+                # If strict_time is true, reject all variables that do not have
+                # same length for data and time. These can be inclination and other information
+                # saved as netcdf variables.
+                # If strict_time is false, pyspedas.store_data will complain about this
+                # "lengths of x and y do not match", but it will create the tplot variable.
+                # But if we try to plot these variables we may get an error.
+                continue
+
+            file_data[var] = (datetimes, _read_masked_var(variable))
+
+    return file_data
+
+
+def _combine_file_data(pieces):
+    """
+    Concatenate the (times, values) pieces of one variable read from several files,
+    allocating the output arrays once, and sort by time if the files overlap.
+    """
+    if len(pieces) == 1:
+        return pieces[0]
+    times = np.concatenate([p[0] for p in pieces])
+    values = np.concatenate([p[1] for p in pieces])
+    if len(times) == len(values) and np.any(times[1:] < times[:-1]):
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        values = values[order]
+    return times, values
+
+
 def netcdf_to_tplot(
-    filenames, time="", prefix="", suffix="", plot=False, merge=False, strict_time=True
+    filenames, time="", prefix="", suffix="", plot=False, merge=False, strict_time=True, max_workers=1
 ):
     """
     Create tplot variables from netCDF files.
@@ -63,6 +295,10 @@ def netcdf_to_tplot(
         their data length matches the time length.
         If False, all variables will be loaded. This is useful because some
         variables may contain general information, like satellite longitude.
+    max_workers : int, optional
+        Number of worker processes used to read the files in parallel.
+        Separate processes are used because the netCDF/HDF5 libraries are not thread-safe.
+        Default: 1 (files are read sequentially in the current process)
 
     Returns
     -------
@@ -100,137 +336,51 @@ def netcdf_to_tplot(
         return stored_variables
 
     filenames = sorted(list(set(filenames)))
+    existing_files = []
     for filename in filenames:
-
-        # Read file
         if os.path.isfile(filename):
-            vfile = Dataset(filename)
+            existing_files.append(filename)
         else:
             logging.error("Cannot find file: " + filename)
-            continue
-
-        # Create a dictionary that contains variables and their attributes.
-        vars_and_atts = {}
-        for name, variable in vfile.variables.items():
-            vars_and_atts[name] = {}
-            for attrname in variable.ncattrs():
-                vars_and_atts[name][attrname] = getattr(variable, attrname)
-
-        # Fill in missing values for each variable with np.nan (if values are not already nan)
-        # and save the masked variables to a new dictionary.
-        masked_vars = {}  # Dictionary containing properly masked variables
-        for var in vars_and_atts.keys():
-            reg_var = vfile.variables[var]
-            # Check for some attributes that might be used to flag fill values
-            atts_dict = vars_and_atts[var]
-            fillval_atts_lc = ["fillval", "_fillval", "_fillvalue", "fillvalue", "missing_data"]
-            var_fill_value = None
-            for key in atts_dict.keys():
-                if key.lower() in fillval_atts_lc:
-                    # If multiple matching keys are found, the one that appears latest in the above list
-                    # will take precedence
-                    var_fill_value = atts_dict[key]
-
-            # If var_fill_value is None, or already NaN, there's nothing to do here.
-            # Integer arrays can't be NaN-filled, so if var_fill_value is any kind of integer, skip those too.
-            # Some missions have strings defined as fill values.  (ICON)
-            if var_fill_value is not None and not isinstance(var_fill_value, np.integer) and not isinstance(var_fill_value, str) and not np.isnan(var_fill_value):
-                # We want to force missing values to be nan so that plots don't look strange
-                var_mask = np.ma.masked_where(
-                    reg_var == np.float32(var_fill_value), reg_var
-                )
-                var_filled = np.ma.filled(var_mask, np.nan)
-                masked_vars[var] = var_filled
-            else:
-                var_filled = reg_var
-                masked_vars[var] = var_filled
 
-        # A dictionary with the time variables in this file.
-        times_dict = {}
+    # Read each file into numpy arrays, in parallel if requested
+    if max_workers is not None and max_workers > 1 and len(existing_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(existing_files))) as executor:
+            file_results = list(executor.map(_read_netcdf_file, existing_files, [strict_time] * len(existing_files)))
+    else:
+        file_results = [_read_netcdf_file(filename, strict_time) for filename in existing_files]
 
-        # Store each netcdf variable as a tplot variable.
-        for i, var in enumerate(vfile.variables):
+    # Group the pieces of each variable across files, keeping the order of first appearance
+    var_pieces = {}
+    for file_data in file_results:
+        for var, piece in file_data.items():
+            var_pieces.setdefault(var, []).append(piece)
 
-            # Make sure that the variables are time-based, otherwise don't store them as tplot variables.
-            if len(vfile[var].dimensions) > 0 and len(vfile[var].dimensions[0]) > 0:
-
-                # Find the time dependence of the current variable.
-                this_time = vfile[var].dimensions[0]
-                if this_time not in vars_and_atts.keys():
-                    # For GOES satelites, sometimes we get 'record' as time dependance.
-                    # In that case, we can try 'time' and 'time_tag' as alternatives.
-                    if "time" in vars_and_atts.keys():
-                        this_time = "time"
-                    elif "time_tag" in vars_and_atts.keys():
-                        this_time = "time_tag"
-
-                if this_time not in vars_and_atts.keys():
-                    # If this_time does not exist, we can't save this as tplot variable.
-                    continue
-                elif this_time == var:
-                    # If this_time has the same name as the current variable, do not save it.
-                    continue
+    # Store each netcdf variable as a tplot variable.
+    for var, pieces in var_pieces.items():
+        var_name = prefix + var + suffix
+        # Merge when the variable is already in tplot and merge is True.
+        to_merge = var_name in pyspedas.tplot_tools.data_quants.keys() and (merge == True)
+        if to_merge:
+            prev_data_quant = pyspedas.tplot_tools.data_quants[var_name]
 
-                # Find the time values (as unix times).
-                if this_time in times_dict:
-                    unix_times = times_dict[this_time]
-                else:
-                    try:
-                        time_var = vfile[this_time]
-                        unix_times = change_time_to_unix_time(time_var)
-                        times_dict[this_time] = unix_times
-                    except Exception as e:
-                        # In this case, we could not handle the time, print an error
-                        logging.error(
-                            "Could not process time variable '"
-                            + this_time
-                            + "' for the netcdf variable: '"
-                            + var
-                            + "'"
-                        )
-                        logging.error("Exception details: " + str(e))
-                        continue
-
-                if var not in masked_vars:
-                    # We don't have any values for this variable, skip it.
-                    continue
-                this_masked_var = masked_vars[var]
-                if len(this_masked_var.shape) < 1:
-                    # Values are empty, skip it.
-                    continue
-                if len(unix_times) != this_masked_var.shape[0] and strict_time:
-                    # If strict_time is true, reject all variables that do not have
-                    # same length for data and time. These can be inclination and other information
-                    # saved as netcdf variables.
-                    # If strict_time is false, pyspedas.store_data will complain about this
-                    # "lengths of x and y do not match", but it will create the tplot variable.
-                    # But if we try to plot these variables we may get an error.
-                    continue
+        try:
+            combined = [_combine_file_data(pieces)]
+        except ValueError:
+            # Array shapes differ between files, let xarray sort it out piece by piece
+            combined = pieces
+
+        for datetimes, values in combined:
+            if not store_data(var_name, {"x": datetimes, "y": values}):
+                continue
+            if to_merge:
+                cur_data_quant = pyspedas.tplot_tools.data_quants[var_name]
+                pyspedas.tplot_tools.data_quants[var_name] = merge_data_quant(prev_data_quant, cur_data_quant)
+            prev_data_quant = pyspedas.tplot_tools.data_quants[var_name]
+            to_merge = True
 
-                # Store the data, and merge variables if that was requested.
-                var_name = prefix + var + suffix
-                to_merge = False
-                # Merge if the variable has been saved already in the current group of files.
-                # Also merge when the variable is already in tplot and merge is True.
-                if (var_name in stored_variables) or (
-                    var_name in pyspedas.tplot_tools.data_quants.keys() and (merge == True)
-                ):
-                    prev_data_quant = pyspedas.tplot_tools.data_quants[var_name]
-                    to_merge = True
-
-                tplot_data = {"x": unix_times, "y": this_masked_var}
-                store_data(var_name, tplot_data)
-                if var_name not in stored_variables:
-                    stored_variables.append(var_name)
-
-                if to_merge == True:
-                    cur_data_quant = pyspedas.tplot_tools.data_quants[var_name]
-                    plot_options = copy.deepcopy(pyspedas.tplot_tools.data_quants[var_name].attrs)
-                    merged_data = [prev_data_quant, cur_data_quant]
-                    pyspedas.tplot_tools.data_quants[var_name] = xr.concat(
-                        merged_data, dim="time"
-                    ).sortby("time")
-                    pyspedas.tplot_tools.data_quants[var_name].attrs = plot_options
+        if var_name in pyspedas.tplot_tools.data_quants and var_name not in stored_variables:
+            stored_variables.append(var_name)
 
     # If we are interested in seeing a quick plot of the variables, do it
     if plot:
@@ -1,12 +1,14 @@
 import os
-import datetime
+import mmap
 import logging
 import numpy as np
-import xarray as xr
+import pandas as pd
 import pyspedas
 from pyspedas.tplot_tools import store_data
-import copy
-import time
+from pyspedas.tplot_tools.importers.merge_data_quant import merge_data_quant
+
+# Number of rows parsed at a time by the pandas C reader
+STS_CHUNK_ROWS = 1000000
 
 
 def read_column_names(sts_file):
@@ -75,6 +77,98 @@ def read_column_names(sts_file):
                         vec_names.append(None)
 
 
+def find_data_offset(sts_file):
+    """
+    Find the byte offset of the first data record in an STS file.
+
+    In STS files, the data starts on the line after the last 'END_OBJECT' in the file.
+    The search is done on a memory map of the file, so the data section is never read
+    into Python strings.
+
+    Parameters
+    ----------
+    sts_file : str
+        The full path to the STS file.
+
+    Returns
+    -------
+    int
+        Byte offset of the start of the data section.
+    """
+    with open(sts_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end_object = mm.rfind(b"END_OBJECT")
+            if end_object < 0:
+                return 0
+            end_line = mm.find(b"\n", end_object)
+            if end_line < 0:
+                return len(mm)
+            return end_line + 1
+
+
+def read_sts_data(sts_file, ncols):
+    """
+    Read the numeric data section of an STS file into a 2-D float64 array.
+
+    The header is located once with find_data_offset, then the whitespace separated
+    data block is parsed with the pandas C reader, STS_CHUNK_ROWS rows at a time.
+
+    Parameters
+    ----------
+    sts_file : str
+        The full path to the STS file.
+    ncols : int
+        The number of data columns, as described in the file header.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (nrows, ncols)
+    """
+    offset = find_data_offset(sts_file)
+    chunks = []
+    with open(sts_file, "rb") as f:
+        f.seek(offset)
+        try:
+            reader = pd.read_csv(
+                f,
+                sep=r"\s+",
+                header=None,
+                names=range(ncols),
+                usecols=range(ncols),
+                dtype=np.float64,
+                engine="c",
+                chunksize=STS_CHUNK_ROWS,
+            )
+            for chunk in reader:
+                chunks.append(chunk.to_numpy())
+        except pd.errors.EmptyDataError:
+            pass
+    if len(chunks) == 0:
+        return np.empty((0, ncols), dtype=np.float64)
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks)
+
+
+def sts_time_to_datetime64(year, doy, hour, minute, sec, msec):
+    """
+    Convert the STS year, day of year, hour, minute, second and millisecond columns
+    to an array of np.datetime64[ns] values, using vectorized arithmetic.
+    """
+    days = (np.asarray(year).astype(np.int64) - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+    days = days + (np.asarray(doy).astype(np.int64) - 1).astype("timedelta64[D]")
+    ns = (
+        np.asarray(hour).astype(np.int64) * 3600000000000
+        + np.asarray(minute).astype(np.int64) * 60000000000
+        + np.asarray(sec).astype(np.int64) * 1000000000
+        + np.asarray(msec).astype(np.int64) * 1000000
+    )
+    return days.astype("datetime64[ns]") + ns.astype("timedelta64[ns]")
+
+
 def sts_to_tplot(
     filenames=None,
     prefix="",
@@ -102,7 +196,8 @@ def sts_to_tplot(
         If False (default), then data from 'filenames' will overwrite existing tplot variables.
         Data in 'filenames' will always be merged/combined by themselves.
     notplot : bool, optional
-        If True, the STS data will be returned as a dictionary without creating tplot variables.
+        If True, the STS data will be returned as a dictionary of numpy arrays (one per column,
+        plus 'time_unix' in seconds since 1970) without creating tplot variables.
         If False, tplot variables will be created.
         Default is False.
 
@@ -128,7 +223,6 @@ def sts_to_tplot(
     """
 
     # Create a dictionary and list in which we'll store STS variable data and variable names, respectively
-    start_t = time.time()
     sts_dict = {}  # this dictionary will store the STS headers and data
     stored_variables = []
 
@@ -152,51 +246,27 @@ def sts_to_tplot(
         headers = [
             item for sublist in column_names for item in sublist
         ]  # a list of headers for the data
-        with open(s_file, "r") as f:
-            lines = f.readlines()
-        # In STS files, the beginning of the data starts after the last time 'END_OBJECT' is found
-        end_objects = [l for l, line in enumerate(lines) if "END_OBJECT" in line]
-        end_headers = end_objects[-1]
-        data = lines[end_headers + 1 :]
-        data = [
-            d.strip().split() for d in data
-        ]  # Remove extra spaces, then split on whitespaces
+        data = read_sts_data(s_file, len(headers))
         # Create the STS dictionary
         for h, head in enumerate(headers):
-            data_column = [d[h] for d in data]
-            if head not in sts_dict:
-                # Store the data column in the dictionary
-                sts_dict[head] = data_column
-            else:
-                # If the header already exists, append the data column to the existing data
-                sts_dict[head].extend(data_column)
+            # Store the data column in the dictionary, to be concatenated once all files are read
+            sts_dict.setdefault(head, []).append(data[:, h])
 
     # At this point we read all the files and have the data in the sts_dict dictionary
+    for head in sts_dict.keys():
+        columns = sts_dict[head]
+        sts_dict[head] = columns[0] if len(columns) == 1 else np.concatenate(columns)
 
-    # We need to create datetime objects from the sts_dict's year, doy, hour, min, sec, and msec data
-    year = sts_dict["TIME_YEAR"]
-    doy = sts_dict["TIME_DOY"]
-    hour = sts_dict["TIME_HOUR"]
-    min = sts_dict["TIME_MIN"]
-    sec = sts_dict["TIME_SEC"]
-    msec = sts_dict["TIME_MSEC"]
-
-    dtimes = [
-        datetime.datetime(
-            int(yr),
-            1,
-            1,
-            int(hr),
-            int(mn),
-            int(s),
-            int(ms) * 1000,
-            tzinfo=datetime.timezone.utc,
-        )
-        + datetime.timedelta(int(dy) - 1)
-        for yr, dy, hr, mn, s, ms in zip(year, doy, hour, min, sec, msec)
-    ]
-
-    sts_dict["time_unix"] = [dt.timestamp() for dt in dtimes]
+    # We need to create times from the sts_dict's year, doy, hour, min, sec, and msec data
+    datetimes = sts_time_to_datetime64(
+        sts_dict["TIME_YEAR"],
+        sts_dict["TIME_DOY"],
+        sts_dict["TIME_HOUR"],
+        sts_dict["TIME_MIN"],
+        sts_dict["TIME_SEC"],
+        sts_dict["TIME_MSEC"],
+    )
+    sts_dict["time_unix"] = datetimes.astype(np.int64) / 1e9
     # These keys are no longer necessary, remove them
     remove_time_keys = [
         "TIME_YEAR",
@@ -227,19 +297,16 @@ def sts_to_tplot(
         if vn is None:
             # Scalar variables
             var_name = prefix + cn[0] + suffix
-            var_data = [
-                float(c) for c in sts_dict[cn[0]]
-            ]  # dict contains strings, convert to floats
+            var_data = sts_dict[cn[0]]
         else:
             # Vector variables
             var_name = prefix + vn + suffix
             var_cn = [
                 c for c in cn if "RANGE" not in c and "range" not in c
             ]  # do not include RANGE columns
-            var_data = [
-                [float(sts_dict[c][i]) for c in var_cn]
-                for i in range(len(sts_dict[cn[0]]))
-            ]  # data has as many dimensions as len(var_cn)
+            var_data = np.column_stack(
+                [sts_dict[c] for c in var_cn]
+            )  # data has as many dimensions as len(var_cn)
 
         # Check if we need to merge with existing tplot variables
         if var_name in pyspedas.tplot_tools.data_quants.keys() and merge:
@@ -249,17 +316,13 @@ def sts_to_tplot(
         # Store the new data
         store_data(
             var_name,
-            data={"x": sts_dict["time_unix"], "y": var_data},
+            data={"x": datetimes, "y": var_data},
         )
         stored_variables.append(var_name)
 
         # If merging is needed, merge the new data with the existing data
         if to_merge is True:
             cur_data_quant = pyspedas.tplot_tools.data_quants[var_name]
-            plot_options = copy.deepcopy(pyspedas.tplot_tools.data_quants[var_name].attrs)
-            pyspedas.tplot_tools.data_quants[var_name] = xr.concat(
-                [prev_data_quant, cur_data_quant], dim="time"
-            ).sortby("time")
-            pyspedas.tplot_tools.data_quants[var_name].attrs = plot_options
+            pyspedas.tplot_tools.data_quants[var_name] = merge_data_quant(prev_data_quant, cur_data_quant)
 
     return stored_variables
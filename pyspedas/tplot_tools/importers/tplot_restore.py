@@ -9,17 +9,22 @@ import numpy as np
 import pyspedas
 from pyspedas.tplot_tools import options, store_data
 from pyspedas.tplot_tools.tplot_options import tplot_options
+from pyspedas.tplot_tools.tplot_hdf5 import is_tplot_hdf5, restore_hdf5
 from scipy.io import readsav
 import logging
 
 
-def tplot_restore(filename):
+def tplot_restore(filename, names=None, lazy=False):
     """
     Restore tplot variables that have been saved to a file.
 
     If the filename has a suffix ".tplot", it is assumed to be in the IDL .sav format as written by the IDL tplot_save routine.
     In this case, it is read using the scipy.io.readsav() routine.
 
+    HDF5 files written by the PySPEDAS tplot_save routine (with format='hdf5') are read with h5py, without unpickling.
+    For these files, selected variables can be restored with the names keyword, and only those variables are read
+    from the file.
+
     For any other filename suffix, the file is assumed to be a Python pickle file, as written by the PySPEDAS tplot_save routine.
 
     Most of the metadata (units, coordinate systems, CDF attributes etc.) should be correctly represented in the
@@ -34,7 +39,16 @@ def tplot_restore(filename):
     Parameters
     -----------
         filename : str
-            The path to the ".tplot" file created by IDL tplot_save, or for any other suffix, the pickle file created by PySPEDAS tplot_save.
+            The path to the ".tplot" file created by IDL tplot_save, or for any other suffix, the HDF5 or pickle file created by PySPEDAS tplot_save.
+        names : str or list of str, optional
+            Names of the variables to restore from an HDF5 or pickle file (wildcards accepted).  The components of any
+            pseudovariables are restored with them.  If names is set, the global tplot options are not restored.
+            Default: None (restore all variables)
+        lazy : bool, optional
+            If True, variables restored from an HDF5 file are not read into memory; they are restored as chunked
+            (dask-backed) variables that read the data from the file as needed.  The file must not be changed
+            or removed while they are in use.  This requires the dask package.
+            Default: False
             
     Returns
     --------
@@ -46,6 +60,8 @@ def tplot_restore(filename):
         >>> # Restore the saved data from the tplot_save example
         >>> import pyspedas
         >>> pyspedas.tplot_restore('C:/temp/variable1.pyspedas')
+        >>> # Restore only the matching variables from an HDF5 file
+        >>> pyspedas.tplot_restore('C:/temp/variables.h5', names='Variable*')
 
     """
     
@@ -56,7 +72,9 @@ def tplot_restore(filename):
     
     #Check if the restored file was an IDL file
     
-    if filename.endswith('.tplot'):
+    if is_tplot_hdf5(filename):
+        restore_hdf5(filename, names=names, lazy=lazy)
+    elif filename.endswith('.tplot'):
         temp_tplot = readsav(filename)
         for i in range(len(temp_tplot['dq'])):
             if isinstance(temp_tplot['dq'][i][0], str):
@@ -238,13 +256,26 @@ def tplot_restore(filename):
         in_file = open(filename,"rb")
         temp = pickle.load(in_file)
         num_data_quants = temp[0]
+        saved = {}
         for i in range(0, num_data_quants):
             if isinstance(temp[i+1], dict):
                 # NRV variable
-                pyspedas.tplot_tools.data_quants[temp[i+1]['name']] = temp[i+1]
+                saved[temp[i+1]['name']] = temp[i+1]
             else:
-                pyspedas.tplot_tools.data_quants[temp[i+1].name] = temp[i+1]
-        pyspedas.tplot_tools.tplot_opt_glob = temp[num_data_quants+1]
+                saved[temp[i+1].name] = temp[i+1]
+        if names is not None:
+            matched = pyspedas.wildcard_expand(list(saved.keys()), names)
+            for name in list(matched):
+                if not isinstance(saved[name], dict):
+                    plot_options = saved[name].attrs['plot_options']
+                    for oplot_name in plot_options['overplots'] + plot_options.get('overplots_mpl', []):
+                        if oplot_name in saved and oplot_name not in matched:
+                            matched.append(oplot_name)
+            saved = {name: value for name, value in saved.items() if name in matched}
+        for name, value in saved.items():
+            pyspedas.tplot_tools.data_quants[name] = value
+        if names is None:
+            pyspedas.tplot_tools.tplot_opt_glob = temp[num_data_quants+1]
         in_file.close()
     
     return
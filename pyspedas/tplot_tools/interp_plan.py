@@ -0,0 +1,238 @@
+"""
+Cached linear interpolation plans.
+
+Interpolating from one time grid to another takes a search for the source interval containing each
+target time, and the position of the target time in that interval.  An InterpPlan holds these
+indices and weights for a (source times, target times) pair, and can then interpolate any number of
+arrays on the source grid (with any number of columns) in a single vectorized gather.  Plans are cached
+by a fingerprint of the two time grids, so interpolating many variables onto the same times (e.g. with
+tinterpol) only does the search once.
+
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import xarray as xr
+
+from pyspedas.tplot_tools.chunked import is_chunked
+
+# Maximum number of plans kept in the cache
+_MAX_PLANS = 16
+_plans = OrderedDict()
+# The cache is shared by the threads of parallel_map (e.g. tinterpol with max_workers)
+_plans_lock = threading.Lock()
+
+
+def _as_times(times):
+    # Times as a 1-d array that can be compared and subtracted exactly: int64 nanoseconds for
+    # datetimes, float64 otherwise
+    times = np.asarray(times)
+    if times.dtype.kind == 'M':
+        return times.astype('datetime64[ns]').view(np.int64).ravel()
+    return times.astype(np.float64, copy=False).ravel()
+
+
+def _fingerprint(times):
+    times = np.ascontiguousarray(times)
+    return times.dtype.str, times.shape, hashlib.blake2b(memoryview(times).cast('B'), digest_size=16).digest()
+
+
+class InterpPlan:
+    """
+    Linear interpolation from one set of times to another.
+
+    Create plans with interp_plan, which reuses cached plans for the same time grids.
+
+    Attributes
+    ----------
+        lower : ndarray of int
+            For each target time, the index of the (sorted) source time at the start of its interval
+        weights : ndarray of float
+            Position of each target time in its source interval (0 at the start, 1 at the end; outside
+            the range of the source times, the weights extrapolate the first or last interval)
+        outside : ndarray of bool
+            True for target times before the first or after the last source time (or NaN)
+        order : ndarray of int or None
+            The order that sorts the source times, or None if they are already sorted
+    """
+
+    def __init__(self, source_times, target_times):
+        source = _as_times(source_times)
+        target = _as_times(target_times)
+        if len(source) < 2:
+            raise ValueError('InterpPlan: at least two source times are needed')
+        self.order = None
+        if np.any(source[1:] < source[:-1]):
+            self.order = np.argsort(source, kind='stable')
+            source = source[self.order]
+        self.n_source = len(source)
+
+        # The interval containing each target time (target times equal to a source time are at
+        # the start of the interval, so that they get that value exactly)
+        lower = np.searchsorted(source, target, side='right') - 1
+        np.clip(lower, 0, len(source) - 2, out=lower)
+        start = source[lower]
+        width = source[lower + 1] - start
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = (target - start) / width
+        # repeated source times: use the later value
+        weights[width == 0] = 1.0
+        self.lower = lower
+        self.weights = weights
+        self.at_lower = weights == 0.0
+        self.at_upper = weights == 1.0
+        # (this includes any NaN target times)
+        self.outside = ~((target >= source[0]) & (target <= source[-1]))
+
+    def apply(self, values, extrapolate=False, fill_value=np.nan, rows=None):
+        """
+        Interpolate values on the source times to the target times.
+
+        Parameters
+        ----------
+            values : array_like
+                Values at the source times, with time as the first dimension.  All the other
+                dimensions (e.g. vector components or energy bins) are interpolated together.
+            extrapolate : bool, optional
+                If True, target times outside the range of the source times are linearly
+                extrapolated from the first or last two values; otherwise they are set to fill_value.
+                Default: False
+            fill_value : float, optional
+                Value for target times outside the range of the source times
+                Default: NaN
+            rows : slice, optional
+                Only interpolate to these target times (e.g. a block of them)
+                Default: all the target times
+
+        Returns
+        -------
+            ndarray
+                The interpolated values (as floats), with shape (number of target times,) + values.shape[1:]
+        """
+        values = np.asarray(values)
+        if values.shape[0] != self.n_source:
+            raise ValueError('InterpPlan: expected %d values, got %d' % (self.n_source, values.shape[0]))
+        if values.dtype.kind != 'c' and values.dtype != np.float64:
+            values = values.astype(np.float64)
+        if self.order is not None:
+            values = values[self.order]
+        select = slice(None) if rows is None else rows
+        lower = self.lower[select]
+        shape = (-1,) + (1,) * (values.ndim - 1)
+        lower_values = np.take(values, lower, axis=0)
+        upper_values = np.take(values, lower + 1, axis=0)
+        out = upper_values - lower_values
+        out *= self.weights[select].reshape(shape)
+        out += lower_values
+        # exact values at the source times (even if the other end of the interval is NaN)
+        for mask, exact in ((self.at_lower[select], lower_values), (self.at_upper[select], upper_values)):
+            if mask.any():
+                np.copyto(out, exact, where=mask.reshape(shape))
+        outside = self.outside[select]
+        if not extrapolate and outside.any():
+            np.copyto(out, fill_value, where=outside.reshape(shape))
+        return out
+
+
+def interp_plan(source_times, target_times):
+    """
+    Return a linear interpolation plan from source_times to target_times, using a cached plan if
+    one has already been made for the same times.
+
+    Parameters
+    ----------
+        source_times : array_like
+            Times of the data to be interpolated (Unix times, or np.datetime64)
+        target_times : array_like
+            Times to interpolate to, in the same form as source_times
+
+    Returns
+    -------
+        InterpPlan
+            The plan, which can be applied to any number of arrays on the source times
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from pyspedas.tplot_tools.interp_plan import interp_plan
+        >>> plan = interp_plan([0.0, 10.0, 20.0], [5.0, 15.0])
+        >>> plan.apply(np.array([[0.0, 1.0], [10.0, 2.0], [20.0, 3.0]]))
+        array([[ 5. ,  1.5],
+               [15. ,  2.5]])
+    """
+    source = _as_times(source_times)
+    target = _as_times(target_times)
+    key = (_fingerprint(source), _fingerprint(target))
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+    # the plan is built without holding the lock, so other threads can use the cache meanwhile
+    plan = InterpPlan(source, target)
+    with _plans_lock:
+        # another thread may have built the same plan in the meantime
+        plan = _plans.setdefault(key, plan)
+        _plans.move_to_end(key)
+        while len(_plans) > _MAX_PLANS:
+            _plans.popitem(last=False)
+    return plan
+
+
+def clear_interp_plans():
+    """
+    Remove all the cached interpolation plans.
+    """
+    with _plans_lock:
+        _plans.clear()
+
+
+def interp_data_quant(data_quant, target_times, extrapolate=False):
+    """
+    Linearly interpolate a tplot variable to new times with a cached plan.
+
+    The data values and any time-dependent coordinates (e.g. spec_bins) are interpolated; other
+    coordinates and the metadata are kept.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray
+            The tplot variable
+        target_times : array_like of np.datetime64
+            Times to interpolate to
+        extrapolate : bool, optional
+            If True, extrapolate beyond the first and last times of the variable; otherwise, use NaN.
+            Default: False
+
+    Returns
+    -------
+        xarray.DataArray or None
+            The interpolated variable, or None if it can't be interpolated with a plan (for example,
+            if it is chunked, has fewer than two times, or isn't numeric), in which case the caller can
+            use xarray's interp instead.
+    """
+    if data_quant.dims[0] != 'time' or data_quant.sizes['time'] < 2 or is_chunked(data_quant.data):
+        return None
+    for coord_name in data_quant.coords:
+        coord = data_quant.coords[coord_name]
+        if 'time' in coord.dims and coord_name != 'time':
+            if coord.dims[0] != 'time' or coord.dtype.kind not in 'iuf' or is_chunked(coord.data):
+                return None
+    if data_quant.dtype.kind not in 'iuf':
+        return None
+
+    target_times = np.asarray(target_times).astype('datetime64[ns]')
+    plan = interp_plan(data_quant.coords['time'].values, target_times)
+    coords = {'time': target_times}
+    for coord_name in data_quant.coords:
+        coord = data_quant.coords[coord_name]
+        if coord_name == 'time':
+            continue
+        if 'time' in coord.dims:
+            coords[coord_name] = (coord.dims, plan.apply(coord.values, extrapolate=extrapolate))
+        else:
+            coords[coord_name] = coord.variable
+    return xr.DataArray(plan.apply(data_quant.values, extrapolate=extrapolate), dims=data_quant.dims,
+                        coords=coords, name=data_quant.name, attrs=data_quant.attrs)
@@ -0,0 +1,320 @@
+import os
+import logging
+import tempfile
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pyspedas
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _is_memmapped(arr):
+    # True if arr is (a view of) a memory-mapped array
+    while isinstance(arr, np.ndarray):
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def _spillable_variables(data_quant):
+    # The xarray Variables holding the data values and any non-index coordinates (e.g. spec_bins).
+    # The time index is kept in memory, since pandas needs it to look up times.
+    variables = [data_quant.variable]
+    for coord_name in data_quant.coords:
+        if coord_name not in data_quant.xindexes:
+            variables.append(data_quant.coords[coord_name].variable)
+    return variables
+
+
+def _array_nbytes(arr):
+    if isinstance(arr, np.ndarray):
+        return arr.nbytes
+    return 0
+
+
+def variable_nbytes(data_quant):
+    """
+    Return the number of bytes used by the arrays of a tplot variable, and how many of them are held in memory.
+
+    Parameters
+    ----------
+        data_quant : xarray.DataArray or dict
+            The tplot variable
+
+    Returns
+    -------
+        tuple
+            (total bytes, bytes held in memory rather than memory-mapped from disk)
+    """
+    if isinstance(data_quant, dict):
+        # non-record varying variables are stored as dicts
+        return 0, 0
+    total = 0
+    resident = 0
+    arrays = [v.data for v in _spillable_variables(data_quant)]
+    arrays += [data_quant.coords[c].values for c in data_quant.xindexes]
+    plot_options = data_quant.attrs.get('plot_options')
+    if plot_options is not None:
+        arrays.append(plot_options.get('error'))
+    for arr in arrays:
+        nbytes = _array_nbytes(arr)
+        total += nbytes
+        if not _is_memmapped(arr):
+            resident += nbytes
+    return total, resident
+
+
+class DataQuants(OrderedDict):
+    """
+    The dictionary holding all tplot variables (pyspedas.tplot_tools.data_quants).
+
+    This behaves like an OrderedDict.  If a memory budget has been set with set_memory_budget,
+    it also keeps track of when each variable was last accessed, and when the variables held in
+    memory exceed the budget, the least recently used ones are written to disk and memory-mapped.
+    Spilled variables can still be used as usual; they are read back into memory when accessed
+    with data_quants[name].
+
+    The keys_version attribute is incremented whenever a variable is added or removed (or the
+    variables are reordered), so that indexes of the variable names can be cached until the names change.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.budget = None
+        self.spill_dir = None
+        self.keys_version = 0
+        self._last_access = {}
+        self._access_count = 0
+        super().__init__(*args, **kwargs)
+
+    def __getitem__(self, key):
+        data_quant = OrderedDict.__getitem__(self, key)
+        if self.budget is not None and not isinstance(data_quant, dict):
+            self._touch(key)
+            if self._is_spilled(data_quant):
+                self._unspill(data_quant)
+                self.enforce_budget(keep=key)
+        return data_quant
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.keys_version += 1
+        OrderedDict.__setitem__(self, key, value)
+        if self.budget is not None:
+            self._touch(key)
+            self.enforce_budget(keep=key)
+
+    def __delitem__(self, key):
+        OrderedDict.__delitem__(self, key)
+        self.keys_version += 1
+        self._last_access.pop(key, None)
+
+    # The OrderedDict implementations of these don't go through __delitem__
+
+    def pop(self, key, *args):
+        self.keys_version += 1
+        self._last_access.pop(key, None)
+        return OrderedDict.pop(self, key, *args)
+
+    def popitem(self, last=True):
+        item = OrderedDict.popitem(self, last)
+        self.keys_version += 1
+        self._last_access.pop(item[0], None)
+        return item
+
+    def clear(self):
+        OrderedDict.clear(self)
+        self.keys_version += 1
+        self._last_access.clear()
+
+    def move_to_end(self, key, last=True):
+        OrderedDict.move_to_end(self, key, last)
+        self.keys_version += 1
+
+    def rename(self, old, new):
+        """
+        Change the name of a variable, keeping its position in the dictionary and its last access time.
+
+        A variable already named new is replaced.  Nothing is spilled or read back into memory,
+        and the data isn't copied.
+
+        Parameters
+        ----------
+            old : str
+                Current name of the variable
+            new : str
+                New name of the variable
+        """
+        if old == new:
+            return
+        if new in self:
+            OrderedDict.__delitem__(self, new)
+            self._last_access.pop(new, None)
+        keys = list(OrderedDict.keys(self))
+        following = keys[keys.index(old) + 1:]
+        value = OrderedDict.__getitem__(self, old)
+        OrderedDict.__delitem__(self, old)
+        OrderedDict.__setitem__(self, new, value)
+        # the new key was added at the end; move the variables after it back behind it
+        for key in following:
+            OrderedDict.move_to_end(self, key)
+        if old in self._last_access:
+            self._last_access[new] = self._last_access.pop(old)
+        self.keys_version += 1
+
+    def _touch(self, key):
+        self._access_count += 1
+        self._last_access[key] = self._access_count
+
+    @staticmethod
+    def _is_spilled(data_quant):
+        return _is_memmapped(data_quant.variable.data)
+
+    def _get_spill_dir(self):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='pyspedas_spill_')
+        elif not os.path.exists(self.spill_dir):
+            os.makedirs(self.spill_dir)
+        return self.spill_dir
+
+    def _spill(self, data_quant):
+        # Write the arrays to disk and replace them with copy-on-write memory maps, so the
+        # variable can still be read (and modified, in memory) without being reloaded.
+        spill_dir = self._get_spill_dir()
+        for variable in _spillable_variables(data_quant):
+            arr = variable.data
+            if not isinstance(arr, np.ndarray) or arr.dtype.hasobject or arr.nbytes == 0 or _is_memmapped(arr):
+                continue
+            path = os.path.join(spill_dir, uuid.uuid4().hex + '.npy')
+            np.save(path, arr)
+            variable.data = np.load(path, mmap_mode='c')
+            try:
+                # The mapping keeps the data available after the file is unlinked (on POSIX systems)
+                os.remove(path)
+            except OSError:
+                weakref.finalize(data_quant, _remove_quietly, path)
+
+    @staticmethod
+    def _unspill(data_quant):
+        for variable in _spillable_variables(data_quant):
+            if _is_memmapped(variable.data):
+                variable.data = np.array(variable.data)
+
+    def enforce_budget(self, keep=None):
+        """
+        Spill the least recently used variables to disk until the variables held in memory fit in the budget.
+
+        Parameters
+        ----------
+            keep : str, optional
+                Name of a variable that should stay in memory (e.g. the one just accessed)
+        """
+        if self.budget is None:
+            return
+        resident = {}
+        for name, data_quant in OrderedDict.items(self):
+            nbytes = variable_nbytes(data_quant)[1]
+            if nbytes > 0:
+                resident[name] = nbytes
+        total = sum(resident.values())
+        if total <= self.budget:
+            return
+        for name in sorted(resident, key=lambda n: self._last_access.get(n, 0)):
+            if total <= self.budget:
+                break
+            if name == keep:
+                continue
+            data_quant = OrderedDict.__getitem__(self, name)
+            self._spill(data_quant)
+            after = variable_nbytes(data_quant)[1]
+            logging.debug('Spilled tplot variable %s to disk (%d bytes)', name, resident[name] - after)
+            total -= resident[name] - after
+
+
+def set_memory_budget(budget=None, spill_dir=None):
+    """
+    Set the maximum number of bytes of tplot variable data to keep in memory.
+
+    When the data held in memory exceeds the budget, the least recently used variables
+    are written to disk and memory-mapped.  They can still be used as usual, and are read back
+    into memory the next time they are accessed through pyspedas.tplot_tools.data_quants[name]
+    (for example, by get_data or tplot).
+
+    Parameters
+    ----------
+        budget : int, optional
+            Memory budget in bytes.  None (the default) removes the budget, and no further
+            variables are spilled.
+        spill_dir : str, optional
+            Directory for the spilled data.  Defaults to a new temporary directory.
+
+    Returns
+    -------
+        None
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import set_memory_budget
+        >>> set_memory_budget(4*1024**3)   # keep at most 4 GB of tplot data in memory
+    """
+    data_quants = pyspedas.tplot_tools.data_quants
+    if not isinstance(data_quants, DataQuants):
+        logging.error('set_memory_budget: pyspedas.tplot_tools.data_quants does not support a memory budget')
+        return
+    data_quants.budget = budget
+    if spill_dir is not None:
+        data_quants.spill_dir = spill_dir
+    data_quants.enforce_budget()
+
+
+def tplot_memory_usage(names=None):
+    """
+    Report the memory used by tplot variables.
+
+    Parameters
+    ----------
+        names : str or list[str], optional
+            Names of the tplot variables to report (wildcards accepted).  Defaults to all variables.
+
+    Returns
+    -------
+        dict
+            'variables': dict of the number of bytes used by each variable,
+            'total': total bytes for the variables,
+            'resident': bytes held in memory (excluding data spilled to disk),
+            'spilled': names of the variables that have been spilled to disk,
+            'budget': the current memory budget in bytes, or None
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import tplot_memory_usage
+        >>> pyspedas.store_data("Variable1", data={'x':[1,2,3], 'y':[1,2,3]})
+        >>> tplot_memory_usage()['total']
+    """
+    data_quants = pyspedas.tplot_tools.data_quants
+    if names is None:
+        names = list(data_quants.keys())
+    else:
+        names = pyspedas.tnames(names)
+
+    usage = {'variables': {}, 'total': 0, 'resident': 0, 'spilled': [], 'budget': getattr(data_quants, 'budget', None)}
+    for name in names:
+        # use OrderedDict.get so that reporting doesn't count as an access
+        data_quant = OrderedDict.get(data_quants, name)
+        total, resident = variable_nbytes(data_quant)
+        usage['variables'][name] = total
+        usage['total'] += total
+        usage['resident'] += resident
+        if resident < total:
+            usage['spilled'].append(name)
+    return usage
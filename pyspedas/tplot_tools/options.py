@@ -1,7 +1,6 @@
 import logging
 import pyspedas
 import numpy as np
-from pyspedas.tplot_tools import get_y_range
 from pyspedas.tplot_tools import tplot_wildcard_expand
 
 
@@ -272,11 +271,11 @@ def options(name, option=None, value=None, opt_dict=None, quiet=False):
                         continue
                     else:
                         pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['extras']['spec'] = value
-                        pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = get_y_range(pyspedas.tplot_tools.data_quants[i])
+                        pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = None
 
                 else:
                     pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['extras']['spec'] = value
-                    pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = get_y_range(pyspedas.tplot_tools.data_quants[i])
+                    pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = None
 
                 # Set the default dimension to plot by.  All others will be summed over.
                 if 'spec_dim_to_plot' not in pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['extras']:
@@ -586,7 +585,7 @@ def options(name, option=None, value=None, opt_dict=None, quiet=False):
 
                 # If we're plotting against different coordinates, we need to change what we consider the "spec_bins"
                 pyspedas.tplot_tools.data_quants[i].coords['spec_bins'] = pyspedas.tplot_tools.data_quants[i].coords[coord_to_plot]
-                pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = get_y_range(pyspedas.tplot_tools.data_quants[i])
+                pyspedas.tplot_tools.data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = None
 
             elif option == 'spec_slices_to_use':
                 if not isinstance(value, dict):
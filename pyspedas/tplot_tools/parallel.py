@@ -0,0 +1,85 @@
+"""
+Processing several tplot variables in parallel.
+
+Routines that accept several variable names (e.g. tsmooth, clean_spikes, subtract_average,
+deriv_data, tinterpol, time_clip, deflag and tdeflag) compute the new values for all the variables with parallel_map, and then
+create the output variables one at a time, in the order of the input names, so the output names
+and the order they are created in are the same as when running serially.
+
+By default everything runs serially.  set_parallel changes the default for all these routines,
+and most of them also take a max_workers argument.  Threads suit the numpy-heavy computations
+(numpy releases the GIL for most array operations); processes can help when the work is
+dominated by Python code, at the cost of copying the data to and from the worker processes.
+
+"""
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+_defaults = {'max_workers': 1, 'processes': False}
+
+
+def set_parallel(max_workers=1, processes=False):
+    """
+    Set the default number of workers used by routines that process several tplot variables.
+
+    Parameters
+    ----------
+        max_workers : int, optional
+            Number of variables processed at once.  1 (the default) processes them one at a time.
+        processes : bool, optional
+            If True, use worker processes instead of threads.
+            Default: False
+
+    Returns
+    -------
+        None
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> from pyspedas.tplot_tools import set_parallel
+        >>> set_parallel(8)
+        >>> pyspedas.tsmooth('mms?_fgm_b_gse_srvy_l2')
+    """
+    _defaults['max_workers'] = max_workers
+    _defaults['processes'] = processes
+
+
+def parallel_map(func, items, max_workers=None, processes=None):
+    """
+    Apply a function to each of a list of items, in parallel, returning the results in the same order.
+
+    Parameters
+    ----------
+        func : callable
+            Function of one argument.  With processes, it must be picklable (e.g. a module-level
+            function, or a functools.partial of one), and shouldn't use tplot variables, which
+            aren't shared with the worker processes.
+        items : list
+            The arguments (with processes, these must be picklable as well)
+        max_workers : int, optional
+            Maximum number of items processed at once.  Default: as set by set_parallel (1 unless changed)
+        processes : bool, optional
+            If True, use worker processes instead of threads.  Default: as set by set_parallel (False unless changed)
+
+    Returns
+    -------
+        list
+            The results, in the order of items.  Any exception raised by func is raised again here.
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from pyspedas.tplot_tools import parallel_map
+        >>> parallel_map(np.nanmean, [np.arange(5.0), np.arange(10.0)], max_workers=2)
+        [2.0, 4.5]
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = _defaults['max_workers']
+    if processes is None:
+        processes = _defaults['processes']
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
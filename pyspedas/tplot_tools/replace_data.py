@@ -1,6 +1,5 @@
 import pyspedas
 import numpy as np
-from pyspedas.tplot_tools import get_y_range
 import logging
 
 
@@ -50,8 +49,6 @@ def replace_data(tplot_name, new_data):
 
     pyspedas.tplot_tools.data_quants[tplot_name].values = new_data_np
 
-    pyspedas.tplot_tools.data_quants[tplot_name].attrs["plot_options"]["yaxis_opt"]["y_range"] = (
-        get_y_range(pyspedas.tplot_tools.data_quants[tplot_name])
-    )
+    pyspedas.tplot_tools.data_quants[tplot_name].attrs["plot_options"]["yaxis_opt"]["y_range"] = None
 
     return
@@ -1,5 +1,4 @@
 import pyspedas
-from pyspedas.tplot_tools import get_y_range
 from copy import deepcopy
 import logging
 
@@ -76,8 +75,6 @@ def replace_metadata(tplot_name, new_metadata):
 
     
     pyspedas.tplot_tools.data_quants[tplot_name].attrs = md_copy
-    pyspedas.tplot_tools.data_quants[tplot_name].attrs["plot_options"]["yaxis_opt"]["y_range"] = (
-        get_y_range(pyspedas.tplot_tools.data_quants[tplot_name])
-    )
+    pyspedas.tplot_tools.data_quants[tplot_name].attrs["plot_options"]["yaxis_opt"]["y_range"] = None
 
     return
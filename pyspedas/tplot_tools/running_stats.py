@@ -0,0 +1,287 @@
+"""
+Statistics of data values in a moving window.
+
+The window for each time sample is the width samples from width//2 samples before it, so that it is
+centred on the sample (for an even width, it has one more sample before the sample than after it),
+and is cut short at the start and end of the data.  All the data columns are processed together:
+
+    mean, sum, count, std   running sums (cumulative sums for wide windows), O(N)
+    min, max                scipy.ndimage van Herk/Gil-Werman filters, O(N)
+    median                  scipy.ndimage rank filters, O(N log W), with the NaNs (and the ends)
+                            filled so that the median is at a known rank of each window; the
+                            columns are laid end to end, so each rank needs one filter pass
+
+This is used by subtract_average and subtract_median (with a width), and by smooth and tsmooth
+(and so clean_spikes), which use window_sums and window_medians for the full windows only;
+running_filter (a weighted moving sum) is used by time_domain_filter.
+
+"""
+import numpy as np
+from scipy import ndimage, signal
+
+# Windows up to this many points are summed directly, in the same order as a simple loop;
+# wider windows use running sums, so the cost doesn't grow with the width.
+_MAX_DIRECT_WIDTH = 32
+
+
+def window_sums(values, npts, nwin):
+    """
+    Sums of npts consecutive values (along the first axis), for nwin windows.
+
+    NaNs and infinities propagate the same way as in a direct sum.
+
+    Parameters
+    ----------
+        values : ndarray
+            Data values, with at least nwin + npts - 1 samples along the first axis
+        npts : int
+            Number of points in each window
+        nwin : int
+            Number of windows
+
+    Returns
+    -------
+        ndarray
+            The sums, with nwin samples along the first axis
+    """
+    if npts <= _MAX_DIRECT_WIDTH:
+        tsum = np.zeros((nwin,) + values.shape[1:])
+        for j in range(npts):
+            tsum += values[j:j + nwin]
+        return tsum
+
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+    # the mean is removed before taking the running sums, to limit their rounding errors
+    shift = clean.mean(axis=0)
+
+    def running(x):
+        total = np.zeros((len(x) + 1,) + x.shape[1:])
+        np.cumsum(x, axis=0, out=total[1:])
+        return total[npts:npts + nwin] - total[:nwin]
+
+    tsum = running(np.where(finite, clean - shift, 0.0)) + shift * running(finite.astype(np.float64))
+    nans = running(np.isnan(values).astype(np.float64)) > 0
+    posinf = running((values == np.inf).astype(np.float64)) > 0
+    neginf = running((values == -np.inf).astype(np.float64)) > 0
+    tsum[posinf] = np.inf
+    tsum[neginf] = -np.inf
+    tsum[nans | (posinf & neginf)] = np.nan
+    return tsum
+
+
+def _padded(values, npts, fill=0):
+    # values padded along the first axis so that every sample has a full window
+    before = npts // 2
+    pad = [(before, npts - 1 - before)] + [(0, 0)] * (values.ndim - 1)
+    return np.pad(values, pad, constant_values=fill)
+
+
+def _running_counts(mask, npts):
+    # Number of True values in the (shortened at the ends) window of each sample
+    total = np.zeros((len(mask) + npts,) + mask.shape[1:], dtype=np.int64)
+    np.cumsum(_padded(mask, npts, fill=False), axis=0, out=total[1:])
+    return total[npts:] - total[:len(mask)]
+
+
+def _rank_filters(columns, npts, nwin, ranks):
+    # The values of each rank in the nwin full windows of npts points in each column of a 2-d array.
+    # The columns are laid end to end and filtered in a single 1-d pass (a 2-d filter with a window
+    # along one axis is several times slower); only the full windows within each column are used,
+    # so the windows that span two columns don't matter.
+    ntimes, ncols = columns.shape
+    flat = np.ascontiguousarray(columns.T).reshape(-1)
+    before = npts // 2
+    return {rank: ndimage.rank_filter(flat, rank, size=npts).reshape(ncols, ntimes)[:, before:before + nwin].T
+            for rank in ranks}
+
+
+def window_medians(values, npts, nwin, skip_nans):
+    """
+    Medians of npts consecutive values (along the first axis), for nwin windows.
+
+    All the columns are processed together, with one rank filter pass (over all of them) for each
+    rank needed.
+
+    Parameters
+    ----------
+        values : ndarray
+            Data values, with nwin + npts - 1 samples along the first axis
+        npts : int
+            Number of points in each window
+        nwin : int
+            Number of windows
+        skip_nans : bool
+            If True, the medians are of the values other than NaNs (NaN if a window only has NaNs);
+            otherwise, the median of a window with a NaN is NaN.
+
+    Returns
+    -------
+        ndarray
+            The medians, with nwin samples along the first axis
+    """
+    columns = values.reshape(len(values), -1)
+    nans = np.isnan(columns)
+    before = npts // 2
+    if not nans.any() or not skip_nans:
+        ranks = _rank_filters(np.where(nans, 0.0, columns), npts, nwin, {(npts - 1) // 2, npts // 2})
+        lower, upper = ranks[(npts - 1) // 2], ranks[npts // 2]
+        medians = lower if npts % 2 else (lower + upper) / 2
+        if nans.any():
+            medians[_running_counts(nans, npts)[before:before + nwin] > 0] = np.nan
+        return medians.reshape((nwin,) + values.shape[1:])
+
+    # The NaNs in each column are replaced by -inf and +inf in turn, so that the numbers of each in
+    # any window differ by at most one; the median of the other values in a window is then at a rank
+    # (or between two ranks) of the whole window that only depends on the difference, and rank
+    # filters can be used.
+    signs = np.where(nans, np.where(np.cumsum(nans, axis=0) % 2, -1, 1), 0)
+    filled = np.where(nans, np.where(signs > 0, np.inf, -np.inf), columns)
+    total = np.zeros((len(columns) + 1, columns.shape[1]), dtype=np.int64)
+    np.cumsum(signs, axis=0, out=total[1:])
+    difference = total[npts:npts + nwin] - total[:nwin]
+    lower_rank = np.clip((npts - difference - 1) // 2, 0, npts - 1)
+    upper_rank = np.clip((npts - difference) // 2, 0, npts - 1)
+    ranks = _rank_filters(filled, npts, nwin, set(np.unique(lower_rank)) | set(np.unique(upper_rank)))
+    lower = np.empty(lower_rank.shape)
+    upper = np.empty(upper_rank.shape)
+    for rank, ranked in ranks.items():
+        np.copyto(lower, ranked, where=lower_rank == rank)
+        np.copyto(upper, ranked, where=upper_rank == rank)
+    with np.errstate(invalid='ignore', over='ignore'):
+        medians = np.where(lower_rank == upper_rank, lower, (lower + upper) / 2)
+    # windows with only NaNs
+    medians[_running_counts(nans, npts)[before:before + nwin] == npts] = np.nan
+    return medians.reshape((nwin,) + values.shape[1:])
+
+
+def running_statistic(data, width, statistic='mean', skip_nans=True, ddof=0):
+    """
+    Compute a statistic of the data values in a moving window centred on each time sample.
+
+    Parameters
+    ----------
+        data : array_like
+            Data values, with time as the first dimension.  All the other dimensions (e.g. vector
+            components or energy bins) are processed together.
+        width : int
+            Number of samples in the window.  The windows at the start and end of the data are
+            shortened to the samples that exist.
+        statistic : str, optional
+            'mean', 'median', 'min', 'max', 'std', 'sum' or 'count'
+            Default: 'mean'
+        skip_nans : bool, optional
+            If True, NaN values are ignored, as with np.nanmean; otherwise, a NaN in a window makes
+            its statistic NaN.
+            Default: True
+        ddof : int, optional
+            Delta degrees of freedom for the standard deviation (as for np.std)
+            Default: 0
+
+    Returns
+    -------
+        ndarray
+            The statistic for each time sample, with the same shape as data.  The statistics of a
+            window with no values (other than NaNs) are NaN, and 'count' is the number of values
+            (other than NaNs, if skip_nans is set) in each window.
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from pyspedas.tplot_tools.running_stats import running_statistic
+        >>> running_statistic(np.array([1.0, 2.0, 3.0, np.nan, 5.0]), 3)
+        array([1.5, 2. , 2.5, 4. , 5. ])
+        >>> running_statistic(np.array([1.0, 9.0, 3.0, 4.0, 5.0]), 3, statistic='median')
+        array([5. , 3. , 4. , 4. , 4.5])
+    """
+    data = np.asarray(data)
+    npts = int(width)
+    if npts < 1:
+        raise ValueError('running_statistic: width must be at least 1')
+    if statistic not in ('mean', 'median', 'min', 'max', 'std', 'sum', 'count'):
+        raise ValueError('running_statistic: unknown statistic ' + str(statistic))
+    values = data.reshape(len(data), int(np.prod(data.shape[1:], dtype=np.int64))).astype(np.float64)
+    nans = np.isnan(values)
+    if skip_nans:
+        counts = _running_counts(~nans, npts)
+    else:
+        counts = _running_counts(np.ones(values.shape, dtype=bool), npts)
+    empty = counts == 0
+    if not skip_nans:
+        empty |= _running_counts(nans, npts) > 0
+
+    if statistic == 'count':
+        return counts.reshape(data.shape)
+    if statistic == 'median':
+        # padding with NaNs shortens the windows at the ends
+        result = window_medians(_padded(values, npts, fill=np.nan), npts, len(values), skip_nans=True)
+    elif statistic in ('min', 'max'):
+        fill = np.inf if statistic == 'min' else -np.inf
+        flt = ndimage.minimum_filter1d if statistic == 'min' else ndimage.maximum_filter1d
+        result = flt(np.where(nans, fill, values), npts, axis=0, mode='constant', cval=fill)
+    else:
+        if statistic == 'std':
+            # deviations from the column means, to limit the rounding errors in the sums of squares
+            finite = np.isfinite(values)
+            shift = np.where(finite, values, 0.0).sum(axis=0) / np.maximum(finite.sum(axis=0), 1)
+            values = np.where(finite, values - shift, values)
+        if skip_nans:
+            values = np.where(nans, 0.0, values)
+        sums = window_sums(_padded(values, npts), npts, len(values))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if statistic == 'sum':
+                result = sums
+            elif statistic == 'mean':
+                result = sums / counts
+            else:
+                squares = window_sums(_padded(values * values, npts), npts, len(values))
+                result = np.sqrt(np.maximum(squares - sums * sums / counts, 0.0) / (counts - ddof))
+                result[counts - ddof <= 0] = np.nan
+    result[empty] = np.nan
+    result = result.reshape(data.shape)
+    if data.dtype.kind == 'f':
+        result = result.astype(data.dtype, copy=False)
+    return result
+
+
+def running_filter(data, weights):
+    """
+    Weighted sum of the data values in a moving window (a finite impulse response filter).
+
+    The output is aligned with the data as for np.convolve(..., mode='same'), with the data taken
+    as zero beyond its ends.  Data without NaNs or infinities is filtered with FFTs (overlap-add),
+    so the cost grows with the log of the number of weights rather than with the number of weights;
+    otherwise the columns are convolved directly, so that a NaN only affects the samples within
+    the filter's width of it.
+
+    Parameters
+    ----------
+        data : array_like
+            Data values, with time as the first dimension.  All the other dimensions are filtered together.
+        weights : array_like
+            The filter weights (1-d)
+
+    Returns
+    -------
+        ndarray
+            The filtered data, with the same shape as data
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from pyspedas.tplot_tools.running_stats import running_filter
+        >>> running_filter(np.arange(5.0), np.ones(3) / 3).round(6)
+        array([0.333333, 1.      , 2.      , 3.      , 2.333333])
+    """
+    data = np.asarray(data)
+    weights = np.asarray(weights, dtype=np.float64)
+    values = data.reshape(len(data), int(np.prod(data.shape[1:], dtype=np.int64)))
+    if len(values) == 0 or values.shape[1] == 0:
+        return np.zeros(data.shape)
+    if np.isfinite(values).all():
+        result = signal.oaconvolve(values, weights[:, np.newaxis], mode='same', axes=0)
+    else:
+        result = np.empty(values.shape)
+        for j in range(values.shape[1]):
+            result[:, j] = signal.convolve(values[:, j], weights, mode='same', method='direct')
+    return result.reshape(data.shape)
@@ -7,17 +7,42 @@ import pandas as pd
 import numpy as np
 import datetime
 import logging
-from pyspedas.tplot_tools import del_data, tplot_rename, get_y_range, replace_metadata
+from pyspedas.tplot_tools import del_data, tplot_rename, replace_metadata
 import pyspedas
 import xarray as xr
-import copy
+from copy import deepcopy
 import warnings
 from pyspedas import is_timezone_aware
+from pyspedas.tplot_tools.chunked import is_chunked, dask_available
+from pyspedas.tplot_tools.copy_on_write import shared_copy
 
 tplot_num = 1
 
 
-def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
+def share_arrays_deepcopy(attr_dict):
+    """
+    Deep copy a metadata dictionary, sharing (rather than copying) any numpy arrays it contains.
+
+    The nested dictionaries and lists are copied, so that options() etc. on one variable
+    don't change another, but large array-valued attributes keep referring to the same buffers.
+    """
+    memo = {}
+
+    def collect_arrays(obj):
+        if isinstance(obj, np.ndarray):
+            memo[id(obj)] = obj
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                collect_arrays(value)
+        elif isinstance(obj, (list, tuple)):
+            for value in obj:
+                collect_arrays(value)
+
+    collect_arrays(attr_dict)
+    return deepcopy(attr_dict, memo)
+
+
+def store_data(name, data=None, delete=False, newname=None, attr_dict={}, copy=True, chunks=None):
     
     """
     Create a "Tplot Variable" (similar to the IDL SPEDAS concept) based on the inputs, and
@@ -52,6 +77,16 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         attr_dict: dict
             A dictionary object of attributes (these do not affect routines in pyspedas, this is merely to keep metadata alongside the file)
             Default: {} (empty dictionary)
+        copy: bool
+            If False, numpy arrays passed in 'x' (as np.datetime64[ns] or float64), 'y' and 'dy' are stored as-is rather than copied,
+            and array-valued entries of attr_dict are shared rather than deep-copied.  The caller should not modify those
+            arrays afterwards.  Useful for very large arrays that the caller has just computed.
+            Default: True
+        chunks: int
+            If set, store the data values as a chunked (dask-backed) array, with this many time samples per chunk.
+            Operations on chunked variables are evaluated lazily, one chunk at a time.  If 'y' is already a dask
+            array, it is kept as-is.  Requires the dask package.
+            Default: None
         
     .. note::
         If you want to combine multiple tplot variables into one, simply supply the list of tplot variables to the
@@ -124,9 +159,10 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
             return False
         # Copying the first variable to use all of its plot options
         # However, we probably want each overplot to retain its original plot option
-        pyspedas.tplot_tools.data_quants[name] = copy.deepcopy(pyspedas.tplot_tools.data_quants[base_data[0]])
-        pyspedas.tplot_tools.data_quants[name].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[base_data[0]].attrs)
-        pyspedas.tplot_tools.data_quants[name].name = name
+        # (The data arrays only mirror the first variable's, as read-only views; the first variable
+        # isn't marked as shared, so its arrays stay writeable and are never copied because of this)
+        pyspedas.tplot_tools.data_quants[name] = shared_copy(pyspedas.tplot_tools.data_quants[base_data[0]], name,
+                                                             track_original=False)
         pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots'] = base_data[1:]
         pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['overplots_mpl'] = base_data
         # These sets of options should default to the sub-variables' options, not simply
@@ -149,10 +185,19 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
 
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
-        values = np.array(data.pop('y'))
+        if is_chunked(data['y']):
+            # Keep dask arrays lazy
+            values = data.pop('y')
+        elif copy:
+            values = np.array(data.pop('y'))
+        else:
+            values = np.asarray(data.pop('y'))
 
     if 'dy' in data.keys():
-        err_values = np.array(data.pop('dy'))
+        if copy:
+            err_values = np.array(data.pop('dy'))
+        else:
+            err_values = np.asarray(data.pop('dy'))
 
         if len(err_values) != len(times):
             logging.warning('store_data: Warning: %s: length of error values (%d) does not match length of time values (%d)',name,len(err_values),
@@ -161,7 +206,10 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         err_values = None
 
     # Convert input time representation to np.datetime64 objects, if needed
-    if isinstance(times, pd.Series):
+    if not copy and isinstance(times, np.ndarray) and times.dtype == np.dtype('datetime64[ns]'):
+        # Already in the stored representation, use as-is
+        datetimes = times
+    elif isinstance(times, pd.Series):
         datetimes = times.to_numpy(dtype='datetime64[ns]')  # if it is pandas series, convert to numpy array
     elif isinstance(times[0],datetime.datetime):
         # Timezone-naive datetime, do explicit conversion to np.datetime64[ns] and ensure container is a numpy array
@@ -192,9 +240,10 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         # Make sure we have a numpy array
         if not isinstance(times,np.ndarray):
             times=np.array(times)
-        # Replace any NaN or inf values with 0
+        # Replace any NaN or inf values with 0, without modifying the caller's array
         cond = np.logical_not(np.isfinite(times))
-        times[cond] = 0
+        if cond.any():
+            times = np.where(cond, 0, times)
         datetimes = np.array(times*1e09,dtype='datetime64[ns]')
     elif isinstance(times[0],str):
         # Interpret strings as timestamps, convert to np.datetime64 with nanosecond precision
@@ -379,6 +428,11 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         logging.warning("store_data: Unable to create xarray object for variable %s, giving up.", name)
         return
 
+    if chunks is not None:
+        if not dask_available():
+            return False
+        temp = temp.chunk({'time': chunks})
+
     if spec_bins_exist:
         try:
             if spec_bins_time_varying:
@@ -428,7 +482,10 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
 
     # Add dicts to the xarray attrs
     temp.name = name
-    temp.attrs = copy.deepcopy(attr_dict)
+    if copy:
+        temp.attrs = deepcopy(attr_dict)
+    else:
+        temp.attrs = share_arrays_deepcopy(attr_dict)
     if extra_v_values is not None:
         temp.attrs['extra_v_values'] = extra_v_values
 
@@ -452,7 +509,9 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
 
     pyspedas.tplot_tools.data_quants[name] = temp
 
-    pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['yaxis_opt']['y_range'] = get_y_range(temp)
+    # The y range is computed on demand (see get_cached_y_range), so that intermediate variables
+    # that are never plotted don't pay for a full scan of the data
+    pyspedas.tplot_tools.data_quants[name].attrs['plot_options']['yaxis_opt']['y_range'] = None
 
     return True
 
@@ -6,6 +6,12 @@ from datetime import datetime, timezone
 import numpy as np
 from collections.abc import Iterable
 
+# Layout of the ISO-8601 strings converted by numpy in time_float: 'd' is a digit, 'S' is the
+# date/time separator ('T', ' ' or '/'), and any further characters are fractional-second digits.
+# A string may stop after the year, month, day, hour, minute or second, and may end with 'Z'.
+_ISO_LAYOUT = 'dddd-dd-ddSdd:dd:dd.'
+_ISO_LENGTHS = [4, 7, 10, 13, 16, 19]
+
 
 def time_float_one(s_time=None):
     """
@@ -44,6 +50,80 @@ def time_float_one(s_time=None):
     return float_time
 
 
+def _numpy_microseconds(strings):
+    """
+    Convert ISO-8601 strings to microseconds since 1970 with numpy.  A block of strings that numpy
+    can't convert (e.g. with a field out of range, or '24:00:00') is split in halves and retried,
+    so that one bad string doesn't leave the whole array to dateutil.  Returns the microseconds and
+    a mask of the strings that were converted.
+    """
+    microseconds = np.zeros(len(strings), dtype=np.int64)
+    converted = np.ones(len(strings), dtype=bool)
+    blocks = [(0, len(strings))]
+    while blocks:
+        start, end = blocks.pop()
+        try:
+            microseconds[start:end] = strings[start:end].astype('datetime64[us]').astype(np.int64)
+        except ValueError:
+            if end - start == 1:
+                converted[start] = False
+            else:
+                middle = (start + end) // 2
+                blocks += [(middle, end), (start, middle)]
+    return microseconds, converted
+
+
+def _iso_strings_to_float(str_array):
+    """
+    Convert an array of strings to seconds since 1970, using numpy for the strings that have
+    the layout in _ISO_LAYOUT, and dateutil (via time_float_one) for any others.
+    """
+    str_array = np.array(str_array, dtype=str).reshape(-1)
+    n = str_array.shape[0]
+    result = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return result
+    codes = str_array.view(np.uint32).reshape(n, -1)
+    width = codes.shape[1]
+
+    lengths = np.count_nonzero(codes, axis=1)
+    last = codes[np.arange(n), np.maximum(lengths - 1, 0)]
+    zulu = (lengths > 10) & (last == ord('Z'))
+    lengths = lengths - zulu
+
+    layout = np.array([ord(c) for c in _ISO_LAYOUT.ljust(width, 'd')[:width]], dtype=np.uint32)
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    matches = np.where(layout == ord('d'), is_digit, codes == layout)
+    if width > 10:
+        matches[:, 10] = np.isin(codes[:, 10], [ord('T'), ord(' '), ord('/')])
+    in_string = np.arange(width) < lengths[:, np.newaxis]
+    iso = (matches | ~in_string).all(axis=1) & (np.isin(lengths, _ISO_LENGTHS) | (lengths > 19))
+
+    # numpy only accepts 'T' (or ' ') as the separator, and the trailing 'Z' is dropped
+    # (it can be removed by zeroing it, since numpy strings are padded with zeros)
+    if width > 10:
+        codes[iso & (lengths > 10), 10] = ord('T')
+    zulu &= iso
+    codes[zulu, lengths[zulu]] = 0
+
+    # strings that numpy can't convert are left to dateutil
+    iso_index = np.flatnonzero(iso)
+    microseconds, converted = _numpy_microseconds(str_array[iso_index])
+    iso_index = iso_index[converted]
+    microseconds = microseconds[converted]
+    iso[:] = False
+    iso[iso_index] = True
+    result[iso_index] = microseconds / 1e6
+    # match the rounding of datetime.timestamp() for times too far from 1970 to be exact as float64
+    inexact = np.abs(microseconds) >= 2**53
+    if inexact.any():
+        result[iso_index[inexact]] = [int(us) / 10**6 for us in microseconds[inexact]]
+
+    for i in np.flatnonzero(~iso):
+        result[i] = time_float_one(str(str_array[i]))
+    return result
+
+
 def time_float(str_time=None):
     """
     Transform a list of datetimes from string to decimal.
@@ -74,6 +154,9 @@ def time_float(str_time=None):
     Note
     ----
     This function is to time_double.pro in IDL SPEDAS.
+
+    Arrays of ISO-8601 strings such as '2023-03-25T12:00:00.5', '2023-03-25 12:00:00' or '2023-03-25/12:00'
+    are converted with numpy; only strings in other formats are parsed individually with dateutil.
     """
 
     if str_time is None:
@@ -82,8 +165,17 @@ def time_float(str_time=None):
     if isinstance(str_time, str):
         return time_float_one(str_time)
 
+    if isinstance(str_time, np.ndarray) and str_time.dtype.kind in 'iuf':
+        return str_time.astype(np.float64).tolist()
+
     time_list = list()
     if isinstance(str_time, Iterable):
+        if isinstance(str_time, np.ndarray) and str_time.dtype.kind == 'U':
+            return _iso_strings_to_float(str_time).tolist()
+        str_time = list(str_time)
+        if len(str_time) > 1 and set(map(type, str_time)) <= {str, np.str_}:
+            # whole arrays of ISO-8601 strings are converted with numpy, which is much faster than dateutil
+            return _iso_strings_to_float(str_time).tolist()
         for t in str_time:
             time_list.append(time_float_one(t))
         return time_list
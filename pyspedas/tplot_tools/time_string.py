@@ -2,8 +2,108 @@
 Transform datetimes from decimal to string.
 """
 from datetime import datetime, timezone
+import numpy as np
 from pyspedas.tplot_tools import time_float
 
+# strftime directives that time_string can format without calling strftime, with the width of each field
+_FIELD_WIDTHS = {'Y': 4, 'y': 2, 'm': 2, 'd': 2, 'j': 3, 'H': 2, 'M': 2, 'S': 2, 'f': 6}
+
+# Range of times (in microseconds since 1970) with 4-digit years; strftime doesn't zero-pad
+# earlier years on all platforms, so those are left to strftime
+_MIN_US = int(np.datetime64('1000-01-01T00:00:00', 'us').astype(np.int64))
+_MAX_US = int(np.datetime64('9999-12-31T23:59:59.999999', 'us').astype(np.int64))
+
+
+def _unix_to_us(float_time):
+    """
+    Convert seconds since 1970 to integer microseconds, rounding the same way as datetime.fromtimestamp.
+    """
+    frac, whole = np.modf(np.asarray(float_time, dtype=np.float64))
+    return whole.astype(np.int64) * 1000000 + np.rint(frac * 1e6).astype(np.int64)
+
+
+def _us_array(float_time):
+    """
+    Return the times as integer microseconds since 1970, or None if they can't be converted with numpy
+    (non-numeric values, NaNs, or times outside the years 1000-9999).
+    """
+    if not isinstance(float_time, (list, tuple, np.ndarray)):
+        return None
+    times = np.asarray(float_time)
+    if times.ndim != 1 or times.dtype.kind not in 'iuf' or times.size < 2:
+        return None
+    times = times.astype(np.float64)
+    if not np.isfinite(times).all():
+        return None
+    us = _unix_to_us(times)
+    if us.min() < _MIN_US or us.max() > _MAX_US:
+        return None
+    return us
+
+
+def _time_fields(us):
+    """
+    Return the calendar fields of an array of times (in microseconds since 1970), keyed by strftime directive.
+    """
+    days = us.astype('datetime64[us]').astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = days.astype('datetime64[Y]')
+    year = years.astype(np.int64) + 1970
+    us_of_day = us - days.astype(np.int64) * 86400000000
+    seconds = us_of_day // 1000000
+    return {'Y': year,
+            'y': year % 100,
+            'm': (months - years.astype('datetime64[M]')).astype(np.int64) + 1,
+            'd': (days - months.astype('datetime64[D]')).astype(np.int64) + 1,
+            'j': (days - years.astype('datetime64[D]')).astype(np.int64) + 1,
+            'H': seconds // 3600,
+            'M': seconds // 60 % 60,
+            'S': seconds % 60,
+            'f': us_of_day % 1000000}
+
+
+def _format_us(us, fmt):
+    """
+    Format an array of times (in microseconds since 1970) with fmt, without calling strftime for each time.
+
+    Returns None if fmt uses directives other than those in _FIELD_WIDTHS.
+    """
+    # split fmt into directives (e.g. 'Y') and literal characters (e.g. ('-',))
+    parts = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] != '%':
+            parts.append((fmt[i],))
+            i += 1
+            continue
+        directive = fmt[i + 1:i + 2]
+        if directive == '%':
+            parts.append(('%',))
+        elif directive in _FIELD_WIDTHS:
+            parts.append(directive)
+        else:
+            return None
+        i += 2
+    width = sum(_FIELD_WIDTHS[part] if isinstance(part, str) else 1 for part in parts)
+    if width == 0:
+        return None
+
+    # build the strings as an array of unicode code points, with one column per character
+    fields = _time_fields(us)
+    codes = np.empty((len(us), width), dtype=np.uint32)
+    column = 0
+    for part in parts:
+        if isinstance(part, tuple):
+            codes[:, column] = ord(part[0])
+            column += 1
+            continue
+        value = fields[part]
+        for power in range(_FIELD_WIDTHS[part] - 1, -1, -1):
+            codes[:, column] = ord('0') + value // 10**power % 10
+            column += 1
+    return codes.view('U%d' % width).reshape(-1)
+
+
 def time_string_one(float_time=None, fmt=None):
     """
     Transforms a single float daytime value into a string representation.
@@ -81,6 +181,9 @@ def time_string(float_time=None, fmt=None):
     Notes
     -----
     Compare to https://www.epochconverter.com/
+
+    Arrays of times are formatted with numpy when fmt only uses the directives %Y, %y, %m, %d, %j, %H, %M, %S and %f;
+    other formats are passed to strftime for each time.
     """
     if float_time is None:
         return time_string_one(None, fmt)
@@ -88,6 +191,11 @@ def time_string(float_time=None, fmt=None):
         if isinstance(float_time, (int, float)):
             return time_string_one(float_time, fmt)
         else:
+            us = _us_array(float_time)
+            if us is not None:
+                str_time = _format_us(us, '%Y-%m-%d %H:%M:%S.%f' if fmt is None else fmt)
+                if str_time is not None:
+                    return str_time.tolist()
             time_list = list()
             for t in float_time:
                 time_list.append(time_string_one(t, fmt))
@@ -150,4 +258,9 @@ def time_datetime(time=None, tz=None):
     if isinstance(time, (int, float)):
         return datetime.fromtimestamp(time, tz=tz)
 
-    return [time_datetime(_time) for _time in time]
+    time = list(time)
+    if len(time) > 1 and all(isinstance(_time, str) for _time in time):
+        # time_float converts whole lists of strings much faster than one string at a time
+        time = time_float(time)
+
+    return [time_datetime(_time, tz=tz) for _time in time]
@@ -1,6 +1,7 @@
 import re
 import logging
-from pyspedas.tplot_tools import tplot_names, tplot_wildcard_expand
+from pyspedas.tplot_tools import tplot_wildcard_expand
+from pyspedas.tplot_tools.wildcard_routines import tplot_name_index
 
 
 def tnames(pattern=None, regex=None):
@@ -35,7 +36,7 @@ def tnames(pattern=None, regex=None):
         >>> pyspedas.tnames('th?_fgs_gsm')
     """
     name_list = list()
-    all_names = tplot_names(quiet=True)
+    all_names = tplot_name_index().names
 
     if len(all_names) < 1:
         # No tplot variables found
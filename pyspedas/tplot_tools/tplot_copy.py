@@ -6,7 +6,7 @@
 import logging
 import pyspedas
 from pyspedas.tplot_tools import store_data
-from copy import deepcopy
+from pyspedas.tplot_tools.copy_on_write import shared_copy
 from collections import OrderedDict
 
 
@@ -14,6 +14,11 @@ def tplot_copy(old_name, new_name):
     """
     This function will copy a tplot variables that is already stored in memory.
 
+    The data arrays are not copied; the copy gets read-only views of them, so copying is fast even for
+    large variables.  The original's arrays are unchanged.  get_data gives either variable its own
+    writeable copy of the shared arrays before returning them, so they can be modified in place
+    without changing the other variable.
+
     Parameters
     ----------
         old_name : str
@@ -50,7 +55,6 @@ def tplot_copy(old_name, new_name):
         # old variable is a non-record varying variable
         store_data(new_name, data={'y': pyspedas.tplot_tools.data_quants[old_name]['data']})
     else:
-        pyspedas.tplot_tools.data_quants[new_name] = deepcopy(pyspedas.tplot_tools.data_quants[old_name])
-        pyspedas.tplot_tools.data_quants[new_name].name = new_name
+        pyspedas.tplot_tools.data_quants[new_name] = shared_copy(pyspedas.tplot_tools.data_quants[old_name], new_name)
 
     return
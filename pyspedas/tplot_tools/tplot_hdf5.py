@@ -0,0 +1,377 @@
+"""
+Save and restore tplot variables in HDF5 files.
+
+Each tplot variable is written to its own group in the file, with the times, data values,
+coordinates (e.g. spec_bins) and error values stored as (optionally compressed and chunked) HDF5
+datasets, and the metadata and plot options stored as JSON text.  Unlike the pickle files
+written by tplot_save, these files can be read by other HDF5 tools, reading them never executes
+any code, and individual variables can be restored without reading the rest of the file.
+
+The h5py package is optional; it can be installed with "pip install h5py".
+
+"""
+import datetime
+import json
+import logging
+import os
+from collections import OrderedDict
+import numpy as np
+import xarray as xr
+import pyspedas
+from pyspedas.tplot_tools.chunked import is_chunked, dask_available, da
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+FORMAT_NAME = 'pyspedas_tplot'
+FORMAT_VERSION = 1
+
+# Files left open for lazily restored variables, by absolute path
+_open_files = {}
+
+
+def h5py_available():
+    """
+    Return True if the h5py package needed for HDF5 tplot files is installed.
+    """
+    if h5py is None:
+        logging.error('The h5py package is needed for HDF5 tplot files, but does not appear to be installed.')
+        logging.error('To use this feature, install h5py with "pip install h5py".')
+        return False
+    return True
+
+
+def is_tplot_hdf5(filename):
+    """
+    Return True if filename is an HDF5 file (as written by tplot_save with format='hdf5').
+    """
+    return h5py is not None and h5py.is_hdf5(filename)
+
+
+def _encode(obj):
+    # Convert metadata to something that can be written as JSON, tagging the
+    # types that JSON can't represent so they can be rebuilt by _decode_hook
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, dict):
+        if all(isinstance(key, str) for key in obj):
+            return {key: _encode(value) for key, value in obj.items()}
+        return {'__items__': [[_encode(key), _encode(value)] for key, value in obj.items()]}
+    if isinstance(obj, list):
+        return [_encode(value) for value in obj]
+    if isinstance(obj, tuple):
+        return {'__tuple__': [_encode(value) for value in obj]}
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in 'mM':
+            return {'__ndarray__': obj.view(np.int64).tolist(), 'dtype': str(obj.dtype)}
+        return {'__ndarray__': _encode(obj.tolist()), 'dtype': str(obj.dtype)}
+    if isinstance(obj, np.generic):
+        if obj.dtype.kind in 'mM':
+            return {'__scalar__': int(obj.view(np.int64)), 'dtype': str(obj.dtype)}
+        return {'__scalar__': _encode(obj.item()), 'dtype': str(obj.dtype)}
+    if isinstance(obj, datetime.datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, bytes):
+        return {'__bytes__': obj.decode('latin-1')}
+    logging.warning('tplot_save: unable to save metadata value of type %s; saving it as a string', type(obj).__name__)
+    return str(obj)
+
+
+def _decode_hook(obj):
+    if '__ndarray__' in obj:
+        dtype = np.dtype(obj['dtype'])
+        if dtype.kind in 'mM':
+            return np.array(obj['__ndarray__'], dtype=np.int64).view(dtype)
+        return np.array(obj['__ndarray__'], dtype=dtype)
+    if '__scalar__' in obj:
+        dtype = np.dtype(obj['dtype'])
+        if dtype.kind in 'mM':
+            return np.int64(obj['__scalar__']).view(dtype)
+        return dtype.type(obj['__scalar__'])
+    if '__tuple__' in obj:
+        return tuple(obj['__tuple__'])
+    if '__items__' in obj:
+        return {key: value for key, value in obj['__items__']}
+    if '__datetime__' in obj:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    if '__bytes__' in obj:
+        return obj['__bytes__'].encode('latin-1')
+    return obj
+
+
+def _to_json(obj):
+    return json.dumps(_encode(obj))
+
+
+def _from_json(text):
+    return json.loads(text, object_hook=_decode_hook)
+
+
+def _group_name(name):
+    # HDF5 uses '/' as its path separator
+    return name.replace('/', '%2F')
+
+
+def _write_array(group, key, values, dims=None, compression=None, chunks=None):
+    if is_chunked(values):
+        values = values.compute()
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind == 'O':
+        logging.warning('tplot_save: unable to save %s of %s (object array); it will not be restored', key, group.name)
+        return
+    if kind in 'mM':
+        stored = values.view(np.int64)
+    elif kind == 'U':
+        stored = np.char.encode(values, 'utf-8')
+    else:
+        stored = values
+
+    kwargs = {}
+    if stored.ndim > 0 and stored.size > 0:
+        if compression is not None:
+            kwargs['compression'] = compression
+        if chunks is not None:
+            kwargs['chunks'] = (min(chunks, stored.shape[0]),) + stored.shape[1:]
+        elif compression is not None:
+            kwargs['chunks'] = True
+    dset = group.create_dataset(key, data=stored, **kwargs)
+    dset.attrs['dtype'] = str(values.dtype)
+    if dims is not None:
+        dset.attrs['dims'] = _to_json(list(dims))
+
+
+def _read_array(dset, lazy=False):
+    dtype = np.dtype(dset.attrs.get('dtype', str(dset.dtype)))
+    if lazy and dtype.kind not in 'mMU' and dset.ndim > 0:
+        return da.from_array(dset, chunks='auto')
+    values = dset[()]
+    if dtype.kind in 'mM':
+        return np.asarray(values).view(dtype)
+    if dtype.kind == 'U':
+        return np.char.decode(values, 'utf-8')
+    return values
+
+
+def _reads_file(data_quant, f):
+    # True if any of the (chunked) arrays of a tplot variable read from the open HDF5 file f
+    if isinstance(data_quant, dict):
+        return False
+    arrays = [data_quant.data] + [data_quant.coords[c].data for c in data_quant.coords]
+    for arr in arrays:
+        if not is_chunked(arr):
+            continue
+        for value in arr.__dask_graph__().values():
+            if isinstance(value, h5py.Dataset) and value.id.valid and value.file.id == f.id:
+                return True
+    return False
+
+
+def _variables_reading(f):
+    data_quants = pyspedas.tplot_tools.data_quants
+    # OrderedDict.items, so that looking through the variables doesn't count as accessing them
+    return [name for name, data_quant in OrderedDict.items(data_quants) if _reads_file(data_quant, f)]
+
+
+def close_unused_hdf5():
+    """
+    Close the HDF5 files left open by tplot_restore(..., lazy=True) that no tplot variable reads from any more.
+
+    This is called when variables are deleted (del_data) or computed (tcompute), and when HDF5
+    files are saved or restored.
+
+    Returns
+    -------
+        None
+    """
+    for path, f in list(_open_files.items()):
+        if not _variables_reading(f):
+            f.close()
+            del _open_files[path]
+
+
+def close_hdf5(filename=None):
+    """
+    Close HDF5 files left open for lazily restored (tplot_restore(..., lazy=True)) variables.
+
+    The variables that still read from the files are computed first (see tcompute), so they
+    can still be used, and the files can then be changed, overwritten or removed.
+
+    Parameters
+    ----------
+        filename : str, optional
+            The HDF5 file to close.  Default: all the files left open by tplot_restore.
+
+    Returns
+    -------
+        list[str]
+            Names of the variables that were read into memory
+
+    Examples
+    --------
+        >>> import pyspedas
+        >>> pyspedas.tplot_restore('variables.h5', lazy=True)
+        >>> pyspedas.close_hdf5('variables.h5')
+    """
+    if filename is None:
+        paths = list(_open_files)
+    else:
+        paths = [os.path.abspath(filename)]
+    computed = []
+    for path in paths:
+        f = _open_files.pop(path, None)
+        if f is None:
+            continue
+        names = _variables_reading(f)
+        if names:
+            logging.info('Reading %s into memory before closing %s', ', '.join(names), path)
+            computed += pyspedas.tplot_tools.tcompute(names)
+        f.close()
+    return computed
+
+
+def save_hdf5(filename, names, compression=None, chunks=None):
+    """
+    Write tplot variables to an HDF5 file.  This is called by tplot_save with format='hdf5'.
+
+    Parameters
+    ----------
+        filename : str
+            The name of the output file
+        names : list[str]
+            Names of the tplot variables to save
+        compression : str, optional
+            HDF5 compression filter for the data arrays, e.g. 'gzip' or 'lzf'
+            Default: None (no compression)
+        chunks : int, optional
+            Number of time samples in each HDF5 chunk.  By default, h5py chooses the chunk
+            size when compressing, and uncompressed arrays are stored contiguously.
+
+    Returns
+    -------
+        None
+    """
+    data_quants = pyspedas.tplot_tools.data_quants
+    if os.path.abspath(filename) in _open_files:
+        # variables restored lazily from this file still read from it; read them into memory,
+        # so the file can be overwritten
+        close_hdf5(filename)
+    with h5py.File(filename, 'w') as f:
+        f.attrs['format'] = FORMAT_NAME
+        f.attrs['version'] = FORMAT_VERSION
+        f.attrs['names'] = _to_json(names)
+        f.attrs['tplot_opt_glob'] = _to_json(pyspedas.tplot_tools.tplot_opt_glob)
+        for name in names:
+            data_quant = data_quants[name]
+            group = f.create_group(_group_name(name))
+            group.attrs['name'] = name
+            if isinstance(data_quant, dict):
+                # non-record varying variable
+                group.attrs['nrv'] = True
+                _write_array(group, 'data', data_quant['data'])
+                continue
+
+            group.attrs['nrv'] = False
+            attrs = dict(data_quant.attrs)
+            plot_options = attrs.get('plot_options')
+            if plot_options is not None:
+                # large arrays are written as datasets, rather than JSON
+                plot_options = dict(plot_options)
+                error = plot_options.get('error')
+                if isinstance(error, np.ndarray):
+                    _write_array(group, 'error', error, compression=compression, chunks=chunks)
+                    plot_options['error'] = None
+                attrs['plot_options'] = plot_options
+                # the components of pseudovariables, so they can be restored together
+                group.attrs['overplots'] = _to_json(list(plot_options.get('overplots', [])) + list(plot_options.get('overplots_mpl', [])))
+            group.attrs['attrs'] = _to_json(attrs)
+
+            _write_array(group, 'data', data_quant.data, dims=data_quant.dims, compression=compression, chunks=chunks)
+            coords = group.create_group('coords')
+            for coord_name in data_quant.coords:
+                coord = data_quant.coords[coord_name]
+                _write_array(coords, coord_name, coord.data, dims=coord.dims, compression=compression, chunks=chunks)
+
+
+def restore_hdf5(filename, names=None, lazy=False):
+    """
+    Read tplot variables from an HDF5 file written by tplot_save.  This is called by tplot_restore.
+
+    Parameters
+    ----------
+        filename : str
+            The name of the HDF5 file
+        names : str or list[str], optional
+            Names of the variables to restore (wildcards accepted).  The components of any
+            pseudovariables are restored with them.  By default, all variables and the global
+            tplot options are restored.
+        lazy : bool, optional
+            If True, the data values are not read into memory; instead, the variables are
+            restored as chunked (dask-backed) variables that read from the file as needed.
+            This requires dask.  The file is kept open until the variables are deleted or computed,
+            or close_hdf5 is called, or the file is overwritten by tplot_save (which reads them into
+            memory first); it must not be changed by other programs while it is open.
+            Default: False
+
+    Returns
+    -------
+        list[str]
+            Names of the restored variables
+    """
+    if lazy and not dask_available():
+        lazy = False
+
+    path = os.path.abspath(filename)
+    if path in _open_files:
+        # still open for lazily restored variables
+        f = _open_files[path]
+    else:
+        f = h5py.File(filename, 'r')
+    if f.attrs.get('format') != FORMAT_NAME:
+        logging.error('tplot_restore: %s is not a PySPEDAS tplot HDF5 file', filename)
+        if path not in _open_files:
+            f.close()
+        return []
+    try:
+        saved_names = _from_json(f.attrs['names'])
+        if names is None:
+            restore_names = saved_names
+        else:
+            matched = pyspedas.wildcard_expand(saved_names, names)
+            # include the components of pseudovariables
+            for name in list(matched):
+                for oplot_name in _from_json(f[_group_name(name)].attrs.get('overplots', '[]')):
+                    if oplot_name in saved_names and oplot_name not in matched:
+                        matched.append(oplot_name)
+            restore_names = [name for name in saved_names if name in matched]
+
+        for name in restore_names:
+            group = f[_group_name(name)]
+            if group.attrs['nrv']:
+                pyspedas.tplot_tools.data_quants[name] = {'data': _read_array(group['data']), 'name': name}
+                continue
+
+            coords = {}
+            for coord_name, dset in group['coords'].items():
+                coords[coord_name] = (tuple(_from_json(dset.attrs['dims'])), _read_array(dset))
+            dset = group['data']
+            data_quant = xr.DataArray(_read_array(dset, lazy=lazy), dims=tuple(_from_json(dset.attrs['dims'])),
+                                      coords=coords, name=name)
+            data_quant.attrs = _from_json(group.attrs['attrs'])
+            if 'error' in group:
+                data_quant.attrs['plot_options']['error'] = _read_array(group['error'])
+            pyspedas.tplot_tools.data_quants[name] = data_quant
+
+        if names is None:
+            pyspedas.tplot_tools.tplot_opt_glob = _from_json(f.attrs['tplot_opt_glob'])
+    finally:
+        # lazily restored variables keep reading from the file, so it is left open for them
+        # (until they are deleted or computed, see close_unused_hdf5)
+        if lazy:
+            _open_files[path] = f
+        elif path not in _open_files:
+            f.close()
+    close_unused_hdf5()
+    return restore_names
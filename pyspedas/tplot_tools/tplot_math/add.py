@@ -36,13 +36,14 @@ def add(tvar1,tvar2,newname=None):
     tv2 = tinterp(tvar1, tvar2)
 
     # separate and subtract data
-    data1 = pyspedas.tplot_tools.data_quants[tvar1].values
-    data2 = pyspedas.tplot_tools.data_quants[tv2].values
+    # .data rather than .values, so that chunked (dask-backed) variables are not computed here
+    data1 = pyspedas.tplot_tools.data_quants[tvar1].data
+    data2 = pyspedas.tplot_tools.data_quants[tv2].data
     data = data1 + data2
 
     # store subtracted data
     if newname is None:
-        pyspedas.tplot_tools.data_quants[tvar1].values = data
+        pyspedas.tplot_tools.data_quants[tvar1].data = data
         return tvar1
 
     if 'spec_bins' in pyspedas.tplot_tools.data_quants[tvar1].coords:
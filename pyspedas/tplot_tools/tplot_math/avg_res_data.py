@@ -1,7 +1,38 @@
 import pyspedas
 import numpy as np
+import xarray as xr
 import copy
-import logging
+from pyspedas.tplot_tools.binning import bin_statistic
+from pyspedas.tplot_tools.chunked import is_chunked
+
+
+def _block_means(values, res, nbins):
+    # NaN-ignoring mean of each block of res samples; datetimes are averaged as offsets from the first one
+    ind = np.arange(values.shape[0]) // res
+    if values.dtype.kind == 'M':
+        start = values[0]
+        offsets = (values - start).astype(np.int64)
+        means = bin_statistic(offsets, ind, nbins)
+        return start + np.rint(means).astype(np.int64).astype('timedelta64[ns]')
+    return bin_statistic(values, ind, nbins)
+
+
+def _coarsen_mean(data_quant, res):
+    # Equivalent to data_quant.coarsen(time=res, boundary='trim').mean(), averaging all the blocks
+    # of the data and of any time-dependent coordinates (e.g. spec_bins) at once
+    if is_chunked(data_quant.data) or data_quant.values.dtype.kind not in 'iuf':
+        return data_quant.coarsen(time=res, boundary='trim').mean()
+    nbins = data_quant.sizes['time'] // res
+    coords = {}
+    for coord_name in data_quant.coords:
+        coord = data_quant.coords[coord_name]
+        if 'time' in coord.dims and coord.dims[0] == 'time':
+            coords[coord_name] = (coord.dims, _block_means(coord.values, res, nbins))
+        else:
+            coords[coord_name] = coord.variable
+    return xr.DataArray(_block_means(data_quant.values, res, nbins), dims=data_quant.dims, coords=coords,
+                        name=data_quant.name, attrs=data_quant.attrs)
+
 
 def avg_res_data(tvar,res,newname=None):
     """
@@ -23,8 +54,8 @@ def avg_res_data(tvar,res,newname=None):
     Note
     ----
 
-    This routine uses the xarray coarsen() method to reduce the time resolution.  It will only work if the
-    data is evenly gridded, and the res parameter evenly divides the number of samples.
+    This routine averages each block of res samples (like the xarray coarsen() method), dropping any samples
+    left over at the end.  It only gives meaningful results if the data is evenly gridded.
     For most purposes, it is more appropriate to use pyspedas.avg_data() instead.
 
     Examples
@@ -36,12 +67,12 @@ def avg_res_data(tvar,res,newname=None):
 
     """
 
-    tvar_new = pyspedas.tplot_tools.data_quants[tvar].coarsen(time=res, boundary='trim').mean()
+    tvar_new = _coarsen_mean(pyspedas.tplot_tools.data_quants[tvar], res)
     tvar_new.name = pyspedas.tplot_tools.data_quants[tvar].name
     tvar_new.attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
 
     if newname is None:
-        pyspedas.tplot_tools.data_quants[tvar] = newname
+        pyspedas.tplot_tools.data_quants[tvar] = tvar_new
     else:
         if 'spec_bins' in pyspedas.tplot_tools.data_quants[tvar].coords:
            pyspedas.store_data(newname, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.values,
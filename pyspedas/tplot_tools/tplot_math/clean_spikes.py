@@ -7,17 +7,32 @@ Similar to clean_spikes.pro in IDL SPEDAS.
 
 """
 import logging
+from functools import partial
 import numpy as np
 #import pyspedas
-from pyspedas.tplot_tools import tsmooth
-from pyspedas.tplot_tools import subtract_average
+from pyspedas.tplot_tools import smooth
 from pyspedas.tplot_tools import tnames, tplot_copy
 from pyspedas.tplot_tools import get_data
 from pyspedas.tplot_tools import replace_data
-from pyspedas.tplot_tools import data_quants
+from pyspedas.tplot_tools import parallel_map
+from pyspedas.tplot_tools.tplot_math.subtract_average import subtract_statistic
+
+
+def _despike(d0, nsmooth, thresh, sub_avg):
+    # Perform subtract_average or just use the values
+    if sub_avg:
+        d0 = subtract_statistic(d0)
+
+    # Find spikes, comparing smoothed out values to original values in all columns at once
+    ds = smooth(d0, width=nsmooth)  # smoothed out values
+    spikes = np.abs(d0 - ds) > thresh * np.abs(ds)
+    dn = d0.copy()  # final values
+    dn[spikes] = np.nan  # for spikes, set to NaN
+    return dn
+
 
 def clean_spikes(names, nsmooth=10, thresh=0.3, sub_avg=False,
-                 newname=None, suffix=None, overwrite=None):
+                 newname=None, suffix=None, overwrite=None, max_workers=None):
     """
     Clean spikes from data.
 
@@ -39,6 +54,9 @@ def clean_spikes(names, nsmooth=10, thresh=0.3, sub_avg=False,
     sub_avg: bool, optional
         if set, subtract the average value of the data
         prior to checking for spikes
+    max_workers: int, optional
+        Number of variables processed at once (see pyspedas.tplot_tools.set_parallel).
+        Default: None (the default set by set_parallel, normally 1)
 
     Returns
     -------
@@ -68,49 +86,17 @@ def clean_spikes(names, nsmooth=10, thresh=0.3, sub_avg=False,
     if len(n_names) != len(old_names):
         n_names = [s + suffix for s in old_names]
 
+    # find the spikes in all the variables, in parallel if requested, and then store them in order
+    results = parallel_map(partial(_despike, nsmooth=nsmooth, thresh=thresh, sub_avg=sub_avg),
+                           [get_data(old)[1] for old in old_names], max_workers=max_workers)
+
     for old_idx, old in enumerate(old_names):
         new = n_names[old_idx]
-        tmp = new + '_tmp_data'
 
         # Create new
         if old != new:
             tplot_copy(old, new)
 
-        # Perform subtract_average or just copy the values
-        if sub_avg:
-            subtract_average(new, newname=tmp)
-        else:
-            tplot_copy(new, tmp)
-
-        # Find spikes
-        tmps = tmp + '-s'
-        tsmooth(tmp, newname=tmps, width=nsmooth)
-        ds0 = get_data(tmps)  # smoothed out values
-        ds = ds0[1]
-        dor0 = get_data(tmp)  # original values
-        d0 = dor0[1]
-        dn = d0.copy()  # final values
-
-        dim = dn.shape
-        if len(dim) == 1:
-            # One dim data.
-            for i in range(dim[0]):
-                # compare smoothed out values to original values
-                if abs(d0[i] - ds[i]) > thresh * abs(ds[i]):
-                    dn[i] = np.nan  # for spikes, set to NaN
-        else:
-            # More than one dim data.
-            for j in range(dim[1]):
-                for i in range(dim[0]):
-                    # compare smoothed out values to original values
-                    if abs(d0[i, j] - ds[i, j]) > thresh * abs(ds[i, j]):
-                        dn[i, j] = np.nan  # for spikes, set to NaN
-
-        # pyspedas.tplot_tools.data_quants[new] = d
-        replace_data(new, dn)
-
-        # remove temp data
-        del data_quants[tmp]
-        del data_quants[tmps]
+        replace_data(new, results[old_idx])
 
         logging.info('clean_spikes was applied to: ' + new)
@@ -1,11 +1,192 @@
 import pyspedas
-from pyspedas.tplot_tools import store_data, get_data, tnames
+from pyspedas.tplot_tools import store_data, get_data, tnames, parallel_map
 import copy
 import numpy as np
 import logging
 
 
-def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
+def _repeat_fill(data, flagged, ok):
+    # Replace the flagged values in each column of data with the previous unflagged value,
+    # or with the first ok value if there isn't one.
+    ntimes, ny = data.shape
+    columns = np.arange(ny)
+    previous = np.where(flagged, -1, np.arange(ntimes)[:, np.newaxis])
+    np.maximum.accumulate(previous, axis=0, out=previous)
+    first_ok = np.argmax(ok, axis=0)
+    rows, cols = np.nonzero(flagged)
+    source = previous[rows, cols]
+    source = np.where(source >= 0, source, first_ok[cols])
+    data[rows, cols] = data[source, columns[cols]]
+
+
+def _linear_fill(data, time, flagged, ok):
+    # Replace the flagged values in each column of data by linear interpolation between the
+    # nearest ok values on either side, using the same arithmetic as np.interp.
+    ntimes = data.shape[0]
+    index = np.arange(ntimes)[:, np.newaxis]
+    previous = np.maximum.accumulate(np.where(ok, index, -1), axis=0)
+    following = np.minimum.accumulate(np.where(ok, index, ntimes)[::-1], axis=0)[::-1]
+    first_ok = np.argmax(ok, axis=0)
+    last_ok = ntimes - 1 - np.argmax(ok[::-1], axis=0)
+
+    rows, cols = np.nonzero(flagged)
+    before = previous[rows, cols] < 0
+    after = following[rows, cols] >= ntimes
+    lo = np.where(before, first_ok[cols], previous[rows, cols])
+    hi = np.where(after, last_ok[cols], following[rows, cols])
+    x = time[rows]
+    x_lo = time[lo]
+    x_hi = time[hi]
+    y_lo = data[lo, cols]
+    y_hi = data[hi, cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (y_hi - y_lo) / (x_hi - x_lo)
+        values = slope * (x - x_lo) + y_lo
+        values = np.where(np.isnan(values), slope * (x - x_hi) + y_hi, values)
+    values = np.where(np.isnan(values) & (y_lo == y_hi), y_lo, values)
+    # outside the ok values, np.interp repeats the first or last one
+    values = np.where(before, y_lo, values)
+    values = np.where(after, y_hi, values)
+    data[rows, cols] = values
+
+
+def _flag_array(flag):
+    # The flag values as a 1-d array (NaN if there are none)
+    if flag is None:
+        return np.zeros(1)+np.nan
+    flag_array = np.asarray(flag)
+    # if flag was a scalar, the array will have ndim = 0
+    if flag_array.ndim == 0:
+        return np.array([flag])
+    return flag_array
+
+
+def _deflag_values(item, tvar, flag, method, fillval):
+    # Deflag one variable: item is the get_data tuple, or the DataArray for the default method.
+    # No tplot variables are used, so that several variables can be deflagged in parallel.
+    # Returns the DataArray, or the data dict for store_data, or None if nothing is to be stored.
+    nf = len(flag)
+    if method == 'remove_nan':  # this is different from the other methods, which retain all time intervals
+        a = item
+        alen = len(a)
+        # Ignore more than 2d Y input
+        if alen > 3:
+            logging.info('deflag is not used for more than 2-d input')
+            return None
+
+        time = a[0]
+        data = a[1]
+        # a time is removed if the sum of its values is NaN, i.e. any value is NaN (or there are
+        # infinities of both signs)
+        keep = ~np.isnan(np.sum(data.reshape(len(time), -1), axis=1))
+        if not keep.any():
+            logging.warning('No unflagged data in %s, returning.', tvar)
+            return None
+        result = {'x': time[keep], 'y': data[keep]}
+        if alen == 3:  # v variable
+            v = a[2]
+            result['v'] = copy.deepcopy(v) if v.ndim == 1 else v[keep]
+        return result
+    elif method == 'repeat' or method == 'linear' or method == 'replace':
+        a = item
+        time = a[0]
+        data = np.array(a[1])
+        # Force the data into a 2-d view, retaining the original shape so we can restore it later
+        original_data_shape = data.shape
+        data = data.reshape(len(time), -1)
+        alen = len(a)
+        if alen > 3:
+            logging.info('deflag is not used for more than 2-d input')
+            return None
+        for i in range(nf):
+            # all the columns are handled at once
+            if np.isnan(flag[i]):  # NaN flags need special handling
+                flagged = np.isnan(data)
+                ok = np.isfinite(data)
+            else:
+                flagged = data == flag[i]
+                ok = ~flagged
+            if not flagged.any():
+                logging.info("No flagged data in %s", tvar)
+                continue
+            if method in ['linear', 'repeat'] and (flagged.any(axis=0) & ~ok.any(axis=0)).any():
+                logging.info('No unflagged data in %s, returning', tvar)
+                return None
+            if method == 'repeat':  # flagged data repeats the previous unflagged value
+                _repeat_fill(data, flagged, ok)
+            elif method == 'replace':
+                if fillval is None:
+                    fv = np.nan
+                else:
+                    fv = fillval
+                data[flagged] = fv
+            else:  # method = 'linear'
+                _linear_fill(data, time, flagged, ok)
+
+        result = {'x': time, 'y': data.reshape(original_data_shape)}
+        if alen == 3:
+            result['v'] = copy.deepcopy(a[2])
+        return result
+    else:  # any other option includes method=None, replace flags with NaN
+        return copy.deepcopy(item.where(~item.isin(flag)))
+
+
+def _store_deflagged(tvar, newname, method, result):
+    # Store the result of _deflag_values for tvar, replacing it if newname is None
+    data_quants = pyspedas.tplot_tools.data_quants
+    if result is None:
+        return
+    if not isinstance(result, dict):  # DataArray, from the default method
+        if newname is None:
+            result.name = tvar
+            data_quants[tvar] = result
+            return
+        if 'spec_bins' in result.coords:
+            result = {'x': result.coords['time'].values, 'y': result.values, 'v': result.coords['spec_bins']}
+        else:
+            result = {'x': result.coords['time'].values, 'y': result.values}
+    if newname is None:
+        store_data(tvar, data=result, copy=False)
+    else:
+        store_data(newname, data=result, copy=False)
+        # (the repeat, linear and replace methods only keep the metadata of variables with v values)
+        if method not in ['repeat', 'linear', 'replace'] or 'v' in result:
+            data_quants[newname].attrs = copy.deepcopy(data_quants[tvar].attrs)
+
+
+def deflag_variables(old_names, new_names, flag, method, fillval, max_workers=None):
+    """
+    Deflag several tplot variables, in parallel if requested, and store the results in order.
+
+    The input data is read in order before the workers start.  This is used by deflag and tdeflag.
+
+    Parameters
+    ----------
+        old_names : list of str
+            Names of the tplot variables to deflag
+        new_names : list of str or None
+            Names of the output variables; None replaces the input variable
+        flag, method, fillval
+            As for deflag
+        max_workers : int, optional
+            Number of threads (see parallel_map)
+
+    Returns
+    -------
+        None
+    """
+    flag = _flag_array(flag)
+    if method in ['remove_nan', 'repeat', 'linear', 'replace']:
+        items = [get_data(tvar) for tvar in old_names]
+    else:
+        items = [pyspedas.tplot_tools.data_quants[tvar] for tvar in old_names]
+    results = parallel_map(lambda j: _deflag_values(items[j], old_names[j], flag, method, fillval),
+                           range(len(old_names)), max_workers=max_workers, processes=False)
+    for tvar, newname, result in zip(old_names, new_names, results):
+        _store_deflagged(tvar, newname, method, result)
+
+
+def deflag(tvar, flag=None, newname=None, method=None, fillval=None, max_workers=None):
     """
     Replace NaN or other 'flag' values in arrays with interpolated or other values.
 
@@ -31,6 +212,9 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
             multiple or pseudo variables, the data is overwritten.
         fillval: int, float (optional)
             Value to use as replacement when method='replace'
+        max_workers: int, optional
+            Number of variables deflagged at once (see pyspedas.tplot_tools.set_parallel).
+            Default: None (the default set by set_parallel, normally 1)
 
     Notes
     -----
@@ -51,186 +235,14 @@ def deflag(tvar, flag=None, newname=None, method=None, fillval=None):
 
     """
 
-    # for linear method, and flag of NaN, or none, interp_nan an be called
-    #    if (flag == None or np.isnan(flag)) and method == 'linear':
-    #        interp_nan(tvar, newname=newname)
-    #        return
-    
-    # check for globbed or array input, and call recursively
+    # check for globbed or array input; several variables are always overwritten
     tn = tnames(tvar)
     if len(tn) == 0:
         return
     elif len(tn) > 1:
-        for j in range(len(tn)):
-            deflag(tn[j], flag, method=method, fillval=fillval)
+        deflag_variables(tn, [None] * len(tn), flag, method, fillval, max_workers=max_workers)
         return
 
-    # Now flag needs to be an array
-    if flag is None:
-        flag = np.zeros(1)+np.nan
-    else:
-        if not isinstance(flag, np.ndarray):
-            flag_array = np.array(flag)
-        else:
-            flag_array = flag
-        # Ok, now if flag was a scalar, the array will have ndim = 0
-        if flag_array.ndim == 0:
-            flag = np.array([flag])
-        else:
-            flag = flag_array
-    
-    nf = len(flag)
-    if method == 'remove_nan':  # this is different from the other methods, which retain all time intervals
-        a = copy.deepcopy(get_data(tvar))
-        alen = len(a)
-        # Ignore more than 2d Y input
-        if alen > 3:
-            logging.info('deflag is not used for more than 2-d input')
-            return
-
-        time = a[0]
-        data = a[1]
-        # Added this to prevent error on !-d arrays (see below)
-        data_dim = data.ndim
-        new_time = []
-        new_data = []
-        
-        if alen == 3:  # v variable
-            v = a[2]
-            if v.ndim == 1:
-                new_v = v
-                append_v = False
-            else:
-                new_v = []
-                append_v = True
-
-        # Fill the new variable
-        non_nan_seen = False
-        for j in range(len(time)):
-            # This used to be "if len(data[j]) > 1", which failed if data is 1-D so that data[j] is scalar
-            # Instead we go by the dimensions of the data array itself
-            if data_dim > 1:
-                tj = np.sum(data[j])
-            else:
-                tj = data[j]
-            if not np.isnan(tj):
-                non_nan_seen = True
-                new_time.append(time[j])
-                new_data.append(data[j])
-                if alen == 3 and append_v:
-                    new_v.append(v[j])
-        if non_nan_seen is False:
-            logging.warning('No unflagged data in %s, returning.', tvar)
-            return
-        if newname is None:
-            if alen == 2:
-                store_data(tvar, data={'x': new_time, 'y': new_data})
-            else:
-                store_data(tvar, data={'x': new_time, 'y': new_data, 'v': new_v})
-        else:
-            if alen == 2:
-                store_data(newname, data={'x': new_time, 'y': new_data})
-            else:
-                store_data(newname, data={'x': new_time, 'y': new_data, 'v': new_v})
-            pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
-    elif method == 'repeat' or method == 'linear' or method == 'replace':
-        a = copy.deepcopy(get_data(tvar))
-        time = a[0]
-        data = a[1]
-        # Force the data into a 2-d view, retaining the original shape so we can restore it later
-        original_data_shape = data.shape
-        data = data.reshape(len(time), -1)
-        alen = len(a)
-        if alen > 3:
-            logging.info('deflag is not used for more than 2-d input')
-            return
-        if alen == 3:
-            v = a[2]
-        ntimes = time.shape[0]
-        nydim = data.ndim
-        if nydim == 1:
-            ny = 1
-        else:
-            ny = data.shape[1]
-        for i in range(nf):
-            if np.isnan(flag[i]):  # NaN flags need special handling
-                flag_is_nan = True
-            else:
-                flag_is_nan = False
-            for k in range(ny):
-                #print(data[:, k])
-                if (flag_is_nan):
-                    flagged_data = np.argwhere(np.isnan(data[:, k])).flatten()
-                else:
-                    flagged_data = np.argwhere(data[:, k] == flag[i]).flatten()
-                if len(flagged_data) > 0:
-                    if flag_is_nan:
-                        okval = np.argwhere(np.isfinite(data[:, k])).flatten()
-                    else:
-                        okval = np.argwhere(data[:, k] != flag[i]).flatten()
-
-                    if len(okval) == 0 and method in ['linear', 'repeat']:
-                        logging.info('No unflagged data in %s, returning', tvar)
-                        return
-                    if method == 'repeat':  # flagged data repeats the previous unflagged value
-                        for j in range(ntimes):
-                            if (flag_is_nan):
-                                if np.isnan(data[j, k]):
-                                    if j == 0:
-                                        data[j, k] = data[okval[0], k]
-                                    else:
-                                        data[j, k] = data[j-1, k]
-                            else:
-                                if data[j, k] == flag[i]:
-                                    if j == 0:
-                                        data[j, k] = data[okval[0], k]
-                                    else:
-                                        data[j, k] = data[j-1, k]
-                        #print("After repeat: ", data[:, k])
-                    elif method == 'replace':
-                        if fillval is None:
-                            fv = np.nan
-                        else:
-                            fv = fillval
-                        data[flagged_data, k] = fv
-                        #print("After replace: ", data[:,k])
-                    else:  # method = 'linear'
-                        # interpolate flagged data, using np.interp
-                        dataj = data[okval, k]
-                        timej = time[okval]
-                        timej_flagged = time[flagged_data]
-                        dataj_interpd = np.interp(timej_flagged, timej, dataj)
-                        data[flagged_data, k] = dataj_interpd
-                        #print("After linear: ", data[:,k])
-                else:
-                    logging.info("No flagged data in %s", tvar)
-
-        if newname is None:
-            if alen == 2:
-                store_data(tvar, data={'x': time, 'y': data.reshape(original_data_shape)})
-            else:
-                store_data(tvar, data={'x': time, 'y': data.reshape(original_data_shape), 'v': v})
-        else:
-            if alen == 2:
-                store_data(newname, data={'x': time, 'y': data.reshape(original_data_shape)})
-            else:
-                store_data(newname, data={'x': time, 'y': data.reshape(original_data_shape), 'v': v})
-                pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
-    else:  # any other option includes method=None, replace flags with NaN
-        nf = len(flag)
-        a = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].where(pyspedas.tplot_tools.data_quants[tvar] != flag[0]))
-        if nf > 1:
-            for j in range(nf):
-                a = copy.deepcopy(a.where(a != flag[j]))
-        if newname is None:
-            a.name = tvar
-            pyspedas.tplot_tools.data_quants[tvar] = a
-        else:
-            if 'spec_bins' in a.coords:
-                store_data(newname, data={'x': a.coords['time'], 'y': a.values, 'v': a.coords['spec_bins']})
-                pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
-            else:
-                store_data(newname, data={'x': a.coords['time'], 'y': a.values})
-                pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
+    deflag_variables(tn, [newname], flag, method, fillval)
 
     return
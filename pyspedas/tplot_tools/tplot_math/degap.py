@@ -1,10 +1,71 @@
 import pyspedas
 from pyspedas.tplot_tools import store_data, get_data, tnames
+from pyspedas.tplot_tools.chunked import is_chunked
 import numpy as np
+import xarray as xr
 import copy
 import logging
 
 
+def _fill_times(gap_start, gap_end, dt):
+    """
+    Return the times np.arange(start, end, dt) would give for each gap, concatenated, without
+    looping over the gaps.
+    """
+    lengths = np.ceil((gap_end - gap_start) / dt).astype(np.int64)
+    lengths = np.maximum(lengths, 0)
+    gap = np.repeat(np.arange(len(gap_start)), lengths)
+    step = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    # np.arange steps by (start + dt) - start, which can differ slightly from dt
+    delta = (gap_start + dt) - gap_start
+    return gap_start[gap] + step * delta[gap]
+
+
+def _reindex(data_quant, new_index, method):
+    """
+    Equivalent to data_quant.reindex({'time': new_index}, method=method), for sorted times.
+
+    The values at the new times are gathered from the original arrays (or filled with NaN)
+    into newly allocated arrays, rather than looking up each new time in the time index.
+    """
+    times = data_quant.coords['time'].values
+    dtypes = [data_quant.dtype] + [data_quant.coords[c].dtype for c in data_quant.coords if c != 'time' and 'time' in data_quant.coords[c].dims]
+    if (is_chunked(data_quant) or not all(dtype.kind in 'iuf' for dtype in dtypes)
+            or times.dtype != new_index.dtype or not np.all(times[1:] > times[:-1])):
+        # This can fail if the stored quantities are np.datetime64 and new_index is something else, like datetime.datetime
+        return data_quant.reindex({"time": new_index}, method=method)
+
+    if method == 'ffill':
+        source = np.searchsorted(times, new_index, side='right') - 1
+        missing = source < 0
+        source[missing] = 0
+    else:
+        source = np.minimum(np.searchsorted(times, new_index), len(times) - 1)
+        missing = times[source] != new_index
+    any_missing = missing.any()
+
+    def take(variable):
+        axis = variable.dims.index('time')
+        values = np.take(variable.values, source, axis=axis)
+        if any_missing:
+            if values.dtype.kind != 'f':
+                values = values.astype(np.float64)
+            index = [slice(None)] * values.ndim
+            index[axis] = missing
+            values[tuple(index)] = np.nan
+        return values
+
+    coords = {}
+    for name, coord in data_quant.coords.items():
+        if name == 'time':
+            coords[name] = ('time', new_index)
+        elif 'time' in coord.dims:
+            coords[name] = (coord.dims, take(coord.variable), coord.attrs)
+        else:
+            coords[name] = coord.variable
+    return xr.DataArray(take(data_quant.variable), dims=data_quant.dims, coords=coords, name=data_quant.name)
+
+
 def degap(
     tvar,
     dt=None,
@@ -88,10 +149,10 @@ def degap(
         dt = np.median(gap_size)
 
     gap_index_locations = np.where((gap_size > dt + margin) & (gap_size < maxgap))
-    values_to_add = np.array([])
+    gap_start = new_tvar_index[gap_index_locations[0]]
+    gap_end = new_tvar_index[gap_index_locations[0] + 1]
     if onenanpergap == True:
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(values_to_add, new_tvar_index[i] + dt)
+        values_to_add = gap_start + dt
     elif twonanpergap == True:
         # add two NaN values between the two values, either at margin if it's nonzero, or at dt/2
         # since the gap is greater than dt, this will work
@@ -102,14 +163,9 @@ def degap(
                 dt_nan = dt / 2.0
         else:
             dt_nan = dt / 2.0
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(values_to_add, new_tvar_index[i] + dt_nan)
-            values_to_add = np.append(values_to_add, new_tvar_index[i + 1] - dt_nan)
+        values_to_add = np.column_stack((gap_start + dt_nan, gap_end - dt_nan)).ravel()
     else:
-        for i in gap_index_locations[0]:
-            values_to_add = np.append(
-                values_to_add, np.arange(new_tvar_index[i], new_tvar_index[i + 1], dt)
-            )
+        values_to_add = _fill_times(gap_start, gap_end, dt)
 
     # new_index = np.sort(np.unique(np.concatenate((values_to_add, new_tvar_index))))
     new_index_float64 = np.sort(
@@ -128,24 +184,25 @@ def degap(
     # Convert back to datetime64 (nanoseconds since epoch)
     new_index=np.array(new_index_float64*1e9,dtype='datetime64[ns]')
 
-    # This can fail if the stored quantities are np.datetime64 and new_index is something else, like datetime.datetime
-    a = pyspedas.tplot_tools.data_quants[tvar].reindex({"time": new_index}, method=method)
+    a = _reindex(pyspedas.tplot_tools.data_quants[tvar], new_index, method)
 
     if newname is None:
         a.name = tvar
         a.attrs = copy.deepcopy(pyspedas.tplot_tools.data_quants[tvar].attrs)
-        pyspedas.tplot_tools.data_quants[tvar] = copy.deepcopy(a)
+        # the reindexed variable already has new data arrays
+        pyspedas.tplot_tools.data_quants[tvar] = a
     else:
         if "spec_bins" in a.coords:
             store_data(
                 newname,
-                data={"x": a.coords["time"], "y": a.values, "v": a.coords["spec_bins"]},
+                data={"x": a.coords["time"].values, "y": a.values, "v": a.coords["spec_bins"]},
+                copy=False,
             )
             pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(
                 pyspedas.tplot_tools.data_quants[tvar].attrs
             )
         else:
-            store_data(newname, data={"x": a.coords["time"], "y": a.values})
+            store_data(newname, data={"x": a.coords["time"].values, "y": a.values}, copy=False)
             pyspedas.tplot_tools.data_quants[newname].attrs = copy.deepcopy(
                 pyspedas.tplot_tools.data_quants[tvar].attrs
             )
@@ -5,10 +5,48 @@ Notes
 -----
 Similar to dpwrspc.pro in IDL SPEDAS.
 
+The windows are taken as a strided view of the data, and are detrended, windowed and transformed
+together, a chunk of windows at a time, rather than one spectrum at a time.
+
 """
 
 import logging
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pyspedas.tplot_tools.parallel import parallel_map
+
+# Maximum number of data values in a chunk of windows processed together
+_CHUNK_POINTS = 2**21
+
+
+def window_chunks(nwindows, npoints):
+    """
+    Split a number of windows into chunks that are transformed together.
+
+    Parameters
+    ----------
+        nwindows : int
+            Number of windows
+        npoints : int
+            Number of data values in each window
+
+    Returns
+    -------
+        list of slice
+            Slices of window numbers, with about _CHUNK_POINTS data values in each chunk
+    """
+    step = max(1, _CHUNK_POINTS // max(1, npoints))
+    return [slice(i, min(i + step, nwindows)) for i in range(0, nwindows, step)]
+
+
+def _remove_lines(t, x):
+    # Subtract the least-squares straight line from each row of x (like np.polyfit(t, x, 1))
+    t_mean = t.mean(axis=1, keepdims=True)
+    x_mean = x.mean(axis=1, keepdims=True)
+    dt = t - t_mean
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.sum(dt * (x - x_mean), axis=1, keepdims=True) / np.sum(dt * dt, axis=1, keepdims=True)
+    return x - (x_mean + slope * dt)
 
 
 def dpwrspc(
@@ -24,6 +62,7 @@ def dpwrspc(
     notperhz=False,
     notmvariance=False,
     tm_sensitivity=None,
+    max_workers=1,
 ):
     """
     Compute power spectra.
@@ -66,6 +105,9 @@ def dpwrspc(
         If noTmVariance is set, this number controls how much of a dt anomaly
         is accepted.
         The default is None.
+    max_workers: int, optional
+        Number of threads used to compute the spectra, in chunks of windows.
+        The default is 1.
 
     Returns
     -------
@@ -94,7 +136,7 @@ def dpwrspc(
     if nohanning is False:
         window = np.array(np.hanning(nboxpoints), dtype=np.float64)
     else:
-        window = np.ones(nboxpoints)
+        window = np.ones(int(nboxpoints))
 
     time = np.array(time, dtype=np.float64)
     quantity = np.array(quantity, dtype=np.float64)
@@ -147,97 +189,83 @@ def dpwrspc(
     dps = np.zeros([nspectra, nfreqs])
     fdps = np.zeros([nspectra, nfreqs])
 
-    # Main calculation loop
-    for nthspectrum in range(0, nspectra):
-        nbegin = int(nthspectrum * nshiftpnts)
-        nend = nbegin + nboxpnts
-
-        if nend <= totalpoints:
-            t = times2process[nbegin:nend]
-            t0 = t[0]
-            t = t - t0
-            x = quantity2process[nbegin:nend]
-
-            # Use center time
-            tdps[nthspectrum] = (times2process[nbegin] + times2process[nend - 1]) / 2.0
-
-            if noline is False:
-                coef = np.polyfit(t, x, 1)
-                poly1d_fn = np.poly1d(coef)
-                line = poly1d_fn(t)
-                x = x - line
-
-            if nohanning is False:
-                x = x * window
-
-            bign = nboxpnts
-
-            if bign % 2 != 0:
-                logging.warning(
-                    "dpwrspc: needs an even number of data points, dropping last point..."
-                )
-                t = t[0 : bign - 1]
-                x = x[0 : bign - 1]
-                bign = bign - 1
+    bign = nboxpnts
+    if bign % 2 != 0:
+        logging.warning(
+            "dpwrspc: needs an even number of data points, dropping last point..."
+        )
+        bign = bign - 1
+    half = int(bign / 2)
+    k = np.arange(half + 1)
+    nfinal = int(half / bin)
+    if nohanning is False:
+        wss = float(bign) * float(np.sum(window**2))
 
-            n_tm = len(t)
+    if notmvariance and tm_sensitivity is not None:
+        tmsn = tm_sensitivity
+    else:
+        tmsn = 100.0
 
-            # time variance can break power spectrum
-            # this keyword skips over those gaps
-            if notmvariance and n_tm > 1:
-                if tm_sensitivity is not None:
-                    tmsn = tm_sensitivity
-                else:
-                    tmsn = 100.0
+    # Start of each window, and the windows as strided views of the data
+    nbegins = (np.arange(nspectra) * nshiftpnts).astype(np.int64)
+    time_windows = sliding_window_view(times2process, nboxpnts)
+    data_windows = sliding_window_view(quantity2process, nboxpnts)
 
-                tdiff = t[1:n_tm] - t[0 : n_tm - 1]
-                med_diff = np.median(tdiff)
+    def process(chunk):
+        starts = nbegins[chunk]
+        t = time_windows[starts]
+        t = t - t[:, :1]
+        x = data_windows[starts]
 
-                idx = np.where(np.abs(tdiff / med_diff - 1) > 1.0 / tmsn)
+        # Use center time
+        tdps[chunk] = (times2process[starts] + times2process[starts + nboxpnts - 1]) / 2.0
 
-                if len(idx[0]) > 0:
-                    dps[nthspectrum, :] = float("nan")
-                    fdps[nthspectrum, :] = float("nan")
+        if noline is False:
+            x = _remove_lines(t, x)
 
-                    continue
+        if nohanning is False:
+            x = x * window
 
-            # following Numerical recipes in Fortran, p. 421, sort of...
-            # (actually following the IDL implementation)
-            k = np.array(range(int(bign / 2) + 1))
-            tres = np.median(t[1 : len(t)] - t[0 : len(t) - 1])
-            fk = k / (bign * tres)
+        t = t[:, :bign]
+        x = x[:, :bign]
 
-            xs2 = np.abs(np.fft.fft(x)) ** 2
+        # following Numerical recipes in Fortran, p. 421, sort of...
+        # (actually following the IDL implementation)
+        tdiff = np.diff(t, axis=1)
+        tres = np.median(tdiff, axis=1, keepdims=True)
+        fk = k / (bign * tres)
 
-            pwr = np.zeros(int(bign / 2 + 1))
-            pwr[0] = xs2[0] / bign**2
-            ptmp = 1 + np.array(range(int(bign / 2 - 1)))
-            pwr[1 : int(bign / 2)] = (
-                xs2[1 : int(bign / 2)] + xs2[bign - ptmp]
-            ) / bign**2
-            pwr[int(bign / 2)] = xs2[int(bign / 2)] / bign**2
+        # the power at the positive and negative frequencies are added together
+        xs2 = np.abs(np.fft.rfft(x, axis=1)) ** 2
+        pwr = xs2 / bign**2
+        pwr[:, 1:half] *= 2.0
 
-            if nohanning is False:
-                wss = float(bign) * float(np.sum(window**2))
-                pwr = bign**2 * pwr / wss
+        if nohanning is False:
+            pwr = bign**2 * pwr / wss
 
-            dfreq = bin * (fk[1] - fk[0])
+        dfreq = bin * (fk[:, 1:2] - fk[:, 0:1])
 
-            npwr = len(pwr) - 1
-            nfinal = int(npwr / bin)
-            iarray = np.array(range(nfinal))
-            power = np.zeros(nfinal)
+        # Note: zeroth point includes zero freq. power.
+        iarray = np.arange(nfinal)
+        freqcenter = (fk[:, iarray * bin + 1] + fk[:, iarray * bin + bin]) / 2.0
+        power = pwr[:, 1 : nfinal * bin + 1].reshape(len(starts), nfinal, bin).sum(axis=2)
 
-            # Note: zeroth point includes zero freq. power.
-            freqcenter = (fk[iarray * bin + 1] + fk[iarray * bin + bin]) / 2.0
+        if notperhz is False:
+            power = power / dfreq
 
-            for i in range(bin):
-                power = power + pwr[iarray * bin + i + 1]
+        # time variance can break power spectrum
+        # this keyword skips over those gaps
+        if notmvariance and bign > 1:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                varies = np.any(np.abs(tdiff / tres - 1) > 1.0 / tmsn, axis=1)
+            power[varies] = float("nan")
+            freqcenter[varies] = float("nan")
 
-            if notperhz is False:
-                power = power / dfreq
+        dps[chunk] = power
+        fdps[chunk] = freqcenter
 
-            dps[nthspectrum, :] = power
-            fdps[nthspectrum, :] = freqcenter
+    # the chunks are processed in threads if max_workers > 1 (numpy releases the GIL for the FFTs
+    # and array arithmetic)
+    parallel_map(process, window_chunks(nspectra, nboxpnts), max_workers=max_workers, processes=False)
 
     return tdps, fdps, dps
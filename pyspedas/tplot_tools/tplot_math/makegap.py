@@ -62,8 +62,6 @@ def makegap(var_data, dt=None, margin=0.0, func="nan"):
     if var_data.y.ndim == 1:
         store_data("makegap_tmp", data={"x": x, "y": var_data.y})
     else:  # multiple dimensions
-        var_data_out = None
-        store_data("makegap_tmp", data={"x": x, "y": var_data.y})
         # Check for values, v, or v1, v2, v3
         if len(var_data) == 2:  # No v's
             store_data("makegap_tmp", data={"x": x, "y": var_data.y})
@@ -2,6 +2,9 @@ import numpy as np
 import logging
 import pyspedas
 from pyspedas.tplot_tools import data_exists, store_data, get_data, options
+from pyspedas.tplot_tools.parallel import parallel_map
+from pyspedas.tplot_tools.tplot_math.dpwrspc import window_chunks
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy import signal
 
 
@@ -14,7 +17,7 @@ from scipy import signal
 # Perhaps they calculated it differently?
 
 
-def pwr_spec(tvar, nbp=256, nsp=128, newname=None):
+def pwr_spec(tvar, nbp=256, nsp=128, newname=None, max_workers=1):
     """
     Calculates the power spectrum of a line, and adds a tplot variable for this new spectrogram
 
@@ -28,6 +31,8 @@ def pwr_spec(tvar, nbp=256, nsp=128, newname=None):
             The number of points to shift over to calculate the next FFT
         newname : str, optional
             The name of the new tplot variable created,
+        max_workers : int, optional
+            Number of threads used to compute the spectra.  Default: 1
 
     Returns
     -------
@@ -55,28 +60,36 @@ def pwr_spec(tvar, nbp=256, nsp=128, newname=None):
         logging.warning(
             "Cannot create pwr_spec for variable %s, must be a single line", tvar
         )
+        return
 
+    # All the windows, as a strided view of the data
     l = len(x)
-    x_new = []
-    f_new = []
-    pxx_new = []
     shift_lsp = np.arange(0, l - 1, nsp)
-    for i in shift_lsp:
-        x_n = x[i : i + nbp]
-        y_n = y[i : i + nbp]
-        if len(x_n) < nbp:
-            continue
-
-        median_diff_between_points = np.median(np.diff(x_n))
-        w = signal.get_window("hamming", nbp)
+    shift_lsp = shift_lsp[shift_lsp + nbp <= l]
+    if len(shift_lsp) == 0:
+        logging.error("Not enough points in %s for a power spectrum", tvar)
+        return
+    x_windows = sliding_window_view(x, nbp)
+    y_windows = sliding_window_view(y, nbp)
+    w = signal.get_window("hamming", nbp)
+
+    def process(chunk):
+        x_n = x_windows[shift_lsp[chunk]]
+        median_diff_between_points = np.median(np.diff(x_n, axis=1), axis=1)
+        fs = 1 / median_diff_between_points
+        # The periodogram of all the windows is computed with a unit sampling frequency,
+        # and then scaled to the sampling frequency of each window
         f, pxx = signal.periodogram(
-            y_n, fs=(1 / median_diff_between_points), window=w, detrend="linear"
+            y_windows[shift_lsp[chunk]], fs=1.0, window=w, detrend="linear", axis=-1
         )
-        f = f[1:-1]
-        pxx = pxx[1:-1]
-        x_new.append((x_n[-1] + x_n[0]) / 2)
-        f_new.append(f)
-        pxx_new.append(pxx)
+        f = f[np.newaxis, 1:-1] * fs[:, np.newaxis]
+        pxx = pxx[:, 1:-1] / fs[:, np.newaxis]
+        return (x_n[:, -1] + x_n[:, 0]) / 2, f, pxx
+
+    results = parallel_map(process, window_chunks(len(shift_lsp), nbp), max_workers=max_workers, processes=False)
+    x_new = np.concatenate([r[0] for r in results])
+    f_new = np.concatenate([r[1] for r in results])
+    pxx_new = np.concatenate([r[2] for r in results])
 
     if newname is None:
         newname = tvar + "_pwrspec"
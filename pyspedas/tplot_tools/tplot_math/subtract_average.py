@@ -1,16 +1,57 @@
 
 import logging
+import warnings
+from functools import partial
 import pyspedas
-from pyspedas.tplot_tools import tnames, tplot_copy
+from pyspedas.tplot_tools import tnames, tplot_copy, parallel_map
+from pyspedas.tplot_tools.running_stats import running_statistic
 import numpy
 
 
+def subtract_statistic(data, median=None, width=None):
+    """
+    Subtract the mean (or median) of each column of an array, ignoring NaNs.
+
+    Columns that are all NaN are unchanged.  This is used by subtract_average and clean_spikes.
+
+    Parameters
+    ----------
+        data : numpy.ndarray
+            Data values, with time along the first axis
+        median : bool, optional
+            If True, subtract the median instead of the mean
+        width : int, optional
+            If set, subtract the running mean (or median) over this many points
+
+    Returns
+    -------
+        numpy.ndarray
+            The data minus the mean or median, as floating point values
+    """
+    # Subtracting the average will fail if data is not a floating point type
+    if data.dtype.kind != 'f':
+        data = numpy.float64(data)
+    if width:
+        statistic = running_statistic(data, width, statistic='median' if median else 'mean')
+    else:
+        with warnings.catch_warnings():
+            # all-NaN columns
+            warnings.simplefilter('ignore', RuntimeWarning)
+            if median:
+                statistic = numpy.nanmedian(data, axis=0)
+            else:
+                statistic = numpy.nanmean(data, axis=0)
+    return data - numpy.where(numpy.isnan(statistic), 0, statistic).astype(data.dtype)
+
+
 def subtract_average(
         names,
         newname=None,
         suffix=None,
         overwrite=None,
-        median=None
+        median=None,
+        width=None,
+        max_workers=None
 ):
     """
     Subtracts the average or median from data.
@@ -32,6 +73,13 @@ def subtract_average(
         If it is 0 or not set, then it computes the mean.
         Otherwise, it computes the median.
         Default: None.
+    width: int, optional
+        If set, subtract the running mean (or median) over this many points, centred on each point,
+        instead of the mean (or median) of all the data, to remove a slowly varying baseline.
+        Default: None.
+    max_workers: int, optional
+        Number of variables processed at once (see pyspedas.tplot_tools.set_parallel).
+        Default: None (the default set by set_parallel, normally 1).
 
     Returns
     -------
@@ -43,6 +91,7 @@ def subtract_average(
         >>> pyspedas.store_data('a', data={'x':[0,4,8,12,16], 'y':[1,2,3,4,5]})
         >>> pyspedas.subtract_average('a')
         >>> pyspedas.tplot(['a','a-d'])
+        >>> pyspedas.subtract_average('a', width=3, newname='a-detrended')
 
     """
 
@@ -73,7 +122,11 @@ def subtract_average(
     if len(n_names) != len(old_names):
         n_names = [s + suffix for s in old_names]
 
-    old_names = tnames(names)
+    ptype = 'Median' if median else 'Mean'
+    # all the columns of all the variables are processed, in parallel if requested, and then stored in order
+    results = parallel_map(partial(subtract_statistic, median=median, width=width),
+                           [pyspedas.tplot_tools.data_quants[old].values for old in old_names],
+                           max_workers=max_workers)
 
     for old_idx, old in enumerate(old_names):
         new = n_names[old_idx]
@@ -81,31 +134,7 @@ def subtract_average(
         if new != old:
             tplot_copy(old, new)
 
-        data = pyspedas.tplot_tools.data_quants[new].values
-        # Subtracting the average will fail if data is not a floating point type
-        if data.dtype.kind != 'f':
-            data=numpy.float64(data)
-        dim = data.shape
-        if median:
-            if len(dim) == 1:
-                if not numpy.isnan(data).all():
-                        data -= numpy.nanmedian(data, axis=0)
-            else:
-                for i in range(dim[1]):
-                    if not numpy.isnan(data[:, i]).all():
-                        data[:, i] -= numpy.nanmedian(data[:, i], axis=0)
-            ptype = 'Median'
-        else:
-            if len(dim) == 1:
-                if not numpy.isnan(data).all():
-                    data -= numpy.nanmean(data, axis=0)
-            else:
-                for i in range(dim[1]):
-                    if not numpy.isnan(data[:, i]).all():
-                        data[:, i] -= numpy.nanmean(data[:, i], axis=0)
-            ptype = 'Mean'
-
-        pyspedas.tplot_tools.data_quants[new].values = data
+        pyspedas.tplot_tools.data_quants[new].values = results[old_idx]
 
         logging.info('Subtract ' + ptype + ' was applied to: ' + new)
 
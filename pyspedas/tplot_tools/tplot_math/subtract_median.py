@@ -6,7 +6,8 @@ def subtract_median(
         names,
         newname=None,
         suffix=None,
-        overwrite=None
+        overwrite=None,
+        width=None
 ):
     """
     Subtracts the median from data.
@@ -24,6 +25,10 @@ def subtract_median(
     overwrite: bool, optional
         If set, then tplot variables are replaced.
         Default: None
+    width: int, optional
+        If set, subtract the running median over this many points, centred on each point,
+        instead of the median of all the data.
+        Default: None
 
     Returns
     -------
@@ -39,4 +44,4 @@ def subtract_median(
     """
 
     return subtract_average(names, newname=newname, suffix=suffix, overwrite=overwrite,
-                     median=1)
+                     median=1, width=width)
@@ -9,7 +9,8 @@ Similar to tdeflag.pro in IDL SPEDAS, but now a wrapper for deflag.py
 """
 import logging
 import pyspedas
-from pyspedas.tplot_tools import tnames, deflag
+from pyspedas.tplot_tools import tnames
+from pyspedas.tplot_tools.tplot_math.deflag import deflag_variables
 
 def tdeflag(names,
             flag=None,
@@ -17,7 +18,8 @@ def tdeflag(names,
             newname=None,
             suffix=None,
             overwrite=None,
-            fillval=None
+            fillval=None,
+            max_workers=None
 ):
     """
     Replaces FLAGs in arrays with interpolated or other values.
@@ -49,6 +51,9 @@ def tdeflag(names,
         Default: None
     fillval: int, float (optional)
         Value to use as replacement if method='replace'
+    max_workers: int, optional
+        Number of variables deflagged at once (see pyspedas.tplot_tools.set_parallel).
+        Default: None (the default set by set_parallel, normally 1)
 
     Returns
     -------
@@ -89,8 +94,9 @@ def tdeflag(names,
         n_names = [s + suffix for s in old_names]
         logging.info('input newname has incorrect number of elements')
 
-    for i in range(len(old_names)):
-        deflag(old_names[i], flag, newname=n_names[i], method=method, fillval=fillval)
-        logging.info('tdeflag was applied to: ' + n_names[i])
+    # the variables are deflagged in parallel if requested, and then stored in order
+    deflag_variables(old_names, n_names, flag, method, fillval, max_workers=max_workers)
+    for new in n_names:
+        logging.info('tdeflag was applied to: ' + new)
 
     return n_names
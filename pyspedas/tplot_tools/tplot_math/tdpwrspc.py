@@ -27,6 +27,7 @@ def tdpwrspc(
     noline=False,
     notperhz=False,
     notmvariance=False,
+    max_workers=1,
 ):
     """
     Compute power spectra for a tplot variable.
@@ -65,6 +66,9 @@ def tdpwrspc(
         If True, replace output spectrum for any windows that have variable.
         cadence with NaNs.
         Default: False
+    max_workers: int, optional
+        Number of threads used to compute the spectra.
+        Default: 1
 
     Returns
     -------
@@ -121,6 +125,7 @@ def tdpwrspc(
                         noline=noline,
                         notperhz=notperhz,
                         notmvariance=notmvariance,
+                        max_workers=max_workers,
                     )
                 )
             return out_vars
@@ -176,6 +181,7 @@ def tdpwrspc(
                 noline=noline,
                 notperhz=notperhz,
                 notmvariance=notmvariance,
+                max_workers=max_workers,
             )
 
             if pwrspc is not None:
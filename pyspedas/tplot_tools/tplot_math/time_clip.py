@@ -8,9 +8,60 @@ Similar to tclip.pro in IDL SPEDAS.
 """
 import logging
 import pyspedas
-from pyspedas.tplot_tools import store_data, get_data, tnames, time_float, time_string, tplot_copy
+from pyspedas.tplot_tools import store_data, get_data, tnames, time_float, time_string, tplot_copy, parallel_map
+from pyspedas.tplot_tools.get_data import get_unix_times, times_sorted
+from pyspedas.tplot_tools.copy_on_write import shared_copy
 import numpy as np
 import copy
+from functools import partial
+
+
+def _clip_sorted(data_quant, time_start, time_end):
+    # Clip a variable with sorted times using a binary search for the start and end indices.
+    # The clipped slice is copied, so that it doesn't keep the unclipped arrays in memory or share
+    # them with the original.  No tplot variables are changed, so several variables can be clipped
+    # in parallel.
+    # Returns the clipped copy, data_quant itself if nothing is clipped, or None if the variable
+    # needs the general (masked) clip.
+    if isinstance(data_quant, dict) or not times_sorted(data_quant):
+        return None
+    times = get_unix_times(data_quant)
+    start = np.searchsorted(times, time_start, side='left')
+    end = np.searchsorted(times, time_end, side='right')
+    if end <= start:
+        # no data in range; handled (and reported) by the general clip
+        return None
+    if start == 0 and end == len(times):
+        return data_quant
+
+    # this also deep-copies the metadata
+    clipped = data_quant.isel(time=slice(start, end)).copy(deep=True)
+    plot_options = clipped.attrs.get('plot_options')
+    if plot_options is not None:
+        error = plot_options.get('error')
+        if isinstance(error, np.ndarray) and error.ndim > 0 and len(error) == len(times):
+            plot_options['error'] = error[start:end].copy()
+        if plot_options.get('yaxis_opt') is not None:
+            plot_options['yaxis_opt']['y_range'] = None
+    return clipped
+
+
+def _store_sorted_clip(name, new_name, data_quant, clipped, copy_data):
+    # Store the result of _clip_sorted; if nothing was clipped, a new variable shares the original's
+    # arrays (copy-on-write, see tplot_copy) unless copy_data is set.
+    if clipped is data_quant:
+        logging.debug('Time clip returns full data set for variable '+name)
+        if new_name != name:
+            if copy_data:
+                pyspedas.tplot_tools.data_quants[new_name] = data_quant.copy(deep=True)
+                pyspedas.tplot_tools.data_quants[new_name].name = new_name
+            else:
+                pyspedas.tplot_tools.data_quants[new_name] = shared_copy(data_quant, new_name)
+        return
+    clipped.name = new_name
+    pyspedas.tplot_tools.data_quants[new_name] = clipped
+    logging.debug('Time clip was applied to: ' + new_name)
+
 
 def time_clip(
         names,
@@ -19,7 +70,9 @@ def time_clip(
         newname=None,
         suffix='-tclip',
         overwrite=False,
-        interior_clip=False
+        interior_clip=False,
+        copy_data=False,
+        max_workers=None
 ):
     """
     Clip data from time_start to time_end.
@@ -45,6 +98,14 @@ def time_clip(
         If true, reverse sense of operation and clip out times within the start/end range, for example,
         when manually despiking data.
         Default: False
+    copy_data: bool, optional
+        Variables with sorted times are clipped by binary search, and the clipped data is copied.  If the
+        requested range covers all of a variable's data, a new variable shares the data arrays of the input
+        variable (copy-on-write, as with tplot_copy) unless this is true.
+        Default: False
+    max_workers: int, optional
+        Number of variables with sorted times clipped at once (see pyspedas.tplot_tools.set_parallel).
+        Default: None (the default set by set_parallel, normally 1)
 
     Returns
     -------
@@ -110,11 +171,24 @@ def time_clip(
         logging.error('time_clip: Start time ' + time_start_str +' is larger than end time ' + time_end_str)
         return
 
+    # variables with sorted times are clipped in parallel if requested, and then stored in order
+    data_quants = [pyspedas.tplot_tools.data_quants[name] for name in old_names]
+    if interior_clip:
+        sorted_clips = [None] * len(old_names)
+    else:
+        sorted_clips = parallel_map(partial(_clip_sorted, time_start=time_start_float, time_end=time_end_float),
+                                    data_quants, max_workers=max_workers, processes=False)
+
     for j in range(len(old_names)):
+        if sorted_clips[j] is not None:
+            _store_sorted_clip(old_names[j], n_names[j], data_quants[j], sorted_clips[j], copy_data)
+            continue
+
         if old_names[j] != n_names[j]:
             tplot_copy(old_names[j], n_names[j])
 
-        alldata = get_data(n_names[j])
+        # lazy=True: chunked (dask-backed) data stays lazy, and is clipped chunk by chunk when computed
+        alldata = get_data(n_names[j], lazy=True)
         metadata = copy.deepcopy(get_data(n_names[j], metadata=True))
 
         if not isinstance(alldata, tuple): # NRV variable
@@ -188,39 +262,39 @@ def time_clip(
                     'x': time[cond],
                     'y': data[cond, :, :, :],
                     'v1': v1_data, 'v2': v2_data, 'v3': v3_data},
-                    attr_dict=metadata)
+                    attr_dict=metadata, copy=False)
             elif 'v1' in tmp_q.coords.keys() and\
                     'v2' in tmp_q.coords.keys():
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond, :, :],
                     'v1': v1_data, 'v2': v2_data},
-                    attr_dict=metadata)
+                    attr_dict=metadata, copy=False)
             elif 'v1' in tmp_q.coords.keys():
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond, :],
-                    'v1': v1_data}, attr_dict=metadata)
+                    'v1': v1_data}, attr_dict=metadata, copy=False)
             elif 'spec_bins' in tmp_q.coords.keys():
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond, :],
-                    'v': v_data}, attr_dict=metadata)
+                    'v': v_data}, attr_dict=metadata, copy=False)
             elif 'v' in tmp_q.coords.keys():
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond, :],
-                    'v': v_data}, attr_dict=metadata)
+                    'v': v_data}, attr_dict=metadata, copy=False)
             elif data.ndim == 1:
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond]},
-                    attr_dict=metadata)
+                    attr_dict=metadata, copy=False)
             else:
                 store_data(n_names[j], data={
                     'x': time[cond],
                     'y': data[cond]},
-                    attr_dict=metadata)
+                    attr_dict=metadata, copy=False)
         except Exception as e:
             logging.error('Problem time clipping: ' + n_names[j])
             logging.error('Exception:'+str(e))
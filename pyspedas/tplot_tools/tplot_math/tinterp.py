@@ -5,6 +5,7 @@
 
 import pyspedas
 import copy
+from pyspedas.tplot_tools.interp_plan import interp_data_quant
 
 
 def tinterp(tvar1,tvar2,replace=False):
@@ -32,13 +33,18 @@ def tinterp(tvar1,tvar2,replace=False):
         >>> pyspedas.tinterp('a','c')
 
     """
-    new_tvar2 = pyspedas.tplot_tools.data_quants[tvar2].interp_like(pyspedas.tplot_tools.data_quants[tvar1])
+    # linear interpolation with a cached plan, falling back to xarray for variables that can't use one
+    new_tvar2 = interp_data_quant(pyspedas.tplot_tools.data_quants[tvar2],
+                                  pyspedas.tplot_tools.data_quants[tvar1].coords['time'].values)
+    if new_tvar2 is None:
+        new_tvar2 = pyspedas.tplot_tools.data_quants[tvar2].interp_like(pyspedas.tplot_tools.data_quants[tvar1])
 
     if replace:
         pyspedas.tplot_tools.data_quants[tvar2] = new_tvar2
         return
     else:
-        pyspedas.tplot_tools.data_quants[tvar1 + '_tinterp'] = copy.deepcopy(new_tvar2)
+        # interp_like has already created new data arrays; only the attributes are shared with tvar2
+        pyspedas.tplot_tools.data_quants[tvar1 + '_tinterp'] = new_tvar2
         pyspedas.tplot_tools.data_quants[tvar1 + '_tinterp'].attrs = copy.deepcopy(new_tvar2.attrs)
         pyspedas.tplot_tools.data_quants[tvar1 + '_tinterp'].name = tvar1 + '_tinterp'
 
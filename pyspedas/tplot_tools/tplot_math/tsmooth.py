@@ -11,23 +11,29 @@ Also, see: https://www.harrisgeospatial.com/docs/SMOOTH.html
 """
 import logging
 import math
+from functools import partial
 import numpy as np
 import pyspedas
-from pyspedas.tplot_tools import tnames, tplot_copy
+from pyspedas.tplot_tools import tnames, tplot_copy, parallel_map
+from pyspedas.tplot_tools.running_stats import window_sums, window_medians
 
 
-def smooth(data, width=10, preserve_nans=None):
+
+def smooth(data, width=10, preserve_nans=None, median=None):
     """
     Boxcar average.
 
     Parameters
     ----------
     data : list of floats
-        The data should be a one-dim array.
+        The data should be a one-dim array.  For numpy arrays with more than one dimension,
+        each column is smoothed along the first dimension.
     width : float, optional
         Data window to use for smoothing. The default is 10.
     preserve_nans : bool, optional
         If None, then replace NaNs. The default is None.
+    median : bool, optional
+        If True, use the median of each window instead of the average. The default is None.
 
     Returns
     -------
@@ -48,24 +54,46 @@ def smooth(data, width=10, preserve_nans=None):
         logging.error("smooth: Not enough points.")
         return result
 
-    for i, d in enumerate(data):
-        if (i >= (width-1)/2) and (i <= N-(width+1)/2):
-            if (preserve_nans is not None) and data[i] is np.nan:
-                continue
-            tsum = 0
-            count = 0
-            for j in range(int(width)):
-                idx = math.ceil(i+j-width/2)
-                if data[idx] is not np.nan:
-                    tsum += data[idx]
-                    count += 1
-            if count > 0:  # otherwise, all NaN
-                result[i] = (1/width) * tsum
+    # the points with a full window, and the offset of the start of each window from its point
+    first = math.ceil((width - 1) / 2)
+    last = math.floor(N - (width + 1) / 2)
+    offset = math.ceil(-width / 2)
+    npts = int(width)
+    nwin = last - first + 1
+    if npts < 1 or nwin < 1:
+        return result
+    lo = first + offset
+
+    if isinstance(data, np.ndarray):
+        # NaNs in numpy arrays propagate into every window that contains them
+        values = data[lo:lo + nwin + npts - 1].astype(np.float64)
+        if median:
+            smoothed = window_medians(values, npts, nwin, skip_nans=False)
+        else:
+            smoothed = (1/width) * window_sums(values, npts, nwin)
+        result[first:last + 1] = smoothed
+        return result
+
+    # for lists, np.nan entries are skipped
+    is_nan = np.array([d is np.nan for d in data])
+    values = np.array(data, dtype=np.float64)
+    window_nans = is_nan[lo:lo + nwin + npts - 1]
+    values = values[lo:lo + nwin + npts - 1]
+    if median:
+        smoothed = window_medians(np.where(window_nans, np.nan, values), npts, nwin, skip_nans=True)
+    else:
+        smoothed = (1/width) * window_sums(np.where(window_nans, 0.0, values), npts, nwin)
+    count = window_sums((~window_nans).astype(np.float64), npts, nwin)
+    update = count > 0  # otherwise, all NaN
+    if preserve_nans is not None:
+        update &= ~is_nan[first:last + 1]
+    for i in np.flatnonzero(update):
+        result[first + i] = float(smoothed[i])
     return result
 
 
 def tsmooth(names, width=10, median=None, preserve_nans=None,
-            newname=None, suffix=None, overwrite=None):
+            newname=None, suffix=None, overwrite=None, max_workers=None):
     """
     Smooths a tplot variable.
 
@@ -76,7 +104,7 @@ def tsmooth(names, width=10, median=None, preserve_nans=None,
     width: int, optional
         Data window to use for smoothing. The default is 10.
     median: bool, optional
-        Apply the median as well. The default is None.
+        If True, use a running median instead of the boxcar average. The default is None.
     preserve_nans: bool, optional
         If None, then replace NaNs. The default is None.
     newname: str/list of str, optional
@@ -89,6 +117,9 @@ def tsmooth(names, width=10, median=None, preserve_nans=None,
     overwrite: bool, optional
         Replace the existing tplot name.
         The default is None.
+    max_workers: int, optional
+        Number of variables smoothed at once (see pyspedas.tplot_tools.set_parallel).
+        The default is None (the default set by set_parallel, normally 1).
 
     Returns
     -------
@@ -125,23 +156,18 @@ def tsmooth(names, width=10, median=None, preserve_nans=None,
     if len(n_names) != len(old_names):
         n_names = [s + suffix for s in old_names]
 
+    # all columns of all the variables are smoothed, in parallel if requested, and then stored in order
+    smoothed = parallel_map(partial(smooth, width=width, preserve_nans=preserve_nans, median=median),
+                            [pyspedas.tplot_tools.data_quants[old].values for old in old_names],
+                            max_workers=max_workers)
+
     for i, old in enumerate(old_names):
         new = n_names[i]
 
         if new != old:
             tplot_copy(old, new)
 
-        data = pyspedas.tplot_tools.data_quants[new].values
-
-        dim = data.shape
-        if len(dim) == 1:
-            data = smooth(data, width=width, preserve_nans=preserve_nans)
-        else:
-            for k in range(dim[1]):
-                data[:, k] = smooth(data[:, k], width=width,
-                                    preserve_nans=preserve_nans)
-
-        pyspedas.tplot_tools.data_quants[new].values = data
+        pyspedas.tplot_tools.data_quants[new].values = smoothed[i]
 
         logging.info('tsmooth was applied to: ' + new)
 
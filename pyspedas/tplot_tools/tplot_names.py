@@ -35,8 +35,10 @@ def tplot_names(quiet=False):
 
     # TODO: Print out links as well?
 
-    for key, _ in pyspedas.tplot_tools.data_quants.items():
-        if isinstance(pyspedas.tplot_tools.data_quants[key], dict):
+    # Iterating over items() rather than indexing data_quants doesn't count as an access to each
+    # variable, so variables spilled to disk under a memory budget aren't read back in.
+    for key, data_quant in pyspedas.tplot_tools.data_quants.items():
+        if isinstance(data_quant, dict):
             # non-record varying variables are stored as dictionaries
             if isinstance(key, str):
                 names_to_print = key
@@ -48,17 +50,17 @@ def tplot_names(quiet=False):
             index += 1
             continue
 
-        if len(pyspedas.tplot_tools.data_quants[key].attrs['plot_options']['overplots_mpl']) != 0:
+        if len(data_quant.attrs['plot_options']['overplots_mpl']) != 0:
             if quiet:
                 # In this context we only want variable names, and no other formatting
-                names_to_print = pyspedas.tplot_tools.data_quants[key].name
+                names_to_print = data_quant.name
             else:
-                names_to_print = pyspedas.tplot_tools.data_quants[key].name + "  data from: "
-                for oplot_name in pyspedas.tplot_tools.data_quants[key].attrs['plot_options']['overplots_mpl']:
+                names_to_print = data_quant.name + "  data from: "
+                for oplot_name in data_quant.attrs['plot_options']['overplots_mpl']:
                     names_to_print = names_to_print + " " + oplot_name
         else:
             if isinstance(key, str):
-                names_to_print = pyspedas.tplot_tools.data_quants[key].name
+                names_to_print = data_quant.name
 
         if quiet != True:
             print(index, ":", names_to_print)
@@ -42,28 +42,26 @@ def tplot_rename(old_name, new_name):
         logging.info("The name %s is currently not in pyspedas", old_name)
         return
 
-    # remake dictionary with new name in old name's slot
+    # rename the variable in its old slot
 
     # Why not just delete/reinsert the variable being renamed?  Doing it this way
     # preserves the ordering of variables in the dictionary.  This matches the IDL
     # behavior, where if 'tha_fit' is the first variable in the list, with index 0,
     # tplot_rename,'tha_fit', 'tha_fit_rename'
     # keeps 'tha_fit_rename' at position 0.
-    # No arrays are being copied here, only references, so it's not as inefficient as
-    # it might look.
+    # No arrays are copied, and the variable keeps its place in the least recently used
+    # order used by the memory budget (see DataQuants.rename).
     # If the variable being renamed is part of a pseudovariable, you'll end up
     # with a dangling reference to the old name.  This also matches the IDL behavior,
     # but should it?   JWL 2024/07/31
 
     d = pyspedas.tplot_tools.data_quants
-    d2 = OrderedDict([(new_name, v) if k == old_name else (k, v) for k, v in d.items()])
-    new_data_quants = d2
-    for key in d2:
-        if isinstance(new_data_quants[key], dict):
-            # the variable is non-record varying
-            new_data_quants[key]['name'] = key
-        else:
-            new_data_quants[key].name = key
-    
-    pyspedas.tplot_tools.data_quants = new_data_quants
+    d.rename(old_name, new_name)
+    # use OrderedDict.__getitem__ so that renaming doesn't count as an access
+    data_quant = OrderedDict.__getitem__(d, new_name)
+    if isinstance(data_quant, dict):
+        # the variable is non-record varying
+        data_quant['name'] = new_name
+    else:
+        data_quant.name = new_name
     return
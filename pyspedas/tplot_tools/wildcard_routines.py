@@ -1,9 +1,210 @@
 import fnmatch
 import logging
+import re
+import sys
+from bisect import bisect_left
+from functools import lru_cache
 
 from pyspedas.tplot_tools import data_quants
 from pyspedas.tplot_tools import tplot_names
 
+_WILDCARD_CHARS = re.compile(r'[*?\[]')
+
+
+@lru_cache(maxsize=4096)
+def _compile_pattern(pattern):
+    # Compiled matcher for a wildcard pattern (same semantics as fnmatch.fnmatchcase)
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+@lru_cache(maxsize=4096)
+def _compile_line_pattern(pattern):
+    # Compiled regex finding the lines matching a wildcard pattern (with only * and ? wildcards)
+    # in newline-separated text that also starts and ends with a newline
+    parts = []
+    for part in re.split(r'([*?])', pattern):
+        if part == '*':
+            parts.append('[^\n]*')
+        elif part == '?':
+            parts.append('[^\n]')
+        elif part:
+            parts.append(re.escape(part))
+    return re.compile('\n' + ''.join(parts) + '(?=\n)')
+
+
+class NameIndex:
+    """
+    An index of a list of names, for fast wildcard pattern matching.
+
+    Patterns without wildcards are looked up in a dictionary.  Patterns using only the * and ?
+    wildcards are matched by a single regular expression search of all the names, joined into
+    one string (reversed, if that lets the search start from a literal suffix rather than a
+    wildcard).  Patterns with a selective literal prefix, or with [...] character sets, are compared
+    name by name, but only against the names sharing that prefix, found by a binary search in a
+    sorted copy of the names.  The lookup tables are built on first use.
+
+    Parameters
+    ----------
+    names: list of str
+        The names to be indexed
+
+    Examples
+    --------
+    >>> from pyspedas.tplot_tools.wildcard_routines import NameIndex
+    >>> index = NameIndex(['mms1_mec_r_sm', 'mms2_mec_r_sm', 'tha_pos_gsm'])
+    >>> index.match('mms?_mec_r_sm')
+    [0, 1]
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._lower = None
+        self._lookup = None
+        self._sorted = {}
+        self._joined = {}
+
+    def _keys(self, case_sensitive):
+        if case_sensitive:
+            return self.names
+        if self._lower is None:
+            self._lower = [name.lower() for name in self.names]
+        return self._lower
+
+    def lookup(self):
+        """ Return a dictionary of the position of each name (the first position, if there are duplicates) """
+        if self._lookup is None:
+            # built in reverse so that the first occurrence of duplicate names is kept
+            self._lookup = dict(zip(reversed(self.names), range(len(self.names) - 1, -1, -1)))
+        return self._lookup
+
+    def _sorted_keys(self, case_sensitive):
+        if case_sensitive not in self._sorted:
+            keys = self._keys(case_sensitive)
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._sorted[case_sensitive] = ([keys[i] for i in order], order)
+        return self._sorted[case_sensitive]
+
+    def _joined_keys(self, case_sensitive, reverse):
+        # The names joined into one newline-separated string, with a dictionary mapping the offset
+        # of the newline preceding each name to its position.  None if a name contains a newline.
+        if (case_sensitive, reverse) not in self._joined:
+            keys = self._keys(case_sensitive)
+            positions = range(len(keys))
+            if reverse:
+                keys = [key[::-1] for key in reversed(keys)]
+                positions = reversed(positions)
+            text = '\n' + '\n'.join(keys) + '\n'
+            if text.count('\n') != len(keys) + 1:
+                joined = None
+            else:
+                offsets = {}
+                offset = 0
+                for key, position in zip(keys, positions):
+                    offsets[offset] = position
+                    offset += len(key) + 1
+                joined = (text, offsets)
+            self._joined[(case_sensitive, reverse)] = joined
+        return self._joined[(case_sensitive, reverse)]
+
+    def __contains__(self, name):
+        return name in self.lookup()
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, pattern, case_sensitive=True):
+        """ Return the positions, in order, of the names matching a wildcard pattern
+
+        Parameters
+        ----------
+        pattern: str
+            Pattern, which may contain the wildcard characters *, ? and [...]
+        case_sensitive: bool
+            If False, the pattern and names are compared in lower case.  Default: True
+
+        Returns
+        -------
+        list of int
+            Positions in the list of names of every name matching the pattern
+        """
+        if not case_sensitive:
+            pattern = pattern.lower()
+        wildcard = _WILDCARD_CHARS.search(pattern)
+        if wildcard is None and case_sensitive:
+            position = self.lookup().get(pattern)
+            return [] if position is None else [position]
+        if pattern and pattern.strip('*') == '':
+            return list(range(len(self.names)))
+
+        prefix = pattern[:wildcard.start()] if wildcard is not None else pattern
+        if prefix:
+            # Only the names starting with the literal prefix can match
+            sorted_keys, order = self._sorted_keys(case_sensitive)
+            lo = bisect_left(sorted_keys, prefix)
+            if ord(prefix[-1]) < sys.maxunicode:
+                hi = bisect_left(sorted_keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+            else:
+                hi = len(sorted_keys)
+            if '[' in pattern or (hi - lo) * 16 < len(sorted_keys):
+                # Few enough candidates that checking them one at a time is faster than a full search
+                match = _compile_pattern(pattern)
+                return sorted(order[k] for k in range(lo, hi) if match(sorted_keys[k]))
+
+        if '[' not in pattern:
+            # Search from whichever end of the pattern is literal
+            reverse = pattern[:1] in ('*', '?') and pattern[-1:] not in ('*', '?')
+            joined = self._joined_keys(case_sensitive, reverse)
+            if joined is not None:
+                text, offsets = joined
+                if reverse:
+                    pattern = pattern[::-1]
+                positions = [offsets[m.start()] for m in _compile_line_pattern(pattern).finditer(text)]
+                if reverse:
+                    positions.reverse()
+                return positions
+
+        match = _compile_pattern(pattern)
+        return [i for i, key in enumerate(self._keys(case_sensitive)) if match(key)]
+
+
+def _expand_index(index, patterns, case_sensitive=True, quiet=False):
+    # Names in the index matching any of the patterns, in the order of the patterns, without duplicates
+    matched_items = set()
+    ordered_matches = []
+    for pattern in patterns:
+        positions = index.match(pattern, case_sensitive=case_sensitive)
+        if not positions and not quiet:
+            logging.warning("wildcard_expand: No match found for %s", pattern if case_sensitive else pattern.lower())
+        for position in positions:
+            item = index.names[position]
+            if item not in matched_items:
+                ordered_matches.append(item)
+                matched_items.add(item)
+    return ordered_matches
+
+
+# Index of the current tplot variable names, rebuilt when variables are added or removed
+_tplot_name_index = {'key': None, 'index': None}
+
+
+def tplot_name_index():
+    """ Return a NameIndex of the current tplot variable names
+
+    The index is cached, and only rebuilt after tplot variables have been added, removed or renamed.
+
+    Returns
+    -------
+    NameIndex
+        Index of the names returned by tplot_names()
+
+    """
+    version = getattr(data_quants, 'keys_version', None)
+    key = (id(data_quants), version)
+    if version is None or _tplot_name_index['key'] != key:
+        _tplot_name_index['index'] = NameIndex(tplot_names(quiet=True))
+        _tplot_name_index['key'] = key
+    return _tplot_name_index['index']
+
 def wildcard_expand(master_list, patterns, case_sensitive=True, split_whitespace=True, quiet=False):
     """ Find elements in master list matching one or more wild card patterns
 
@@ -48,9 +249,6 @@ def wildcard_expand(master_list, patterns, case_sensitive=True, split_whitespace
         # One could argue that it makes sense to return the entire master list here?
         return []
 
-    matched_items=set()
-    ordered_matches=[]
-
     # Convert inputs to lists if necessary
     if isinstance(patterns, str):
         patterns=[patterns]
@@ -80,28 +278,7 @@ def wildcard_expand(master_list, patterns, case_sensitive=True, split_whitespace
         patterns=expanded_patterns
 
 
-    # Prepare temporary lists for matching
-    if case_sensitive:
-        temp_master_list = master_list
-        temp_patterns = patterns
-    else:
-        temp_master_list = [item.lower() for item in master_list]
-        temp_patterns = [pattern.lower() for pattern in patterns]
-
-    # Check each pattern against each item in the master list using fnmatchcase
-    for pattern in temp_patterns:
-        found = False
-        for temp_item, original_item in zip(temp_master_list, master_list):
-            if fnmatch.fnmatchcase(temp_item, pattern) and original_item not in matched_items:
-                found = True
-                ordered_matches.append(original_item)
-                matched_items.add(original_item)
-            elif fnmatch.fnmatchcase(temp_item, pattern):
-                found = True
-        if not found and not quiet:
-            logging.warning("wildcard_expand: No match found for %s", pattern)
-
-    return ordered_matches
+    return _expand_index(NameIndex(master_list), patterns, case_sensitive=case_sensitive, quiet=quiet)
 
 def tname_byindex(tvar_index):
     """ Return a tplot variable name given an integer index
@@ -138,12 +315,7 @@ def tindex_byname(tvar_name):
         Index of the variable name, or None if not found
 
     """
-    namelist = list(data_quants.keys())
-    try:
-        index = namelist.index(tvar_name)
-        return index
-    except ValueError:
-        return None
+    return tplot_name_index().lookup().get(tvar_name)
 
 
 def tplot_wildcard_expand(patterns, case_sensitive=True, quiet=False):
@@ -177,8 +349,8 @@ def tplot_wildcard_expand(patterns, case_sensitive=True, quiet=False):
         return []
 
     string_patterns = []
-    # Get list of existing tplot names
-    tn = tplot_names(quiet=True)
+    # Get the (cached) index of existing tplot names
+    tn = tplot_name_index()
 
     if len(tn) == 0:
         if not quiet:
@@ -192,7 +364,8 @@ def tplot_wildcard_expand(patterns, case_sensitive=True, quiet=False):
             if name is not None:
                 string_patterns.append(name)
             else:
-                string_patterns.append(item)
+                # out of range (already reported by tname_byindex)
+                string_patterns.append(str(item))
         elif isinstance(item,str):
             # tplot names can have embedded spaces, but we also want to allow space-delimited
             # lists. If a space-delimited list is provided, check to see if the un-split version is
@@ -211,4 +384,7 @@ def tplot_wildcard_expand(patterns, case_sensitive=True, quiet=False):
         else:
             logging.warning("tplot_wildcard_expand: bad input: "+str(item) +" Patterns must be a string or int")
 
-    return wildcard_expand(tn, patterns=string_patterns, case_sensitive=case_sensitive, split_whitespace=False, quiet=quiet)
\ No newline at end of file
+    if len(string_patterns) == 0 or string_patterns == ['']:
+        logging.warning("wildcard_expand: empty pattern list")
+        return []
+    return _expand_index(tn, string_patterns, case_sensitive=case_sensitive, quiet=quiet)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import numpy as np
 from scipy import interpolate
+from pyspedas.tplot_tools.interp_plan import interp_plan
 
 def interpol(
     data,
@@ -18,7 +19,9 @@ def interpol(
         Time array.
     out_times: list of float
         Time array to interpolate to
-    fill_value: str, optional
+    fill_value: str or float, optional
+        "extrapolate" to extrapolate beyond the first and last data times,
+        or the value to use there.
         Default: "extrapolate"
 
     Returns
@@ -39,6 +42,16 @@ def interpol(
     if isinstance(data, list):
         data = np.array(data)
 
+    # All the columns are interpolated at once, with a cached interpolation plan
+    extrapolate = isinstance(fill_value, str) and fill_value == "extrapolate"
+    scalar_fill = np.isscalar(fill_value) and not isinstance(fill_value, str)
+    if (extrapolate or scalar_fill) and data.ndim <= 2 and len(data) >= 2 and data.dtype.kind in 'iuf' \
+            and np.ndim(out_times) == 1:
+        plan = interp_plan(data_times, out_times)
+        if extrapolate:
+            return plan.apply(data, extrapolate=True)
+        return plan.apply(data, fill_value=fill_value)
+
     if len(data.shape) == 2:
         out = np.empty((len(out_times), len(data[0, :])))
         for data_idx in np.arange(len(data[0, :])):
@@ -1,5 +1,7 @@
 """
-Creates a deep copy of a plot variable, with a new name.
+Creates a copy of a plot variable, with a new name.
+
+The copy shares the data arrays of the original, as read-only views, until either is modified (see tplot_copy).
 
 Notes
 -----
@@ -8,8 +10,8 @@ Allowed wildcards are ? for a single character, * from multiple characters.
 """
 import logging
 import pyspedas
-import pyspedas
 import copy
+from pyspedas.tplot_tools.copy_on_write import shared_copy
 
 
 def tcopy_one(name_in, name_out):
@@ -30,8 +32,13 @@ def tcopy_one(name_in, name_out):
     """
     # Copies one tplot variable
     tvar_old = pyspedas.tplot_tools.data_quants[name_in]
-    tvar_new = copy.deepcopy(tvar_old)
-    tvar_new.name = name_out
+    if isinstance(tvar_old, dict):
+        # non-record varying variable
+        tvar_new = copy.deepcopy(tvar_old)
+        tvar_new['name'] = name_out
+    else:
+        # the data arrays are shared (copy-on-write) rather than copied
+        tvar_new = shared_copy(tvar_old, name_out)
     pyspedas.tplot_tools.data_quants.update({name_out: tvar_new})
     logging.info(name_in + ' copied to ' + name_out)
 
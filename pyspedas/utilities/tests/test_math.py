@@ -1,11 +1,13 @@
 """Automated tests for tplot math and utility functions."""
 
 import unittest
+import importlib.util
 import math
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 from pyspedas import (
     clean_spikes,
+    deflag,
     smooth,
     tsmooth,
     tdotp,
@@ -29,6 +31,8 @@ from pyspedas import (
     spec_mult,
     data_exists,
     time_float,
+    time_clip,
+    tdeflag,
 )
 
 
@@ -162,6 +166,26 @@ class AnalysisTestCases(BaseTestCase):
         clean_spikes(["test", "test1"], newname="test1-desp")
         clean_spikes("test1", overwrite=1)
         self.assertTrue(len(d2[1]) == 6)
+        # a spike in one column is removed, along with the neighbors it pulls the smoothed values away from
+        y = np.ones((8, 2))
+        y[4, 1] = 10.0
+        store_data("spike", data={"x": np.arange(8.0), "y": y})
+        clean_spikes("spike", nsmooth=3)
+        d3 = get_data("spike-despike")
+        assert_array_equal(np.argwhere(np.isnan(d3.y)), [[3, 1], [4, 1], [5, 1]])
+
+    def test_deflag_columns(self):
+        """Test deflag filling the flagged values in several columns at once."""
+        y = np.array([[np.nan, 1.0], [2.0, -1.0], [np.nan, 3.0], [4.0, -1.0], [np.nan, -1.0]])
+        store_data("flagged", data={"x": [0.0, 1.0, 2.0, 4.0, 5.0], "y": y})
+        deflag("flagged", method="linear", newname="flagged_linear")
+        deflag("flagged", method="repeat", newname="flagged_repeat")
+        deflag("flagged", flag=-1, method="linear", newname="flagged_linear_m1")
+        deflag("flagged", method="remove_nan", newname="flagged_removed")
+        assert_array_equal(get_data("flagged_linear").y[:, 0], [2.0, 2.0, 8.0 / 3, 4.0, 4.0])
+        assert_array_equal(get_data("flagged_repeat").y[:, 0], [2.0, 2.0, 2.0, 4.0, 4.0])
+        assert_array_equal(get_data("flagged_linear_m1").y[:, 1], [1.0, 2.0, 3.0, 3.0, 3.0])
+        assert_array_equal(get_data("flagged_removed").times, [1.0, 4.0])
 
     def test_tsmooth(self):
         """Test smooth."""
@@ -205,6 +229,21 @@ class AnalysisTestCases(BaseTestCase):
         tsmooth(["test", "test-s"], newname="testtest2")
         self.assertTrue(d[1].tolist() == [3.0, 5.0, 8.0, 15.0, 20.0, 1.0])
 
+    def test_tsmooth_columns(self):
+        """Test smoothing all the columns of a variable at once, with the boxcar average and the median."""
+        y = np.array([[1.0, 5.0, 2.0, 8.0, 3.0, 9.0, 4.0], [1.0, 1.0, np.nan, 1.0, 1.0, 1.0, 1.0]]).T
+        store_data("smooth_cols", data={"x": np.arange(7.0), "y": y})
+        tsmooth("smooth_cols", width=3)
+        tsmooth("smooth_cols", width=3, median=True, newname="smooth_cols-m")
+        d = get_data("smooth_cols-s")
+        assert_allclose(d.y[:, 0], [1.0, 8.0 / 3, 5.0, 13.0 / 3, 20.0 / 3, 16.0 / 3, 4.0])
+        assert_allclose(d.y[:, 1], [1.0, np.nan, np.nan, np.nan, 1.0, 1.0, 1.0])
+        d = get_data("smooth_cols-m")
+        assert_allclose(d.y[:, 0], [1.0, 2.0, 5.0, 3.0, 8.0, 4.0, 4.0])
+        # wide windows use running sums
+        x = np.random.default_rng(1).normal(size=200)
+        assert_allclose(smooth(x, width=50)[25:175], np.convolve(x, np.ones(50) / 50, mode="valid")[:150])
+
     def test_tplot_arithmetic(self):
         del_data("*")
         times = [0.0, 1.0, 2.0, 3.0, 4.0]
@@ -230,6 +269,126 @@ class AnalysisTestCases(BaseTestCase):
         dt = tres("v1")
         self.assertEqual(dt, 1.0)
 
+    @unittest.skipIf(importlib.util.find_spec("dask") is None, "dask is not installed")
+    def test_chunked_arithmetic(self):
+        from pyspedas import time_clip, avg_data, tcompute
+        from pyspedas.tplot_tools import data_quants, is_chunked
+
+        del_data("*")
+        times = np.arange(100.0)
+        dat = np.arange(200.0).reshape(100, 2)
+        store_data("c1", data={"x": times, "y": dat}, chunks=30)
+        store_data("c2", data={"x": times, "y": 2 * dat})
+        self.assertTrue(is_chunked(data_quants["c1"]))
+        add("c1", "c2", newname="csum")
+        time_clip("csum", 10.0, 19.0, newname="cclip")
+        avg_data("c1", res=10.0, newname="cavg")
+        # the results are not computed until needed
+        for name in ["csum", "cclip", "cavg"]:
+            self.assertTrue(is_chunked(data_quants[name]))
+        assert_array_equal(get_data("csum").y, 3 * dat)
+        assert_array_equal(get_data("cclip").y, 3 * dat[10:20])
+        assert_array_equal(get_data("cavg").y, dat.reshape(10, 10, 2).mean(axis=1))
+        self.assertTrue(is_chunked(get_data("csum", lazy=True).y))
+        tcompute("csum")
+        self.assertFalse(is_chunked(data_quants["csum"]))
+
+    def test_texpr(self):
+        from pyspedas import texpr
+        from pyspedas.tplot_tools import expression
+
+        del_data("*")
+        times = np.arange(10.0)
+        e = np.arange(30.0).reshape(10, 3)
+        b = np.cos(e)
+        store_data("e", data={"x": times, "y": e})
+        store_data("b", data={"x": times, "y": b})
+        store_data("b_half", data={"x": times[::2], "y": b[::2]})
+        bexpr = texpr("b")
+        exb = 1e3 * texpr("e").cross(bexpr) / bexpr.dot(bexpr)
+        # several blocks of times
+        block_rows = expression._BLOCK_ROWS
+        expression._BLOCK_ROWS = 3
+        try:
+            self.assertEqual(exb.evaluate("exb"), "exb")
+        finally:
+            expression._BLOCK_ROWS = block_rows
+        assert_allclose(get_data("exb").y, 1e3 * np.cross(e, b) / np.sum(b * b, axis=1)[:, np.newaxis])
+        t, v = (2 - texpr("b") / texpr("b").magnitude()).evaluate()
+        assert_allclose(v, 2 - b / np.linalg.norm(b, axis=1)[:, np.newaxis])
+        # other variables are interpolated to the times of the first one
+        t, v = (texpr("e") - texpr("b_half")).evaluate()
+        self.assertEqual(len(t), 10)
+        assert_allclose(v[::2], e[::2] - b[::2])
+        self.assertTrue(np.all(np.isnan(v[-1])))
+        self.assertIsNone((texpr("e") + texpr("doesnt_exist")).evaluate("x"))
+        # constant vectors broadcast over the components
+        t, v = (texpr("e") * np.array([1.0, 2.0, 3.0]) + np.array([1, 0, 0])).evaluate()
+        assert_allclose(v, e * [1.0, 2.0, 3.0] + [1, 0, 0])
+        t, v = texpr("b").dot(np.array([0.0, 0.0, 1.0])).evaluate()
+        assert_allclose(v, b[:, 2])
+
+    def test_parallel_map(self):
+        from pyspedas.tplot_tools import set_parallel, parallel_map
+
+        self.assertEqual(parallel_map(math.sqrt, [16.0, 4.0, 9.0], max_workers=2), [4.0, 2.0, 3.0])
+        del_data("*")
+        names = ["p%d" % i for i in range(4)]
+        for name in names:
+            y = np.random.random((50, 3))
+            y[10] = 100.0
+            y[20] = np.nan
+            store_data(name, data={"x": np.arange(50.0), "y": y})
+        tsmooth(names, width=5, newname=[n + "-ser" for n in names])
+        subtract_average(names, suffix="-dser")
+        time_clip(names, 5.0, 30.0, suffix="-cser")
+        tdeflag(names, method="linear", suffix="-fser")
+        try:
+            set_parallel(3)
+            tsmooth(names, width=5)
+            subtract_average(names, max_workers=2)
+            time_clip(names, 5.0, 30.0, max_workers=2)
+            tdeflag(names, method="linear")
+        finally:
+            set_parallel()
+        for name in names:
+            assert_array_equal(get_data(name + "-s").y, get_data(name + "-ser").y)
+            assert_array_equal(get_data(name + "-d").y, get_data(name + "-dser").y)
+            assert_array_equal(get_data(name + "-tclip").times, np.arange(5.0, 31.0))
+            assert_array_equal(get_data(name + "-tclip").y, get_data(name + "-cser").y)
+            assert_array_equal(get_data(name + "-deflag").y, get_data(name + "-fser").y)
+            self.assertFalse(np.isnan(get_data(name + "-deflag").y).any())
+
+    def test_running_statistic(self):
+        from pyspedas.tplot_tools.running_stats import running_statistic
+
+        y = np.random.random((60, 2))
+        y[[3, 4, 5, 20, 41], 0] = np.nan
+        y[30:35, 1] = np.nan
+        width = 6
+        for statistic in ["mean", "median", "min", "max", "std"]:
+            result = running_statistic(y, width, statistic=statistic)
+            nanfunc = getattr(np, "nan" + statistic)
+            for i in range(len(y)):
+                window = y[max(i - width // 2, 0):i - width // 2 + width]
+                assert_allclose(result[i], nanfunc(window, axis=0), rtol=1e-12)
+        # a NaN makes the statistics of the windows that contain it NaN
+        result = running_statistic(y, width, statistic="median", skip_nans=False)
+        self.assertTrue(np.isnan(result[1:9, 0]).all())
+        self.assertFalse(np.isnan(result[[0] + list(range(9, 18)), 0]).any())
+        # subtracting a running median removes a slowly varying baseline, but not a spike
+        t = np.arange(200.0)
+        baseline = 1e-3 * t
+        ramp = baseline.copy()
+        ramp[100] += 5.0
+        store_data("ramp", data={"x": t, "y": ramp})
+        subtract_median("ramp", width=5)
+        d = get_data("ramp-m").y
+        self.assertAlmostEqual(d[100], 5.0, places=2)
+        assert_allclose(np.delete(d, 100), 0.0, atol=0.01)
+        subtract_average("ramp", width=5, newname="ramp-d")
+        self.assertAlmostEqual(get_data("ramp-d").y[100], 4.0, places=2)
+
     def test_tplot_spectools(self):
         del_data("*")
         # tpwrspc, pwrspc
@@ -245,6 +404,23 @@ class AnalysisTestCases(BaseTestCase):
         pwr_spec("dp", newname="dp_pwrspec")
         # pyspedas.tplot("dp_pwrspec")
         self.assertTrue(data_exists("dp_pwrspec"))
+        dp = get_data("dp_pwrspec")
+        self.assertEqual(dp.y.shape, (77, 127))
+        # the peak is at 1/(2 pi) Hz in every window
+        assert_allclose(dp.v[np.arange(77), np.argmax(dp.y, axis=1)], 1 / (2 * np.pi), atol=1 / 256)
+        # dpwrspc, computed in chunks of windows in a thread pool
+        from pyspedas.tplot_tools.tplot_math import dpwrspc as dpwrspc_module
+        t, f, p = dpwrspc_module.dpwrspc(time, quantity, notmvariance=True)
+        chunk_points = dpwrspc_module._CHUNK_POINTS
+        dpwrspc_module._CHUNK_POINTS = 1000
+        try:
+            t2, f2, p2 = dpwrspc_module.dpwrspc(time, quantity, notmvariance=True, max_workers=4)
+        finally:
+            dpwrspc_module._CHUNK_POINTS = chunk_points
+        self.assertEqual(p.shape, (77, 42))
+        assert_array_equal(t, t2)
+        assert_array_equal(p, p2)
+        self.assertTrue(np.all(np.argmax(p, axis=1) == np.argmin(np.abs(f[0] - 1 / (2 * np.pi)))))
         # spec_mult
         store_data(
             "h",
@@ -1,5 +1,6 @@
 """Test functions in the utilites folder."""
 
+import importlib.util
 import unittest
 import numpy as np
 from numpy.testing import assert_allclose
@@ -64,6 +65,323 @@ class UtilTestCases(unittest.TestCase):
         tcopy("doesnt exist", "another-copy")
         tcopy(["another-copy", "test"], "another-copy")
 
+    def test_tplot_copy_shared(self):
+        """Test that copies share their data until it is modified."""
+        from pyspedas import tplot_copy, replace_data, subtract_average
+        from pyspedas.tplot_tools import data_quants, unshare_data
+
+        store_data("cow", data={"x": [1, 2, 3], "y": [1.0, 2.0, 3.0]})
+        tplot_copy("cow", "cow-copy")
+        tcopy("cow", "cow-tcopy")
+        self.assertTrue(np.shares_memory(data_quants["cow"].values, data_quants["cow-copy"].values))
+        self.assertTrue(np.shares_memory(data_quants["cow"].values, data_quants["cow-tcopy"].values))
+        # writing into the arrays returned by get_data only changes that variable
+        get_data("cow-copy").y[0] = 5.0
+        self.assertTrue(get_data("cow-copy").y.tolist() == [5.0, 2.0, 3.0])
+        self.assertTrue(get_data("cow").y.tolist() == [1.0, 2.0, 3.0])
+        d = get_data("cow")
+        d.y[d.y > 2.5] = np.nan
+        self.assertTrue(np.isnan(get_data("cow").y[2]))
+        self.assertTrue(get_data("cow-tcopy").y.tolist() == [1.0, 2.0, 3.0])
+        store_data("cow", data={"x": [1, 2, 3], "y": [1.0, 2.0, 3.0]})
+        # the source of a copy or pseudovariable stays writeable
+        tplot_copy("cow", "cow-copy2")
+        store_data("cow-pseudo", data=["cow", "cow-copy2"])
+        self.assertTrue(data_quants["cow"].values.flags["WRITEABLE"])
+        get_data("cow").y[1] = 7.0
+        self.assertTrue(get_data("cow").y.tolist() == [1.0, 7.0, 3.0])
+        self.assertTrue(get_data("cow-copy2").y.tolist() == [1.0, 2.0, 3.0])
+        # shared data can be replaced
+        replace_data("cow-copy", [4.0, 5.0, 6.0])
+        self.assertTrue(get_data("cow").y.tolist() == [1.0, 7.0, 3.0])
+        subtract_average("cow-tcopy", overwrite=True)
+        self.assertTrue(get_data("cow-tcopy").y.tolist() == [-1.0, 0.0, 1.0])
+        self.assertTrue(get_data("cow").y.tolist() == [1.0, 7.0, 3.0])
+        unshare_data("cow")
+        data_quants["cow"].values[0] = 0.0
+        self.assertTrue(get_data("cow").y.tolist() == [0.0, 7.0, 3.0])
+
+    def test_merge_data_quant(self):
+        """Test merging newly loaded chunks into an existing variable."""
+        from pyspedas.tplot_tools import data_quants
+        from pyspedas.tplot_tools.importers.merge_data_quant import merge_data_quant
+
+        store_data("chunk1", data={"x": [1, 2, 3], "y": [1, 2, 3]})
+        store_data("chunk2", data={"x": [4, 5, 6], "y": [4, 5, 6]})
+        store_data("chunk3", data={"x": [2.5, 3.5], "y": [2.5, 3.5]})
+        # append after existing data
+        merged = merge_data_quant(data_quants["chunk1"], data_quants["chunk2"])
+        self.assertTrue(merged.values.tolist() == [1, 2, 3, 4, 5, 6])
+        self.assertTrue(merged.attrs["plot_options"] is data_quants["chunk2"].attrs["plot_options"])
+        # prepend before existing data
+        merged = merge_data_quant(data_quants["chunk2"], data_quants["chunk1"])
+        self.assertTrue(merged.values.tolist() == [1, 2, 3, 4, 5, 6])
+        # overlapping chunks are sorted
+        merged = merge_data_quant(data_quants["chunk1"], data_quants["chunk3"])
+        self.assertTrue(merged.values.tolist() == [1, 2, 2.5, 3, 3.5])
+        # so are unsorted ones, even if they don't overlap
+        store_data("chunk4", data={"x": [8, 7], "y": [8, 7]})
+        merged = merge_data_quant(data_quants["chunk2"], data_quants["chunk4"])
+        self.assertTrue(merged.values.tolist() == [4, 5, 6, 7, 8])
+
+    def test_store_data_nocopy(self):
+        """Test storing arrays without copying them."""
+        from pyspedas import get_data
+        from pyspedas.tplot_tools import data_quants
+
+        times = np.array([1.0, np.nan, 3.0, 4.0])
+        y = np.arange(8.0).reshape(4, 2)
+        bins = np.array([10.0, 20.0])
+        attrs = {"bins": bins, "opts": {"a": 1}}
+        store_data("nocopy", data={"x": times, "y": y}, attr_dict=attrs, copy=False)
+        self.assertTrue(np.shares_memory(data_quants["nocopy"].values, y))
+        self.assertTrue(data_quants["nocopy"].attrs["bins"] is bins)
+        # the caller's float times are not modified
+        self.assertTrue(np.isnan(times[1]))
+        assert_allclose(get_data("nocopy").times, [1.0, 0.0, 3.0, 4.0])
+        # nested metadata is still copied
+        data_quants["nocopy"].attrs["opts"]["a"] = 2
+        self.assertTrue(attrs["opts"]["a"] == 1)
+        store_data("nocopy2", data={"x": np.array([1.0, 2.0]), "y": np.array([1.0, 2.0])}, copy=True)
+        self.assertFalse(np.shares_memory(data_quants["nocopy2"].values, y))
+        dt = np.array(["2020-01-01T00:00:00", "2020-01-01T00:00:01"], dtype="datetime64[ns]")
+        store_data("nocopy3", data={"x": dt, "y": np.array([1.0, 2.0])}, copy=False)
+        self.assertTrue((data_quants["nocopy3"].time.values == dt).all())
+
+    def test_get_data_views(self):
+        """Test the cached unix times and read-only views returned by get_data."""
+        from pyspedas.tplot_tools import get_data_views
+
+        store_data("views", data={"x": [1.0, 2.0, 3.0], "y": [[1, 2], [3, 4], [5, 6]], "v": [10, 20]})
+        d = get_data("views")
+        # the unix times are cached and read-only
+        self.assertTrue(d.times is get_data("views").times)
+        self.assertFalse(d.times.flags["WRITEABLE"])
+        self.assertTrue(get_data("views", ensure_writeable=True).times.flags["WRITEABLE"])
+        times, y, coords = get_data_views("views")
+        self.assertTrue(times is d.times)
+        self.assertFalse(y.flags["WRITEABLE"])
+        self.assertTrue(coords["spec_bins"].tolist() == [10, 20])
+        self.assertTrue(get_data_views("views", dt=True)[0][0] == np.datetime64(1, "s"))
+        # storing new times invalidates the cache
+        store_data("views", data={"x": [4.0, 5.0, 6.0], "y": [1, 2, 3]})
+        self.assertTrue(get_data("views").times.tolist() == [4.0, 5.0, 6.0])
+        self.assertTrue(get_data_views("doesnt exist") is None)
+
+    def test_memory_budget(self):
+        """Test spilling least recently used variables to disk when over the memory budget."""
+        from pyspedas import tplot_rename
+        from pyspedas.tplot_tools import set_memory_budget, tplot_memory_usage, data_quants
+
+        del_data("*")
+        for i in range(3):
+            store_data("mem%d" % i, data={"x": np.arange(1000.0), "y": np.full((1000, 10), float(i))})
+        usage = tplot_memory_usage()
+        self.assertTrue(usage["total"] == 3 * (8000 + 80000))
+        self.assertTrue(usage["resident"] == usage["total"] and usage["spilled"] == [])
+        try:
+            set_memory_budget(200000)
+            usage = tplot_memory_usage()
+            self.assertTrue(usage["spilled"] == ["mem0"])
+            self.assertTrue(usage["resident"] <= 200000)
+            # accessing a spilled variable brings it back, and spills the least recently used one
+            self.assertTrue(get_data("mem0").y[0, 0] == 0.0)
+            self.assertTrue(tplot_memory_usage()["spilled"] == ["mem1"])
+            # spilled variables can still be read without reloading them
+            self.assertTrue(data_quants.get("mem1").values[5, 5] == 1.0)
+            self.assertTrue(tplot_memory_usage("mem*")["budget"] == 200000)
+            # renaming keeps the variable's position and doesn't change which ones were used last
+            get_data("mem0")
+            tplot_rename("mem2", "mem2r")
+            self.assertTrue(list(data_quants.keys()) == ["mem0", "mem1", "mem2r"])
+            store_data("mem3", data={"x": np.arange(1000.0), "y": np.zeros((1000, 10))})
+            self.assertTrue(tplot_memory_usage()["spilled"] == ["mem1", "mem2r"])
+        finally:
+            set_memory_budget(None)
+            del_data("mem*")
+
+    def test_cached_y_range(self):
+        """Test that the y range is computed on demand and reset when the data changes."""
+        from pyspedas import get_cached_y_range, replace_data
+        from pyspedas.tplot_tools import data_quants
+
+        store_data("yr", data={"x": [1, 2, 3], "y": [1.0, np.inf, 5.0]})
+        self.assertTrue(data_quants["yr"].attrs["plot_options"]["yaxis_opt"]["y_range"] is None)
+        self.assertTrue(get_cached_y_range(data_quants["yr"]) == [1.0, 5.0])
+        self.assertTrue(data_quants["yr"].attrs["plot_options"]["yaxis_opt"]["y_range"] == [1.0, 5.0])
+        replace_data("yr", [2.0, 3.0, 4.0])
+        self.assertTrue(data_quants["yr"].attrs["plot_options"]["yaxis_opt"]["y_range"] is None)
+        self.assertTrue(get_cached_y_range(data_quants["yr"]) == [2.0, 4.0])
+        # a range set by the user is kept
+        options("yr", "y_range", [0.0, 10.0])
+        self.assertTrue(get_cached_y_range(data_quants["yr"]) == [0.0, 10.0])
+
+    def test_cached_y_range_pseudovar_plot(self):
+        """Test the y limits of a pseudovariable plot with a new and with a reset y range."""
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from pyspedas import tplot, replace_metadata
+        from pyspedas.tplot_tools import data_quants
+
+        t = np.arange(10.0) + 1.6e9
+        store_data("yra", data={"x": t, "y": np.linspace(-1.0, 1.0, 10)})
+        store_data("yrb", data={"x": t, "y": np.linspace(2.0, 8.0, 10)})
+        store_data("yrpv", data=["yra", "yrb"])
+        # without a y range of its own, the pseudovariable shows all of its components
+        fig, axis = tplot("yrpv", display=False, return_plot_objects=True)
+        self.assertTrue(np.allclose(axis.get_ylim(), [-1.0, 8.0]))
+        plt.close(fig)
+        # a y range reset by replace_metadata is computed from the pseudovariable's own data
+        replace_metadata("yrpv", get_data("yrpv", metadata=True))
+        self.assertTrue(data_quants["yrpv"].attrs["plot_options"]["yaxis_opt"]["y_range"] is None)
+        fig, axis = tplot("yrpv", display=False, return_plot_objects=True)
+        self.assertTrue(data_quants["yrpv"].attrs["plot_options"]["yaxis_opt"]["y_range"] == [-1.0, 1.0])
+        self.assertTrue("y_range_user" not in data_quants["yrpv"].attrs["plot_options"]["yaxis_opt"])
+        plt.close(fig)
+
+    def test_tnames_index(self):
+        """Test that wildcard name lookups follow variables being added, renamed and removed."""
+        from pyspedas import tnames, tplot_rename, wildcard_expand
+
+        del_data("*")
+        for name in ["idx_a_gsm", "idx_b_gsm", "idx_a_gse"]:
+            store_data(name, data={"x": [1, 2], "y": [1, 2]})
+        self.assertTrue(tnames("idx_?_gsm") == ["idx_a_gsm", "idx_b_gsm"])
+        self.assertTrue(tnames("*_gse") == ["idx_a_gse"])
+        self.assertTrue(tnames("idx_[ab]_gs?") == ["idx_a_gsm", "idx_b_gsm", "idx_a_gse"])
+        self.assertTrue(tnames(["*gsm", "idx_a*"]) == ["idx_a_gsm", "idx_b_gsm", "idx_a_gse"])
+        store_data("idx_c_gsm", data={"x": [1, 2], "y": [1, 2]})
+        self.assertTrue(tnames("*_gsm") == ["idx_a_gsm", "idx_b_gsm", "idx_c_gsm"])
+        tplot_rename("idx_a_gsm", "idx_d_gsm")
+        self.assertTrue(tnames("*_gsm") == ["idx_d_gsm", "idx_b_gsm", "idx_c_gsm"])
+        del_data("idx_b*")
+        self.assertTrue(tnames("*_gsm") == ["idx_d_gsm", "idx_c_gsm"])
+        self.assertTrue(wildcard_expand(["A_x", "a_X", "b"], "a_?", case_sensitive=False) == ["A_x", "a_X"])
+        del_data("*")
+
+    def test_time_clip_sorted(self):
+        """Test clipping variables with sorted and unsorted times."""
+        from pyspedas.tplot_tools import data_quants, times_sorted
+
+        store_data("clip", data={"x": np.arange(10.0), "y": np.arange(20.0).reshape(10, 2), "v": [1, 2], "dy": np.ones((10, 2))})
+        store_data("clip_unsorted", data={"x": [3.0, 1.0, 2.0, 5.0], "y": [3.0, 1.0, 2.0, 5.0]})
+        self.assertTrue(times_sorted(data_quants["clip"]))
+        self.assertFalse(times_sorted(data_quants["clip_unsorted"]))
+        time_clip(["clip", "clip_unsorted"], 1.5, 5.0)
+        d = get_data("clip-tclip")
+        self.assertTrue(d.times.tolist() == [2.0, 3.0, 4.0, 5.0])
+        self.assertTrue(d.y[:, 0].tolist() == [4.0, 6.0, 8.0, 10.0])
+        self.assertTrue(data_quants["clip-tclip"].attrs["plot_options"]["error"].shape == (4, 2))
+        # the clipped data is copied; a clip of the full range shares the original's data
+        # (copy-on-write) unless copy_data is set
+        self.assertFalse(np.shares_memory(data_quants["clip-tclip"].values, data_quants["clip"].values))
+        time_clip("clip", 0.0, 9.0, suffix="-all")
+        self.assertTrue(np.shares_memory(data_quants["clip-all"].values, data_quants["clip"].values))
+        time_clip("clip", 0.0, 9.0, suffix="-copy", copy_data=True)
+        self.assertFalse(np.shares_memory(data_quants["clip-copy"].values, data_quants["clip"].values))
+        self.assertTrue(get_data("clip_unsorted-tclip").times.tolist() == [3.0, 2.0, 5.0])
+
+    @unittest.skipIf(importlib.util.find_spec("h5py") is None, "h5py is not installed")
+    def test_tplot_save_hdf5(self):
+        """Test saving variables to HDF5, and restoring them selectively."""
+        import os
+        import tempfile
+        from pyspedas import tplot_save, tplot_restore, tnames
+        from pyspedas.tplot_tools import data_quants
+
+        del_data("*")
+        store_data("h5a", data={"x": np.arange(10.0), "y": np.random.rand(10, 3), "v": [1.0, 2.0, 3.0]})
+        store_data("h5b", data={"x": np.arange(10.0), "y": np.arange(10.0), "dy": np.ones(10)})
+        store_data("h5c", data={"x": np.arange(5.0), "y": np.arange(5.0)})
+        set_units("h5a", "nT")
+        options("h5a", "legend_names", ["x", "y", "z"])
+        filename = os.path.join(tempfile.mkdtemp(), "test.h5")
+        tplot_save(["h5a", "h5b", "h5c"], filename=filename, compression="gzip")
+        expected = {name: data_quants[name] for name in ["h5a", "h5b"]}
+
+        del_data("*")
+        tplot_restore(filename, names="h5[ab]")
+        self.assertTrue(tnames() == ["h5a", "h5b"])
+        for name, data_quant in expected.items():
+            self.assertTrue(data_quants[name].equals(data_quant))
+        self.assertTrue(get_units("h5a") == "nT")
+        self.assertTrue(data_quants["h5a"].attrs["plot_options"]["yaxis_opt"]["legend_names"] == ["x", "y", "z"])
+        assert_allclose(get_data("h5a").v, [1.0, 2.0, 3.0])
+        assert_allclose(get_data("h5b").dy, np.ones(10))
+        del_data("*")
+
+        # a lazily restored file can be saved over, and is closed when its variables are deleted
+        from pyspedas import close_hdf5
+        from pyspedas.tplot_tools import tplot_hdf5
+        tplot_restore(filename, lazy=True)
+        options("h5a", "ytitle", "edited")
+        tplot_save(["h5a", "h5b", "h5c"], filename=filename)
+        self.assertTrue(tplot_hdf5._open_files == {})
+        assert_allclose(get_data("h5b").y, np.arange(10.0))
+        del_data("*")
+        tplot_restore(filename, lazy=True)
+        self.assertTrue(data_quants["h5a"].attrs["plot_options"]["yaxis_opt"]["axis_label"] == "edited")
+        del_data("*")
+        self.assertTrue(tplot_hdf5._open_files == {})
+        tplot_restore(filename, lazy=True)
+        self.assertTrue(close_hdf5(filename) == ["h5a", "h5b", "h5c"])
+        self.assertTrue(tplot_hdf5._open_files == {})
+        assert_allclose(get_data("h5c").y, np.arange(5.0))
+        del_data("*")
+
+    def test_netcdf_to_tplot_multifile(self):
+        """Test loading and combining several netCDF files."""
+        import os
+        import tempfile
+        import netCDF4
+        from pyspedas import netcdf_to_tplot, time_double
+
+        tmpdir = tempfile.mkdtemp()
+        files = []
+        for i in range(2):
+            filename = os.path.join(tmpdir, "nc_test_%d.nc" % i)
+            files.append(filename)
+            with netCDF4.Dataset(filename, "w") as ds:
+                ds.createDimension("time", 4)
+                tvar = ds.createVariable("time", "f8", ("time",))
+                tvar.units = "minutes since 2020-01-01 00:00:00"
+                tvar[:] = np.arange(4) + 4 * i
+                bvar = ds.createVariable("nc_b", "f4", ("time",))
+                bvar.fillval = -1e31
+                bvar[:] = [1.0, -1e31, 3.0, 4.0]
+        # pass the files out of order, they should still be combined in time order
+        tvars = netcdf_to_tplot(files[::-1], prefix="test_")
+        self.assertTrue(tvars == ["test_nc_b"])
+        d = get_data("test_nc_b")
+        assert_allclose(d.times, time_double("2020-01-01") + 60.0 * np.arange(8))
+        self.assertTrue(np.isnan(d.y[1]) and np.isnan(d.y[5]))
+        self.assertTrue(d.y[0] == 1.0 and d.y[7] == 4.0)
+
+    def test_sts_to_tplot(self):
+        """Test reading a small STS file."""
+        import os
+        import tempfile
+        from pyspedas import sts_to_tplot, time_double
+
+        header = ["OBJECT = FILE", "OBJECT = RECORD", "OBJECT = VECTOR", "NAME = TIME"]
+        for name in ["YEAR", "DOY", "HOUR", "MIN", "SEC", "MSEC"]:
+            header += ["OBJECT = SCALAR", "NAME = " + name, "END_OBJECT"]
+        header += ["END_OBJECT", "OBJECT = VECTOR", "NAME = OB_B"]
+        for name in ["X", "Y", "Z"]:
+            header += ["OBJECT = SCALAR", "NAME = " + name, "END_OBJECT"]
+        header += ["END_OBJECT", "OBJECT = SCALAR", "NAME = OB_N", "END_OBJECT", "END_OBJECT", "END_OBJECT"]
+        rows = ["  2015  32  1  2  3  250  1.0  2.0  3.0  7", "  2015  32  1  2  4  500  4.0  5.0  6.0  8"]
+        filename = os.path.join(tempfile.mkdtemp(), "test.sts")
+        with open(filename, "w") as f:
+            f.write("\n".join(header + rows) + "\n")
+        tvars = sts_to_tplot(filename, prefix="test_")
+        self.assertTrue(sorted(tvars) == ["test_OB_B", "test_OB_N"])
+        d = get_data("test_OB_B")
+        assert_allclose(d.times, time_double(["2015-02-01/01:02:03.25", "2015-02-01/01:02:04.5"]))
+        self.assertTrue(d.y.tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        self.assertTrue(get_data("test_OB_N").y.tolist() == [7.0, 8.0])
+
     def test_tkm2re(self):
         store_data("test", data={"x": [1, 2, 3], "y": [5, 5, 5]})
         options("test", "ysubtitle", "[Re]")
@@ -84,6 +84,29 @@ class TimeTestCases(unittest.TestCase):
             time_double(["2015-12-15 12:07:23.767000", "2015-12-15 12:07:43.767000"]) == [1450181243.767, 1450181263.767]
         )
 
+    def test_time_double_array(self):
+        """Test that arrays of strings give the same results as converting each string separately."""
+        from pyspedas.tplot_tools.time_double import time_float_one
+        strs = ["2015-12-15/12:00", "2015-12-15T12:07:23.767Z", "2015-12-15 12:07:23.1234567", "2015-12-15/6:00",
+                "2015-12", "2015", "1600-06-01 00:00:00.5", "March 25, 2023", "2015-12-15T24:00:00"]
+        expected = [time_float_one(s) for s in strs]
+        self.assertTrue(time_double(strs) == expected)
+        self.assertTrue(time_double(np.array(strs[:-1])) == expected[:-1])
+        self.assertTrue(time_double(np.array([1, 2])) == [1.0, 2.0])
+        # strings numpy can't convert (e.g. '24:00:00') only affect themselves
+        many = ["2015-12-15T12:00:%02d" % (i % 60) for i in range(1000)]
+        many[3] = many[700] = "2015-12-15T24:00:00"
+        self.assertTrue(time_double(many) == [time_float_one(s) for s in many])
+
+    def test_time_string_array(self):
+        """Test that arrays of times give the same strings as formatting each time separately."""
+        from pyspedas.tplot_tools.time_string import time_string_one
+        times = np.array([1450181243.767, -0.0000005, 1e-7, 2.5e11, 951782400.0 + 0.9999995])
+        for fmt in [None, "%Y-%m-%d/%H:%M:%S", "%y%j %%%f", "%b %d %Y"]:
+            self.assertTrue(time_string(times, fmt=fmt) == [time_string_one(t, fmt) for t in times])
+        self.assertTrue(time_datetime(["2015-12-15/00:00", "2015-10-16/00:00"])
+                        == [datetime(2015, 12, 15, 0, 0, tzinfo=timezone.utc), datetime(2015, 10, 16, 0, 0, tzinfo=timezone.utc)])
+
     def test_degap(self):
         float_times = np.array([1.0, 2.0, 3.0, 11.0, 12.0, 13.0, 21.0, 22.0, 23.0])
         int_times = np.array(float_times, dtype=np.int64)
@@ -194,6 +217,24 @@ class TimeTestCases(unittest.TestCase):
         self.assertEqual(dg_data.times[3], 5.0)
         self.assertFalse(np.isfinite(dg_data.y[3][1]))
 
+    def test_degap_many_gaps(self):
+        """Test degap with many gaps and time-varying bins, against reindexing the variable."""
+        from pyspedas.tplot_tools import data_quants
+        steps = np.tile([1.0, 1.0, 3.5, 1.0, 2.5], 200)
+        times = 1.7e9 + np.cumsum(steps)
+        y = np.arange(len(times) * 2.0).reshape(-1, 2)
+        v = y + 0.5
+        for func in ["nan", "ffill"]:
+            store_data("many_gaps", data={"x": times, "y": y, "v": v})
+            degap("many_gaps", dt=1.0, func=func, newname="many_gaps_degap")
+            d = get_data("many_gaps_degap")
+            # three points are added in each 3.5 s gap, and two in each 2.5 s gap
+            self.assertEqual(len(d.times), len(times) + 200 * 5)
+            fill_times = np.array(d.times * 1e9, dtype="datetime64[ns]")
+            expected = data_quants["many_gaps"].reindex({"time": fill_times}, method=None if func == "nan" else "ffill")
+            assert_allclose(d.y, expected.values)
+            assert_allclose(d.v, expected.coords["v"].values)
+
     def test_missing_pseudovar(self):
         times = np.array([1.0, 2.0, 3.0, 11.0, 12.0, 13.0, 21.0, 22.0, 23.0])
         data = [1.0, 2.0, 3.0, 11.0, 12.0, 13.0, 21.0, 22.0, 23.0]